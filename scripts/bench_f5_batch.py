@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+import queue
+import argparse
+
+# Ensure src path is in sys.path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+import torch
+
+from mindmirror import config
+from mindmirror.tts.f5_tts.loader import load_f5_model
+from mindmirror.tts.f5_tts.conditioning import prepare_conditioning, infer_batch
+
+# Sentence chunks of similar length, as split_into_sentences produces them
+CHUNKS = [
+    "Here is the summary of your notifications for today.",
+    "You have two unresolved alerts from this morning.",
+    "The second one looks suspicious, so I blocked the card.",
+    "Let me know if you want me to unblock it again later.",
+    "I also found three new transactions from your grocery store.",
+    "Your balance is still well above the monthly average.",
+    "Nothing else needs your attention right now, all good.",
+    "I will keep an eye on the account and report back soon.",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="F5 real-time factor vs. batch size.")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--nfe", type=int, default=config.F5_NFE_STEPS)
+    parser.add_argument("--style", default="neutral")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    log_queue = queue.Queue()
+    model, vocoder = load_f5_model(log_queue, args.device)
+    while not log_queue.empty():
+        print(log_queue.get()["text"])
+    if not model:
+        return
+    from f5_tts.infer.utils_infer import target_sample_rate
+
+    style = config.F5_STYLES[args.style]
+    cond = prepare_conditioning({args.style: style}, model, args.device, log_queue)[args.style]
+
+    def run(texts):
+        start_t = time.perf_counter()
+        waves = infer_batch(cond, texts, model, vocoder, nfe_step=args.nfe, cfg_strength=style["cfg"], speed=style["speed"])
+        return time.perf_counter() - start_t, sum(len(w) for w in waves) / target_sample_rate
+
+    run(CHUNKS[:1])  # Warm-up
+    print(f"\nDevice {args.device}, NFE {args.nfe}, {torch.get_num_threads()} threads\n")
+    print(f"{'batch':>5}  {'batch time':>10}  {'audio':>7}  {'RTF':>6}  {'first audio':>11}  {'all chunks':>10}")
+    for batch_size in args.batch_sizes:
+        # All chunks in batches of `batch_size`: first audio arrives when the first batch finishes
+        total_time = total_audio = 0.0
+        first_audio = None
+        for i in range(0, len(CHUNKS), batch_size):
+            elapsed, seconds = run(CHUNKS[i:i + batch_size])
+            total_time += elapsed
+            total_audio += seconds
+            first_audio = first_audio or elapsed
+        print(f"{batch_size:>5}  {total_time / -(-len(CHUNKS) // batch_size):>9.2f}s  {total_audio:>6.1f}s  "
+              f"{total_time / total_audio:>6.2f}  {first_audio:>10.2f}s  {total_time:>9.2f}s")
+
+
+if __name__ == "__main__":
+    main()
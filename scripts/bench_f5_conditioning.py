@@ -0,0 +1,80 @@
+import os
+import sys
+import time
+import queue
+import argparse
+import statistics
+
+# Ensure src path is in sys.path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+import torch
+
+from mindmirror import config
+from mindmirror.tts.f5_tts.loader import load_f5_model
+from mindmirror.tts.f5_tts.conditioning import prepare_conditioning, infer_with_conditioning
+
+CHUNKS = [
+    "Here is the summary of your notifications for today.",
+    "You have two unresolved alerts from this morning.",
+    "The second one looks suspicious, so I blocked the card for now.",
+]
+
+
+def measure(label: str, infer, args) -> list[float]:
+    times = []
+    for _ in range(args.runs):
+        for style in args.styles:
+            for chunk in CHUNKS:
+                start_t = time.perf_counter()
+                infer(style, chunk)
+                times.append(time.perf_counter() - start_t)
+    print(f"{label:<22} per chunk: mean {statistics.mean(times):.3f}s  median {statistics.median(times):.3f}s  "
+          f"min {min(times):.3f}s  ({len(times)} chunks)")
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-chunk F5 latency with and without cached reference conditioning.")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--nfe", type=int, default=config.F5_NFE_STEPS)
+    parser.add_argument("--runs", type=int, default=2)
+    parser.add_argument("--styles", nargs="+", default=list(config.F5_STYLES))
+    args = parser.parse_args()
+
+    log_queue = queue.Queue()
+    model, vocoder = load_f5_model(log_queue, args.device)
+    while not log_queue.empty():
+        print(log_queue.get()["text"])
+    if not model:
+        return
+    from f5_tts.infer.utils_infer import infer_process
+
+    def uncached(style, chunk):
+        s = config.F5_STYLES[style]
+        infer_process(s["ref_audio"], s["ref_text"], chunk, model, vocoder, nfe_step=args.nfe,
+                      speed=s["speed"], cfg_strength=s["cfg"], device=args.device, mel_spec_type="vocos",
+                      show_info=lambda *a: None, progress=None)
+
+    start_t = time.perf_counter()
+    conditioning = prepare_conditioning(config.F5_STYLES, model, args.device, log_queue)
+    print(f"Conditioning prepared once in {time.perf_counter() - start_t:.3f}s")
+
+    def cached(style, chunk):
+        s = config.F5_STYLES[style]
+        infer_with_conditioning(conditioning[style], chunk, model, vocoder, nfe_step=args.nfe,
+                                speed=s["speed"], cfg_strength=s["cfg"])
+
+    print(f"\nDevice {args.device}, NFE {args.nfe}, {torch.get_num_threads()} threads\n")
+    # Warm-up (first call pays lazy initialization)
+    cached(args.styles[0], CHUNKS[0])
+    before = measure("infer_process", uncached, args)
+    after = measure("cached conditioning", cached, args)
+    saved = statistics.mean(before) - statistics.mean(after)
+    print(f"\nSaved {saved * 1000:.0f}ms per chunk ({saved / statistics.mean(before):.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+import queue
+import argparse
+import statistics
+
+import numpy as np
+
+# Ensure src path is in sys.path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+import torch
+
+from mindmirror import config
+from mindmirror.tts.f5_tts.loader import load_f5_model
+from mindmirror.tts.f5_tts.conditioning import prepare_conditioning, sample_batch, decode, vocode_stream
+
+CHUNKS = [
+    "Here is the summary of your notifications for today.",
+    "You have two unresolved alerts from this morning, and the second one looks suspicious, so I blocked the card for now.",
+    "Nothing else needs your attention right now.",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="F5 time to first sample: whole-chunk vs. windowed vocoding.")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--nfe", type=int, default=config.F5_NFE_STEPS)
+    parser.add_argument("--style", default="neutral")
+    parser.add_argument("--windows", type=int, nargs="+", default=[24, 48, 96])
+    parser.add_argument("--overlap", type=int, default=config.F5_VOCODER_OVERLAP)
+    args = parser.parse_args()
+
+    log_queue = queue.Queue()
+    model, vocoder = load_f5_model(log_queue, args.device)
+    while not log_queue.empty():
+        print(log_queue.get()["text"])
+    if not model:
+        return
+
+    style = config.F5_STYLES[args.style]
+    cond = prepare_conditioning({args.style: style}, model, args.device, log_queue)[args.style]
+    # Vocoding only depends on the mels, so they are sampled once
+    mels = [sample_batch(cond, [text], model, args.nfe, style["cfg"], style["speed"])[0] for text in CHUNKS]
+    decode(cond, mels[0], vocoder)  # Warm-up
+
+    print(f"\nDevice {args.device}, {torch.get_num_threads()} threads, chunks of "
+          f"{', '.join(str(mel.shape[-1]) for mel in mels)} mel frames\n")
+    print(f"{'mode':<16}  {'first sample':>12}  {'whole chunk':>11}  {'max diff':>8}")
+
+    total = []
+    for mel in mels:
+        start_t = time.perf_counter()
+        decode(cond, mel, vocoder)
+        total.append(time.perf_counter() - start_t)
+    print(f"{'whole chunk':<16}  {statistics.mean(total) * 1000:10.0f}ms  {statistics.mean(total) * 1000:9.0f}ms  {'-':>8}")
+
+    for window in args.windows:
+        first, total, diff = [], [], 0.0
+        for mel in mels:
+            start_t = time.perf_counter()
+            pieces = []
+            for piece in vocode_stream(cond, mel, vocoder, window, args.overlap):
+                if not pieces:
+                    first.append(time.perf_counter() - start_t)
+                pieces.append(piece)
+            total.append(time.perf_counter() - start_t)
+            diff = max(diff, float(np.max(np.abs(np.concatenate(pieces) - decode(cond, mel, vocoder)))))
+        print(f"{f'window {window}':<16}  {statistics.mean(first) * 1000:10.0f}ms  "
+              f"{statistics.mean(total) * 1000:9.0f}ms  {diff:8.4f}")
+
+
+if __name__ == "__main__":
+    main()
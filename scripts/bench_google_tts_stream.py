@@ -0,0 +1,165 @@
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+from concurrent import futures
+
+import grpc
+import numpy as np
+
+# Ensure src path is in sys.path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from google.cloud import texttospeech
+from google.cloud.texttospeech_v1.services.text_to_speech.transports import TextToSpeechGrpcTransport
+
+from mindmirror import config
+from mindmirror.tts.google import GoogleCloudTTS
+from mindmirror.tts.jitter import JitterBuffer
+
+SERVICE = "google.cloud.texttospeech.v1.TextToSpeech"
+SAMPLE_RATE = config.GOOGLE_TTS_SAMPLE_RATE
+
+SEGMENTS = [
+    "Sure, let me check that for you.",
+    "You have two unresolved alerts, and the second one has a fraud score of zero point nine.",
+    "The transaction was blocked because it came from a new device in another country, right after a large crypto payment.",
+    "Done.",
+]
+
+# --- LOCAL STAND-IN SERVER ---
+
+class StandInTTS:
+    """
+    Serves SynthesizeSpeech and StreamingSynthesize with synthetic PCM. Audio length follows
+    the text (CHARS_PER_SECOND); streamed chunks are delivered with configurable delays.
+    """
+    CHARS_PER_SECOND = 15
+
+    def __init__(self, args):
+        self.args = args
+
+    def _pcm(self, text: str) -> bytes:
+        seconds = max(len(text) / self.CHARS_PER_SECOND, 0.2)
+        t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+        return (np.sin(2 * np.pi * 220 * t) * 8000).astype(np.int16).tobytes()
+
+    def _delay(self) -> float:
+        return max(self.args.delay_ms + random.uniform(-self.args.jitter_ms, self.args.jitter_ms), 0) / 1000
+
+    def synthesize(self, request, context):
+        pcm = self._pcm(request.input.text)
+        chunks = len(pcm) // self._chunk_bytes() + 1
+        # The unary call answers once the whole segment has been generated
+        time.sleep(self.args.first_ms / 1000 + sum(self._delay() for _ in range(chunks)))
+        return texttospeech.SynthesizeSpeechResponse(audio_content=b"\0" * 44 + pcm)
+
+    def streaming_synthesize(self, request_iterator, context):
+        text = "".join(r.input.text for r in request_iterator if r.input.text)
+        pcm = self._pcm(text)
+        size = self._chunk_bytes()
+        time.sleep(self.args.first_ms / 1000)
+        for i in range(0, len(pcm), size):
+            yield texttospeech.StreamingSynthesizeResponse(audio_content=pcm[i:i + size])
+            time.sleep(self._delay())
+
+    def _chunk_bytes(self) -> int:
+        return int(self.args.chunk_ms / 1000 * SAMPLE_RATE) * 2
+
+
+def start_server(args) -> tuple:
+    stand_in = StandInTTS(args)
+    handler = grpc.method_handlers_generic_handler(SERVICE, {
+        "SynthesizeSpeech": grpc.unary_unary_rpc_method_handler(
+            stand_in.synthesize,
+            request_deserializer=texttospeech.SynthesizeSpeechRequest.deserialize,
+            response_serializer=texttospeech.SynthesizeSpeechResponse.serialize
+        ),
+        "StreamingSynthesize": grpc.stream_stream_rpc_method_handler(
+            stand_in.streaming_synthesize,
+            request_deserializer=texttospeech.StreamingSynthesizeRequest.deserialize,
+            response_serializer=texttospeech.StreamingSynthesizeResponse.serialize
+        ),
+    })
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+    server.add_generic_rpc_handlers((handler,))
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    return server, f"127.0.0.1:{port}"
+
+# --- MEASUREMENT ---
+
+def play_simulated(chunks, native_sr: int) -> tuple[float, float, int]:
+    """
+    Consumes a chunk generator as the output engine would and returns
+    (time to first audio, total silence from underruns, number of underruns).
+    """
+    start_t = time.perf_counter()
+    first_t = None
+    buffered_until = 0.0
+    stalled = 0.0
+    underruns = 0
+    for chunk in chunks:
+        now = time.perf_counter()
+        if not len(chunk):
+            continue
+        if first_t is None:
+            first_t = now
+            buffered_until = now
+        elif now > buffered_until:
+            stalled += now - buffered_until
+            underruns += 1
+            buffered_until = now
+        buffered_until += len(chunk) / native_sr
+    return (first_t or time.perf_counter()) - start_t, stalled, underruns
+
+
+def run_mode(tts: GoogleCloudTTS, name: str, streaming: bool, jitter: JitterBuffer, args):
+    config.GOOGLE_TTS_STREAMING = streaming
+    ttfa, stalls, underruns = [], [], 0
+    for _ in range(args.runs):
+        for text in SEGMENTS:
+            first, stalled, count = play_simulated(tts.synthesize_chunks(text, "neutral", args.rate, jitter), args.rate)
+            ttfa.append(first)
+            stalls.append(stalled)
+            underruns += count
+
+    p95 = sorted(ttfa)[int(0.95 * (len(ttfa) - 1))]
+    print(f"{name:<26} TTFA mean {statistics.mean(ttfa) * 1000:7.1f}ms  p95 {p95 * 1000:7.1f}ms  "
+          f"stalls {sum(stalls) * 1000:7.1f}ms ({underruns} underruns)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark unary vs. streaming Google Cloud TTS against a local gRPC stand-in.")
+    parser.add_argument("--chunk-ms", type=float, default=100, help="Audio per streamed chunk")
+    parser.add_argument("--delay-ms", type=float, default=60, help="Mean delay between streamed chunks")
+    parser.add_argument("--jitter-ms", type=float, default=80, help="Uniform +/- variation of the chunk delay")
+    parser.add_argument("--first-ms", type=float, default=250, help="Server latency before the first chunk")
+    parser.add_argument("--rate", type=int, default=48000, help="Native output sample rate")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    server, address = start_server(args)
+    tts = GoogleCloudTTS(voice_name="stand-in", language_code="en-US", model_name="stand-in")
+    tts.client = texttospeech.TextToSpeechClient(
+        transport=TextToSpeechGrpcTransport(channel=grpc.insecure_channel(address))
+    )
+
+    print(f"Stand-in at {address}: {args.chunk_ms:.0f}ms chunks every {args.delay_ms:.0f}±{args.jitter_ms:.0f}ms, "
+          f"first chunk after {args.first_ms:.0f}ms\n")
+    try:
+        run_mode(tts, "unary", False, None, args)
+        run_mode(tts, "streaming", True, None, args)
+        jitter = JitterBuffer()
+        run_mode(tts, "streaming + jitter buffer", True, jitter, args)
+        print(f"\nAdapted prebuffer: {jitter.target * 1000:.0f}ms (measured jitter {jitter.jitter * 1000:.0f}ms)")
+    finally:
+        server.stop(0)
+
+
+if __name__ == "__main__":
+    main()
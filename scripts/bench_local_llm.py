@@ -0,0 +1,61 @@
+import os
+import sys
+import asyncio
+import argparse
+import statistics
+
+# Ensure src path is in sys.path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from mindmirror import config
+from mindmirror.llm.local import LocalLLMClient
+
+SYSTEM_PROMPT = "You are a concise voice assistant. Always start your reply with a style tag such as [NEUTRAL]."
+
+# A short multi-turn conversation: later turns reuse the KV cache of the earlier ones
+TURNS = [
+    "Hey, how's it going?",
+    "Explain in two sentences what a token bucket rate limiter does.",
+    "And why would a voice assistant need one?",
+    "Give me one sentence on how KV caching speeds up chat models.",
+    "Thanks, that's all.",
+]
+
+async def run(args):
+    client = LocalLLMClient(
+        model_path=args.model,
+        system_prompt=SYSTEM_PROMPT,
+        n_threads=args.threads,
+        n_ctx=args.ctx
+    )
+    await client.init_chat()
+    print(f"Model: {client.model_name} | threads={client.n_threads} | ctx={client.n_ctx}\n")
+
+    ttfts, speeds = [], []
+    for i, text in enumerate(TURNS, 1):
+        response = await client.send_message(text)
+        ttfts.append(client.last_ttft)
+        if client.last_tokens_per_second:
+            speeds.append(client.last_tokens_per_second)
+        speed = f"{client.last_tokens_per_second:6.1f} tok/s" if client.last_tokens_per_second else "   n/a"
+        print(f"Turn {i}: TTFT {client.last_ttft:5.2f}s | {speed} | {client.turn_tokens:4d} tokens | {response[:60]!r}")
+
+    print("\n--- SUMMARY ---")
+    print(f"TTFT first turn:   {ttfts[0]:.2f}s (cold prompt)")
+    if len(ttfts) > 1:
+        print(f"TTFT later turns:  {statistics.median(ttfts[1:]):.2f}s median (prefix reused from KV cache)")
+    if speeds:
+        print(f"Decode speed:      {statistics.median(speeds):.1f} tok/s median")
+    await client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the local GGUF LLM backend on CPU")
+    parser.add_argument("--model", default=config.LOCAL_LLM_MODEL_PATH, help="Path to the GGUF model file")
+    parser.add_argument("--threads", type=int, default=config.LOCAL_LLM_THREADS)
+    parser.add_argument("--ctx", type=int, default=config.LOCAL_LLM_CONTEXT)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+
+# Ensure src path is in sys.path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from piper import PiperVoice
+
+from mindmirror import config
+from mindmirror.tts.pipervoice.synthesis import load_voice, ParallelSynthesizer
+
+PARAGRAPHS = [
+    "Here is the summary of your notifications for today. You have two unresolved alerts from this morning. "
+    "The second one looks suspicious, so I blocked the card for now. Let me know if you want me to unblock it.",
+    "Sure, let me check that for you. Your balance is still well above the monthly average. "
+    "I also found three new transactions from your grocery store. Nothing else needs your attention right now.",
+]
+
+
+def measure(label: str, synthesize, runs: int):
+    """Sentences per second and time to the first sentence's audio, over all paragraphs."""
+    first, sentences, elapsed = [], 0, 0.0
+    for _ in range(runs):
+        for text in PARAGRAPHS:
+            start_t = time.perf_counter()
+            for i, _audio in enumerate(synthesize(text)):
+                if i == 0:
+                    first.append(time.perf_counter() - start_t)
+                sentences += 1
+            elapsed += time.perf_counter() - start_t
+    print(f"{label:<28} {sentences / elapsed:8.2f} sentences/s   first audio mean {statistics.mean(first) * 1000:6.0f}ms  "
+          f"max {max(first) * 1000:6.0f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Piper throughput and first-audio latency vs. ONNX threads and workers.")
+    parser.add_argument("--model", default=config.PIPER_MODEL_PATH)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{args.model}, {os.cpu_count()} CPUs, graph optimization '{config.PIPER_GRAPH_OPTIMIZATION}'\n")
+
+    voice = PiperVoice.load(args.model, use_cuda=False)
+    baseline = lambda text: (chunk.audio_float_array for chunk in voice.synthesize(text))
+    next(baseline(PARAGRAPHS[0]))  # Warm-up
+    measure("PiperVoice.load defaults", baseline, args.runs)
+
+    for workers in args.workers:
+        for threads in args.threads:
+            synthesizer = ParallelSynthesizer(load_voice(args.model, intra_op_threads=threads, workers=workers), workers)
+            next(synthesizer.synthesize(PARAGRAPHS[0]))  # Warm-up
+            measure(f"{workers} workers x {threads} threads", synthesizer.synthesize, args.runs)
+            synthesizer.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import os
+import re
+import sys
+import time
+import random
+
+# Ensure src path is in sys.path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from mindmirror.llm.response_parser import ResponseTokenizer
+
+# --- REFERENCE (original whole-response implementation) ---
+
+def legacy_strip_markdown(text):
+    text = re.sub(r'```[\w]*\n?', '', text)
+    text = re.sub(r'```', '', text)
+    text = re.sub(r'`([^`]*)`', r'\1', text)
+    text = re.sub(r'\*\*([^*]+)\*\*', r'\1', text)
+    text = re.sub(r'__([^_]+)__', r'\1', text)
+    text = re.sub(r'\*([^*]+)\*', r'\1', text)
+    text = re.sub(r'_([^_]+)_', r'\1', text)
+    text = re.sub(r'^#+\s+', '', text, flags=re.MULTILINE)
+    text = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', text)
+    text = re.sub(r'^\s*[-*+]\s+', '', text, flags=re.MULTILINE)
+    text = re.sub(r'^\s*\d+\.\s+', '', text, flags=re.MULTILINE)
+    return text.strip()
+
+def legacy_segments(response_text):
+    pattern = r'\[(NEUTRAL|EXCITED|SERIOUS|LAZY)\]\s*((?:(?!\[(?:NEUTRAL|EXCITED|SERIOUS|LAZY)\]).)+)'
+    matches = re.findall(pattern, response_text, re.IGNORECASE | re.DOTALL)
+    if matches:
+        segments = [(style.lower(), text.strip()) for style, text in matches]
+    else:
+        segments = [("neutral", response_text.strip())]
+    return [(style, legacy_strip_markdown(text)) for style, text in segments]
+
+# --- FIXTURES ---
+
+FIXTURES = [
+    "[NEUTRAL] Hey there! Ready when you are.",
+    "[EXCITED] Nice, that worked!",
+    "[SERIOUS] Heads up: alert a2222222 has a fraud score of 0.915 and is still unresolved.",
+    "[LAZY] Yeah, sure.",
+    "[NEUTRAL] You've got **two** unresolved alerts:\n\n*   **Alert a1111111** for `acc_mario`: score 0.72, decision REVIEW.\n*   **Alert a2222222** for `acc_alice`: score 0.915, decision BLOCK.\n\n[SERIOUS] The second one looks nasty, foreign device and a big crypto payment.",
+    "[NEUTRAL] Here's the breakdown:\n1. GROCERY: 450 transactions\n2. ELECTRONICS: 210 transactions\n3. FINANCIAL: 85 transactions",
+    "[EXCITED] Done! [NEUTRAL] The transaction is now ALLOWED.",
+    "No tag at all, just *plain* text.",
+    "Preamble that gets dropped. [LAZY] Meh, fine.",
+    "[neutral] lowercase tags work too [Excited] and mixed case!",
+    "[NEUTRAL][SERIOUS] Empty first tag.",
+    "[NEUTRAL]   [EXCITED] Whitespace-only segment.",
+    "[NEUTRAL] ## Summary\nVolumes look normal.\n- Flagged: 18\n- Blocked: 5",
+    "[NEUTRAL] Run this:\n```python\nprint('hi')\n```\nand you're set.",
+    "[SERIOUS] Check [the docs](https://example.com/docs) before overriding __anything__.",
+    "[NEUTRAL] The model is `isolation_forest_v1.2.0`, trained on 450000 samples.",
+    "Trailing tag only [NEUTRAL]",
+    "",
+]
+
+def tokenize(text, chunk_sizes):
+    tokenizer = ResponseTokenizer()
+    segments = []
+    pos = 0
+    while pos < len(text):
+        size = next(chunk_sizes)
+        segments.extend(tokenizer.feed(text[pos:pos + size]))
+        pos += size
+    return segments + tokenizer.close()
+
+def check_fixtures():
+    rng = random.Random(0)
+    failures = 0
+    for fixture in FIXTURES:
+        expected = legacy_segments(fixture)
+        for chunking in ("whole", "char", "random"):
+            if chunking == "whole":
+                sizes = iter(lambda: max(len(fixture), 1), None)
+            elif chunking == "char":
+                sizes = iter(lambda: 1, None)
+            else:
+                sizes = iter(lambda: rng.randint(1, 12), None)
+            actual = tokenize(fixture, sizes)
+            if actual != expected:
+                failures += 1
+                print(f"❌ MISMATCH ({chunking}): {fixture!r}\n   expected {expected}\n   actual   {actual}")
+    print(f"Fixtures: {len(FIXTURES)} x 3 chunkings, {failures} mismatches")
+    return failures == 0
+
+def bench(label, fn, corpus, repeat):
+    total_chars = sum(len(t) for t in corpus) * repeat
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in corpus:
+            fn(text)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed * 1000:8.1f} ms  {total_chars / elapsed / 1e6:6.2f} MB/s")
+
+def main():
+    ok = check_fixtures()
+
+    corpus = FIXTURES * 20
+    repeat = 50
+    print("\n--- THROUGHPUT ---")
+    bench("legacy (whole response)", legacy_segments, corpus, repeat)
+    bench("tokenizer (whole response)", lambda t: tokenize(t, iter(lambda: max(len(t), 1), None)), corpus, repeat)
+    bench("tokenizer (16-char deltas)", lambda t: tokenize(t, iter(lambda: 16, None)), corpus, repeat)
+
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
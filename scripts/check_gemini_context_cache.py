@@ -0,0 +1,181 @@
+import os
+import re
+import sys
+import json
+import asyncio
+import argparse
+import threading
+from unittest import mock
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Ensure src path is in sys.path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from google import genai
+from google.genai import types
+
+from mindmirror.llm.google.client import GeminiLLMClient
+
+MODEL = "stand-in-model"
+
+# --- LOCAL STAND-IN SERVER ---
+
+class StandInGenAI:
+    """
+    Minimal Gemini API: cachedContents create/update/delete and generateContent. Requests
+    naming a cache that does not exist fail with 404 like the real API; `fail_next` makes
+    the next generateContent fail with a given (code, status, message).
+    """
+    def __init__(self):
+        self.caches = {}
+        self.deleted = []   # Delete requests, also for caches that no longer exist
+        self.requests = []  # (cached content or None, has inline system instruction)
+        self.fail_next = None
+        self.counter = 0
+        self.lock = threading.Lock()
+
+    def handle(self, method: str, path: str, body: dict) -> tuple[int, dict]:
+        with self.lock:
+            if method == "POST" and path.endswith("/cachedContents"):
+                self.counter += 1
+                name = f"cachedContents/stand-in-{self.counter}"
+                self.caches[name] = body
+                return 200, {"name": name, "model": body.get("model"), "usageMetadata": {"totalTokenCount": 4096}}
+            match = re.search(r"(cachedContents/[\w-]+)$", path)
+            if match and method in ("PATCH", "DELETE"):
+                name = match.group(1)
+                if method == "DELETE":
+                    self.deleted.append(name)
+                if name not in self.caches:
+                    return 404, self._error(404, "NOT_FOUND", f"CachedContent not found: {name}")
+                if method == "DELETE":
+                    del self.caches[name]
+                    return 200, {}
+                return 200, {"name": name}
+            if method == "POST" and path.endswith(":generateContent"):
+                cached = body.get("cachedContent")
+                self.requests.append((cached, "systemInstruction" in body))
+                if self.fail_next:
+                    code, status, message = self.fail_next
+                    self.fail_next = None
+                    return code, self._error(code, status, message)
+                if cached and cached not in self.caches:
+                    return 404, self._error(404, "NOT_FOUND", "CachedContent not found (or permission denied)")
+                return 200, {
+                    "candidates": [{"content": {"role": "model", "parts": [{"text": "ok"}]}, "finishReason": "STOP"}],
+                    "usageMetadata": {"promptTokenCount": 10, "candidatesTokenCount": 1, "totalTokenCount": 11}
+                }
+            return 404, self._error(404, "NOT_FOUND", f"No stand-in for {method} {path}")
+
+    @staticmethod
+    def _error(code: int, status: str, message: str) -> dict:
+        return {"error": {"code": code, "status": status, "message": message}}
+
+
+def start_server(stand_in: StandInGenAI) -> tuple:
+    class Handler(BaseHTTPRequestHandler):
+        def _serve(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            code, payload = stand_in.handle(self.command, self.path.split("?")[0], body)
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_POST = do_PATCH = do_DELETE = _serve
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+# --- CHECKS ---
+
+def make_client(address: str) -> GeminiLLMClient:
+    """A GeminiLLMClient whose GenAI client talks to the stand-in instead of Vertex AI."""
+    client = genai.Client(api_key="stand-in", http_options=types.HttpOptions(base_url=address, api_version="v1beta"))
+    with mock.patch.object(genai, "Client", lambda **_: client):
+        llm = GeminiLLMClient(MODEL, "You are a stand-in assistant.", [], None)
+    llm.router = None
+    return llm
+
+
+def check(label: str, condition: bool) -> bool:
+    print(f"{'PASS' if condition else 'FAIL'}  {label}")
+    return condition
+
+
+async def run_checks(address: str, stand_in: StandInGenAI) -> bool:
+    results = []
+    llm = make_client(address)
+    await llm.send_message("Hello")
+    first_cache = llm.context_cache.name
+    results.append(check("turn is sent with the cached prefix", stand_in.requests[-1] == (first_cache, False)))
+
+    # The cache expires server-side: one inline retry, and the stale handle is deleted
+    stand_in.caches.pop(first_cache)
+    sent = len(stand_in.requests)
+    await llm.send_message("Still there?")
+    results.append(check("expired cache falls back inline once", stand_in.requests[sent:] == [(first_cache, False), (None, True)]))
+    results.append(check("expired cache handle is dropped", llm.context_cache.name is None and first_cache in stand_in.deleted))
+    await llm.send_message("And now?")
+    second_cache = llm.context_cache.name
+    results.append(check("next turn creates a new cache", second_cache not in (None, first_cache)
+                         and stand_in.requests[-1] == (second_cache, False)))
+
+    # A cache rejected as invalid still exists server-side and must be deleted, not leaked until its TTL
+    stand_in.fail_next = (400, "INVALID_ARGUMENT", "Cached content is invalid for this request.")
+    sent = len(stand_in.requests)
+    await llm.send_message("Once more")
+    results.append(check("invalid cache falls back inline once", stand_in.requests[sent:] == [(second_cache, False), (None, True)]))
+    results.append(check("invalid cache is deleted server-side", second_cache not in stand_in.caches))
+    await llm.send_message("Recreate")
+
+    # Quota errors are not cache errors: no inline retry, the cache is kept
+    stand_in.fail_next = (429, "RESOURCE_EXHAUSTED", "Resource has been exhausted (e.g. check quota).")
+    sent, cache = len(stand_in.requests), llm.context_cache.name
+    try:
+        await llm.send_message("Quota?")
+        raised = False
+    except Exception:
+        raised = True
+    results.append(check("429 is raised without an inline retry", raised and len(stand_in.requests) == sent + 1))
+    results.append(check("429 keeps the cache", llm.context_cache.name == cache and cache in stand_in.caches))
+
+    # Restart with session persistence: the cache outlives the process and is adopted
+    state = llm.export_state()
+    await llm.close(keep_state=True)
+    results.append(check("persisted cache survives shutdown", cache in stand_in.caches))
+    restarted = make_client(address)
+    restarted.restore_state(state)
+    sent = len(stand_in.requests)
+    await restarted.send_message("Back again")
+    results.append(check("restarted client reuses the cache", stand_in.requests[sent:] == [(cache, False)]))
+
+    await restarted.close()
+    results.append(check("cache is deleted without persistence", cache not in stand_in.caches))
+    return all(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checks Gemini context-cache fallbacks and restarts against a local GenAI stand-in.")
+    parser.parse_args()
+
+    stand_in = StandInGenAI()
+    server, address = start_server(stand_in)
+    try:
+        ok = asyncio.run(run_checks(address, stand_in))
+    finally:
+        server.shutdown()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
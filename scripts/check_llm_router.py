@@ -0,0 +1,53 @@
+import os
+import sys
+import argparse
+
+# Ensure src path is in sys.path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+from mindmirror.llm.router import TurnRouter, LITE, FULL
+
+TOOLS = [{"name": "get_unresolved_alerts"}, {"name": "resolve_alert"}, {"name": "override_transaction_status"}]
+
+# (previous route, utterance, expected route)
+CASES = [
+    # Answers to "Should I resolve alert 123?" must reach the model that can run the action
+    (FULL, "yes", FULL),
+    (FULL, "Yes, please.", FULL),
+    (FULL, "okay go ahead", FULL),
+    (FULL, "ok", FULL),
+    (FULL, "no", FULL),
+    (FULL, "nope", FULL),
+    (FULL, "sure, go ahead", FULL),
+    (FULL, "Nope, cancel that.", FULL),
+    (FULL, "Don't do it", FULL),
+    # Small talk stays on the lite model
+    (FULL, "thanks", LITE),
+    (FULL, "hello there", LITE),
+    (LITE, "yes", LITE),
+    (LITE, "okay", LITE),
+    # Tool cues win regardless of the previous turn
+    (LITE, "resolve alert 123", FULL),
+    (LITE, "show me the latest alerts", FULL),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checks the TurnRouter heuristics, including replies to a tool turn.")
+    parser.parse_args()
+
+    router = TurnRouter(TOOLS)
+    ok = True
+    for previous, text, expected in CASES:
+        router.last_route = previous
+        route, reason = router.heuristic(text)
+        passed = route == expected
+        ok = ok and passed
+        print(f"{'PASS' if passed else 'FAIL'}  after {previous:<4} {text!r:<24} -> {route} ({reason})")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import os
+import sys
+import time
+import queue
+import argparse
+import threading
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+
+# Ensure src path is in sys.path
+src_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
+
+import sounddevice as sd
+
+from mindmirror import config
+from mindmirror.tts import output as output_module
+from mindmirror.tts.output import OutputEngine
+from mindmirror.tts.pipeline import SynthesisPipeline
+from mindmirror.tts.f5_tts.tts import F5TTS
+
+SAMPLE_RATE = 16000
+CHUNK_SECONDS = 0.1
+
+# --- STAND-IN OUTPUT DEVICE ---
+
+class StandInStream:
+    """
+    Replaces sd.OutputStream: calls the engine's callback in real time from a thread and
+    records when which segment was heard. Each test segment has its own constant amplitude.
+    """
+    latency = 0.01
+
+    def __init__(self, samplerate: int, blocksize: int, callback, **_):
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.callback = callback
+        self.heard = []  # (time, amplitude)
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        status = SimpleNamespace(output_underflow=False)
+        while self.running:
+            out = np.zeros((self.blocksize, 1), dtype=np.float32)
+            self.callback(out, self.blocksize, None, status)
+            for amplitude in np.unique(out[:, 0]):
+                if amplitude > 0:
+                    self.heard.append((time.time(), round(float(amplitude), 2)))
+            time.sleep(self.blocksize / self.samplerate)
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join()
+
+    def close(self):
+        pass
+
+# --- SCENARIO ---
+
+class Scenario:
+    """Segment texts map to amplitudes; `synthesize` renders them roughly in real time."""
+    def __init__(self, segments: dict):
+        self.segments = segments  # text -> (amplitude, seconds)
+        self.synthesized = []
+
+    def synthesize(self, style, text):
+        self.synthesized.append(text)
+        amplitude, seconds = self.segments[text]
+        for _ in range(max(int(seconds / CHUNK_SECONDS), 1)):
+            time.sleep(CHUNK_SECONDS / 10)
+            yield np.full(int(CHUNK_SECONDS * SAMPLE_RATE), amplitude, dtype=np.float32)
+
+
+def wait_for(condition, timeout: float = 5.0) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def check(label: str, condition: bool) -> bool:
+    print(f"{'PASS' if condition else 'FAIL'}  {label}")
+    return condition
+
+
+def run_scenario(name: str, run_loop, stop_while_idle: bool) -> bool:
+    """
+    Speaks the first answer, stops it (while the loop is idle and the answer plays out of the
+    buffer, or while the next segment is still being produced), then sends the barge-in answer
+    with a newer epoch, as the LLM does after a stop.
+    """
+    scenario = Scenario({
+        "first answer": (0.1, 1.0),
+        "second part": (0.2, 1.0),
+        "late part of the first answer": (0.3, 0.3),
+        "barge-in answer": (0.4, 0.3),
+    })
+    text_queue, control_queue, log_queue = queue.Queue(), queue.Queue(), queue.Queue()
+
+    with mock.patch.object(sd, "OutputStream", StandInStream), \
+            mock.patch.object(output_module, "set_speaking_lock", lambda active: None), \
+            mock.patch.object(output_module, "set_playback_lock", lambda active: None):
+        output = OutputEngine(None, SAMPLE_RATE, control_queue, log_queue)
+        output.start()
+        loop = threading.Thread(target=run_loop, args=(scenario.synthesize, output, text_queue, log_queue), daemon=True)
+        loop.start()
+
+        text_queue.put(("neutral", "first answer", 0))
+        if not stop_while_idle:
+            text_queue.put(("neutral", "second part", 0))
+        # Idle: the answer was handed over and plays out of the buffer. Busy: the second part is being produced.
+        busy = lambda: "second part" in scenario.synthesized and output.producing
+        idle = lambda: "first answer" in scenario.synthesized and output.active and not output.producing
+        ready = wait_for(idle if stop_while_idle else busy)
+
+        control_queue.put({'command': 'stop'})
+        wait_for(lambda: output.stopped_epoch >= 0 and not output.flush_requested)
+        stopped_at = time.time() + 0.05
+        text_queue.put(("neutral", "late part of the first answer", 0))
+        control_queue.put({'command': 'epoch', 'value': 1})
+        text_queue.put(("neutral", "barge-in answer", 1))
+
+        heard = lambda: [amplitude for t, amplitude in output.stream.heard if t > stopped_at]
+        spoken = wait_for(lambda: 0.4 in heard())
+        text_queue.put(None)
+        loop.join(timeout=5.0)
+        output.close()
+
+    print(f"\n{name}, stop while {'idle' if stop_while_idle else 'speaking'}:")
+    results = [
+        check("first answer was playing when the stop came", ready),
+        check("barge-in answer of the newer epoch is spoken", spoken and "barge-in answer" in scenario.synthesized),
+        check("stopped turn is not heard after the stop", not {0.1, 0.2, 0.3} & set(heard())),
+        check("segment of the stopped turn queued after the stop is dropped",
+              "late part of the first answer" not in scenario.synthesized),
+        check("loop ends on None", not loop.is_alive()),
+    ]
+    return all(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checks that a stop drops only the stopped turn, also when it arrives while TTS is idle.")
+    parser.parse_args()
+
+    config.TTS_OUTPUT_BUFFER_SECONDS = 5.0
+    loops = {
+        "SynthesisPipeline (Piper, Google)":
+            lambda synthesize, output, text_queue, log_queue: SynthesisPipeline(synthesize, output, text_queue, log_queue).run(),
+        "F5 main loop": F5TTS.play_queue,
+    }
+
+    results = []
+    for name, run_loop in loops.items():
+        for stop_while_idle in (True, False):
+            results.append(run_scenario(name, run_loop, stop_while_idle))
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
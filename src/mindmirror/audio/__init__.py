@@ -1,3 +1,3 @@
 from .devices import select_audio_devices, select_audio_device, get_device_by_name, get_valid_samplerate, safe_open_stream, ask_headphones_mode
-from .dsp import apply_dsp_cleaning, resampled
+from .dsp import apply_dsp_cleaning, resampled, StreamResampler
 from .io import calibrate_noise_floor, create_preroll_buffer, record_clip
@@ -1,3 +1,4 @@
+import math
 import numpy as np
 import scipy.signal
 import noisereduce as nr
@@ -44,3 +45,48 @@ def resampled(generated_audio, source_sample_rate: int, target_sample_rate: int)
     else:
         resampled_audio = generated_audio
     return resampled_audio
+
+
+class StreamResampler:
+    """
+    Stateful polyphase resampler for audio that arrives in chunks. Each chunk is filtered
+    together with the tail of the previous one, and the last few input samples are held
+    back until more audio (or flush()) arrives, so chunk boundaries produce no edge artifacts.
+    """
+    def __init__(self, source_sample_rate: int, target_sample_rate: int):
+        g = math.gcd(source_sample_rate, target_sample_rate)
+        self.up = target_sample_rate // g
+        self.down = source_sample_rate // g
+        # Input samples covered by half of resample_poly's default filter, rounded to whole input frames
+        half_len = 10 * max(self.up, self.down) / self.up + 2
+        self.pad = self.down * math.ceil(half_len / self.down)
+        self.buffer = np.zeros(self.pad, dtype=np.float32)
+
+    def process(self, chunk) -> np.ndarray:
+        """Returns the resampled audio that can be emitted after adding `chunk`."""
+        if self.up == self.down:
+            return np.asarray(chunk, dtype=np.float32)
+        self.buffer = np.concatenate([self.buffer, np.asarray(chunk, dtype=np.float32)])
+        # Emit up to `pad` samples before the end, on a whole input frame boundary
+        end = self.pad + (len(self.buffer) - 2 * self.pad) // self.down * self.down
+        if end <= self.pad:
+            return np.zeros(0, dtype=np.float32)
+        return self._emit(end)
+
+    def flush(self) -> np.ndarray:
+        """Returns the held-back remainder at the end of the stream and resets the state."""
+        if self.up == self.down:
+            return np.zeros(0, dtype=np.float32)
+        tail = len(self.buffer) - self.pad
+        self.buffer = np.concatenate([self.buffer, np.zeros(self.pad + self.down, dtype=np.float32)])
+        out = self._emit(self.pad + math.ceil(tail / self.down) * self.down)
+        self.buffer = np.zeros(self.pad, dtype=np.float32)
+        return out[:math.ceil(tail * self.up / self.down)]
+
+    def _emit(self, end: int) -> np.ndarray:
+        window = self.buffer[:end + self.pad]
+        out = scipy.signal.resample_poly(window, self.up, self.down)
+        start_out = self.pad * self.up // self.down
+        out = out[start_out:end * self.up // self.down].astype(np.float32)
+        self.buffer = self.buffer[end - self.pad:]
+        return out
@@ -50,13 +50,52 @@ INTERRUPT_KEYWORDS = [
     "shut up", "never mind", "cancel", "enough"
 ]
 
+# --- TTS OUTPUT ENGINE SETTINGS ---
+TTS_OUTPUT_BLOCK_SIZE = 512        # Callback block size in samples (lower = faster stop/duck response)
+TTS_OUTPUT_BUFFER_SECONDS = 30.0   # Ring buffer capacity; producers block when it is full
+TTS_GAIN_RAMP_MS = 30              # Duration of a full 0 -> 1 volume ramp
+TTS_FLUSH_FADE_MS = 8              # Fade-out applied when playback is flushed on stop
+
+# --- TTS PIPELINE SETTINGS ---
+TTS_PIPELINE_LOOKAHEAD = 2   # Segments synthesized concurrently ahead of playback (1 = next segment only)
+TTS_GAP_WINDOW = 50          # Inter-segment gaps (and F5 first-sample latencies) kept for the mean/p95 telemetry
+
+# --- TTS JITTER BUFFER SETTINGS ---
+TTS_JITTER_INITIAL_MS = 200   # Delay from a streamed segment's first chunk to the start of playback
+TTS_JITTER_MIN_MS = 80
+TTS_JITTER_MAX_MS = 1000
+TTS_JITTER_FACTOR = 3.0       # Prebuffer target as a multiple of the measured delivery jitter
+
+# --- TTS PHRASE CACHE SETTINGS ---
+TTS_PHRASE_CACHE = os.getenv("TTS_PHRASE_CACHE", "true").lower() == "true"
+TTS_PHRASE_CACHE_PATH = str(PROJECT_ROOT / ".cache/tts_phrases")
+TTS_PHRASE_CACHE_MAX_MB = 256      # LRU eviction beyond this size
+TTS_PHRASE_CACHE_MAX_CHARS = 120   # Longer segments are rarely repeated verbatim and are not cached
+TTS_PHRASE_CACHE_CHUNK_MS = 250    # Slice size when feeding cached audio to the output
+# Phrases synthesized at startup if they are not cached yet: (style, text)
+TTS_PHRASE_CACHE_WARMUP = [
+    ("neutral", "Searching for that now."),
+    ("neutral", "Let me check that for you."),
+    ("neutral", "One moment."),
+    ("serious", "Sorry, something went wrong. Please try again."),
+    ("serious", "Sorry, I couldn't reach that service right now."),
+]
+
 # --- TTS SETTINGS (PIPER) ---
 PIPER_MODEL_PATH = str(PROJECT_ROOT / "src/mindmirror/tts/pipervoice/en/semaine/en_GB-semaine-medium.onnx")
+PIPER_WORKERS = 2               # Sentences synthesized in parallel (1 = sequential)
+PIPER_INTRA_OP_THREADS = int(os.getenv("PIPER_INTRA_OP_THREADS", "0"))  # ONNX Runtime threads per sentence (0 = available cores / PIPER_WORKERS)
+PIPER_GRAPH_OPTIMIZATION = "all"  # disable | basic | extended | all
+PIPER_CPU_MEM_ARENA = True      # Reuse buffers between runs (faster, keeps peak memory resident)
+PIPER_MEM_PATTERN = False       # Pre-planned allocations only pay off for fixed input shapes; Piper's vary per sentence
 
 # --- TTS SETTINGS (GOOGLE CLOUD) ---
 GOOGLE_TTS_MODEL = os.getenv("GOOGLE_TTS_MODEL")
 GOOGLE_TTS_VOICE = os.getenv("GOOGLE_TTS_VOICE")
 GOOGLE_TTS_LANG = os.getenv("GOOGLE_TTS_LANG")
+GOOGLE_TTS_SAMPLE_RATE = 24000  # LINEAR16 rate requested from the API
+# Stream audio chunks as they are synthesized (StreamingSynthesize, Chirp 3 HD voices only)
+GOOGLE_TTS_STREAMING = os.getenv("GOOGLE_TTS_STREAMING", "false").lower() == "true"
 GOOGLE_TTS_STYLES = {
     "neutral": {
         "speaking_rate": 1.15, 
@@ -89,6 +128,24 @@ F5_VOCAB_FILE = str(F5_LIB_PATH / f"data/{F5_VOICE_NAME}_pinyin/vocab.txt")  # P
 F5_WAVS_DIR = PROJECT_ROOT / f"data/{F5_VOICE_NAME}/wavs"
 F5_NFE_STEPS = 16
 F5_MIN_CHUNK_LENGTH = 40
+# Precompute reference audio/mel/text tokens per style at load time instead of per chunk
+F5_REF_CACHE = os.getenv("F5_REF_CACHE", "true").lower() == "true"
+F5_BATCH_SIZE = 4               # Max sentence chunks per batched forward pass (1 disables batching)
+F5_BATCH_MAX_PAD_RATIO = 1.5    # Max longest/shortest length ratio of chunks in one batch
+# Adaptive NFE: pick diffusion steps per batch so synthesis stays ahead of playback
+F5_NFE_ADAPTIVE = os.getenv("F5_NFE_ADAPTIVE", "true").lower() == "true"
+F5_NFE_MIN = 8                  # Quality floor
+F5_NFE_MAX = 32                 # Quality ceiling when there is plenty of buffered audio
+F5_FIRST_AUDIO_BUDGET = 1.5     # Seconds allowed for the first chunk when nothing is playing
+F5_NFE_SAFETY = 0.8             # Fraction of the time budget the prediction may use
+# CPU inference: int8 dynamic quantization of the DiT and vocoder linear layers (persisted after the first load)
+F5_QUANTIZE = os.getenv("F5_QUANTIZE", "false").lower() == "true"
+F5_QUANTIZED_CKPT_PATH = str(F5_LIB_PATH / f"ckpts/{F5_VOICE_NAME}/model_last_int8.pt")
+F5_CPU_THREADS = int(os.getenv("F5_CPU_THREADS", "0"))  # Intra-op threads on CPU (0 = one per available core)
+# Vocode in overlapping mel windows and stream each window to the output as soon as it is decoded
+F5_STREAM_VOCODER = os.getenv("F5_STREAM_VOCODER", "true").lower() == "true"
+F5_VOCODER_WINDOW = 48          # Mel frames per vocoder window (~0.5 s at 24 kHz / hop 256)
+F5_VOCODER_OVERLAP = 8          # Context frames decoded on each side and cross-faded between windows
 F5_STYLES = {
     "neutral": {"ref_audio": str(F5_WAVS_DIR / "en_A_01.wav"), "ref_text": "Here is the summary of your notifications.", "cfg": 2.0, "speed": 1.0},
     "serious": {"ref_audio": str(F5_WAVS_DIR / "en_B_01.wav"), "ref_text": "I'm sorry, but I cannot complete that request right now.", "cfg": 2.2, "speed": 1.1},
@@ -112,6 +169,114 @@ GOOGLE_TTT_MODEL = os.getenv("GOOGLE_TTT_MODEL")
 GOOGLE_CLOUD_PROJECT = os.getenv("GOOGLE_CLOUD_PROJECT")
 GOOGLE_CLOUD_LOCATION = os.getenv("GOOGLE_CLOUD_LOCATION")
 
+# --- LLM SETTINGS (LOCAL GGUF) ---
+LOCAL_LLM_MODEL_PATH = os.getenv("LOCAL_LLM_MODEL_PATH", str(PROJECT_ROOT / "models/qwen2.5-3b-instruct-q4_k_m.gguf"))
+LOCAL_LLM_THREADS = int(os.getenv("LOCAL_LLM_THREADS", str(max(1, (os.cpu_count() or 2) // 2))))  # Leave cores for audio/STT
+LOCAL_LLM_CONTEXT = int(os.getenv("LOCAL_LLM_CONTEXT", "4096"))  # Context length (tokens) of the KV cache
+LOCAL_LLM_BATCH = 256               # Prompt tokens evaluated per batch
+LOCAL_LLM_MAX_TOKENS = 384          # Upper bound for one generated answer
+LOCAL_LLM_TEMPERATURE = 0.7
+LOCAL_LLM_CHAT_FORMAT = os.getenv("LOCAL_LLM_CHAT_FORMAT")  # None = use the chat template embedded in the GGUF file
+LOCAL_LLM_STATE_CACHE_MB = 512      # RAM for saved KV states of earlier prompts (0 = prefix reuse only)
+LOCAL_LLM_MAX_TOOL_ROUNDS = 4       # Tool call rounds per turn before the model must answer
+
+# --- LLM HISTORY SETTINGS ---
+LLM_HISTORY_TOKEN_BUDGET = int(os.getenv("LLM_HISTORY_TOKEN_BUDGET", "8000"))  # Estimated tokens before summarizing
+LLM_HISTORY_KEEP_TURNS = 4           # Most recent user turns always kept verbatim
+LLM_HISTORY_TOOL_PAYLOAD_CHARS = 600 # Older tool results above this size are elided
+
+# --- LLM CONTEXT CACHE SETTINGS ---
+LLM_CONTEXT_CACHE = os.getenv("LLM_CONTEXT_CACHE", "true").lower() == "true"
+LLM_CONTEXT_CACHE_TTL = 3600          # Seconds a cached system prompt + tool prefix lives server-side
+LLM_CONTEXT_CACHE_REFRESH_MARGIN = 120  # Extend the TTL when less than this many seconds remain
+
+# --- LLM RESPONSE CACHE SETTINGS ---
+LLM_RESPONSE_CACHE = os.getenv("LLM_RESPONSE_CACHE", "true").lower() == "true"
+LLM_RESPONSE_CACHE_PATH = str(PROJECT_ROOT / ".cache/llm_responses.json")
+LLM_RESPONSE_CACHE_RULES = {  # Normalized utterance -> TTL in seconds
+    GREETING_TRIGGER_TEXT: 24 * 3600,
+    "stop": 3600,
+    "what's new": 120,
+}
+LLM_RESPONSE_CACHE_TTL = 0           # TTL for any other utterance up to MAX_WORDS (0 = rules only)
+LLM_RESPONSE_CACHE_MAX_WORDS = 3
+LLM_REPLAY_PHRASES = ["repeat that", "say that again", "come again"]  # Answered with the last response
+LLM_READ_ONLY_TOOL_PREFIXES = ("get_",)  # Tools without side effects (do not invalidate cached state)
+
+# --- SESSION PERSISTENCE SETTINGS ---
+LLM_SESSION_PERSIST = os.getenv("LLM_SESSION_PERSIST", "true").lower() == "true"  # Resume the conversation after a restart
+LLM_SESSION_PATH = str(PROJECT_ROOT / ".cache/session")
+LLM_SESSION_SNAPSHOT_EVERY = 50       # Journal records before the state is folded into a snapshot
+LLM_SESSION_MAX_AGE = 6 * 3600        # Seconds after the last checkpoint a session is still resumed
+
+# --- LLM REQUEST SCHEDULER SETTINGS ---
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "15"))   # Per model
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "250000"))  # Per model
+LLM_FALLBACK_MODEL = os.getenv("GOOGLE_TTT_FALLBACK_MODEL")  # Optional secondary model used while the primary is throttled
+LLM_MAX_RETRIES = 3
+LLM_BACKOFF_BASE = 1.0   # Seconds; doubled per retry with +/-50% jitter when the server gives no retry hint
+LLM_BACKOFF_MAX = 20.0
+
+# --- UTTERANCE COALESCING SETTINGS ---
+LLM_COALESCE_WINDOW = 0.0  # Extra seconds to wait for follow-up utterances before a turn starts (0 = merge only what is queued)
+LLM_COALESCE_CANCEL_INFLIGHT = os.getenv("LLM_COALESCE_CANCEL_INFLIGHT", "true").lower() == "true"  # Restart a running turn with the merged text (not after a mutating tool ran)
+
+# --- SPECULATIVE GENERATION SETTINGS ---
+LLM_SPECULATIVE = os.getenv("LLM_SPECULATIVE", "false").lower() == "true"
+SPECULATIVE_STABLE_DURATION = 0.6  # Seconds a streaming partial transcript must stay unchanged (during a pause)
+
+# --- MCP TOOL PREFETCH SETTINGS ---
+LLM_PREFETCH = os.getenv("LLM_PREFETCH", "true").lower() == "true"
+LLM_PREFETCH_TOOLS = {  # Read-only tool (called without arguments) -> seconds its prefetched result counts as fresh
+    "get_unresolved_alerts": 30,
+    "get_analytics_summary": 120,
+    "get_ml_health": 300,
+}
+LLM_PREFETCH_REFRESH_RATIO = 0.8  # Refresh in the background once a result reaches this share of its freshness window
+
+# --- TOOL DEADLINE SETTINGS ---
+LLM_TURN_DEADLINE = float(os.getenv("LLM_TURN_DEADLINE", "20"))  # Latency budget of one turn in seconds (0 = none)
+LLM_TURN_ANSWER_RESERVE = 3.0    # Seconds of the budget kept for the model's final answer after tools
+LLM_TOOL_TIMEOUT = 8.0           # Default per-tool timeout in seconds
+LLM_TOOL_TIMEOUTS = {}           # Per-tool overrides, e.g. {"get_analytics_summary": 12.0}
+LLM_TOOL_HEDGE = os.getenv("LLM_TOOL_HEDGE", "true").lower() == "true"  # Duplicate slow read-only tool calls
+LLM_TOOL_HEDGE_AFTER = 1.5       # Seconds before a read-only tool call is hedged with a second attempt
+
+# --- TOOL RESULT COMPACTION SETTINGS ---
+LLM_TOOL_RESULT_COMPACTION = os.getenv("LLM_TOOL_RESULT_COMPACTION", "true").lower() == "true"
+LLM_TOOL_RESULT_BUDGET = 1500        # Estimated tokens a single tool result may use before it is compacted
+LLM_TOOL_RESULT_BUDGETS = {          # Per-tool overrides
+    "get_transactions": 600,
+    "get_transaction_audit_logs": 600,
+}
+_ALERT_FIELDS = ["id", "transactionId", "accountId", "fraudScore", "decision", "createdAt"]
+LLM_TOOL_RESULT_FIELDS = {           # Fields kept when an oversized result is projected
+    "get_transactions": ["id", "accountId", "amount", "currency", "merchant", "merchantCategory", "status", "createdAt"],
+    "get_unresolved_alerts": _ALERT_FIELDS,
+    "get_alerts_by_account": _ALERT_FIELDS,
+    "get_alerts_by_decision": _ALERT_FIELDS,
+    "get_transaction_audit_logs": ["eventType", "actor", "payload", "createdAt"],
+}
+LLM_TOOL_RESULT_RANK_FIELDS = ["fraudScore", "amount"]  # Numeric fields used to pick the top-N items of a summarized array
+LLM_TOOL_RESULT_TOP_N = 5
+LLM_TOOL_RESULT_PAGE_SIZE = 10       # Items per get_tool_result_page call
+
+# --- LLM ROUTER SETTINGS ---
+LLM_LITE_MODEL = os.getenv("GOOGLE_TTT_LITE_MODEL")  # Fast model for chit-chat turns (unset = every turn uses the full model)
+LLM_ROUTER_CLASSIFIER = os.getenv("LLM_ROUTER_CLASSIFIER", "false").lower() == "true"  # Ask the lite model when the heuristics are unsure
+LLM_ROUTER_TOOL_CUES = [  # Words that point at data behind the tools (tool name terms are added automatically)
+    "check", "show", "look", "status", "latest", "recent", "today", "yesterday", "how many", "report", "new"
+]
+LLM_ROUTER_CHAT_CUES = [  # Openers of small talk that never needs a tool
+    "hi", "hey", "hello", "thanks", "thank you", "cheers", "good morning", "good night", "bye",
+    "how are you", "who are you", "tell me a joke", "nice", "cool", "great", "ok", "okay", "yes", "no"
+]
+LLM_ROUTER_FOLLOWUP_WORDS = ["it", "that", "this", "those", "them", "one", "ones", "more", "else", "why"]
+LLM_ROUTER_REPLY_CUES = [  # Confirmations and refusals; after a tool turn they answer its question and may trigger the action
+    "yes", "yeah", "yep", "sure", "ok", "okay", "please", "go ahead", "do it", "confirm",
+    "no", "nope", "don't", "cancel", "never mind"
+]
+
 # --- STT SETTINGS (WHISPER) ---
 AWS_DEFAULT_REGION = os.getenv("AWS_DEFAULT_REGION")
 AWS_SAGEMAKER_WHISPER_ENDPOINT_NAME = os.getenv("AWS_SAGEMAKER_WHISPER_ENDPOINT_NAME")
@@ -0,0 +1,93 @@
+import time
+import asyncio
+import contextvars
+
+from mindmirror import config
+from mindmirror.llm.tools import is_read_only_tool
+
+# Absolute deadline (time.monotonic()) of the turn running in the current task, None outside turns
+turn_deadline = contextvars.ContextVar("turn_deadline", default=None)
+
+
+def start_turn_deadline(seconds: float):
+    """Sets the latency budget of the turn running in the current task (and the tasks it spawns)."""
+    turn_deadline.set(time.monotonic() + seconds if seconds else None)
+
+
+def remaining_turn_time() -> float | None:
+    """Seconds left in the current turn's budget, or None if the turn has no deadline."""
+    deadline = turn_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def tool_timeout(name: str) -> float:
+    """Per-tool timeout, capped by what is left of the turn budget after reserving time for the final answer."""
+    timeout = config.LLM_TOOL_TIMEOUTS.get(name, config.LLM_TOOL_TIMEOUT)
+    remaining = remaining_turn_time()
+    if remaining is not None:
+        timeout = min(timeout, remaining - config.LLM_TURN_ANSWER_RESERVE)
+    return max(timeout, 0.0)
+
+
+def timed_out_response(name: str, timeout: float) -> dict:
+    """Structured function response the model gets instead of a result when a tool misses its deadline."""
+    response = {
+        "error": "timeout",
+        "tool": name,
+        "timeout_seconds": round(timeout, 2),
+        "message": "The tool did not answer in time. Tell the user this data is unavailable right now."
+    }
+    if not is_read_only_tool(name):
+        response["message"] = ("The action did not confirm in time and may or may not have been applied. "
+                               "Tell the user to check before retrying.")
+    return response
+
+
+async def _hedged(call, name: str, args: dict, hedge_after: float):
+    """
+    Runs `call`, starting a second identical attempt if the first has not answered after
+    `hedge_after` seconds. The first successful attempt wins and the other is cancelled.
+    """
+    attempts = [asyncio.create_task(call(name, args))]
+    try:
+        done, _ = await asyncio.wait(attempts, timeout=hedge_after)
+        if not done:
+            attempts.append(asyncio.create_task(call(name, args)))
+        error = None
+        pending = set(attempts)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result(), len(attempts)
+                error = error or task.exception()
+        raise error
+    finally:
+        for task in attempts:
+            task.cancel()
+
+
+async def call_with_deadline(call, name: str, args: dict, log_queue=None):
+    """
+    Executes a tool through `call(name, args)` within its timeout. Idempotent read tools are
+    hedged after LLM_TOOL_HEDGE_AFTER seconds. On expiry a structured timeout response is
+    returned, so the turn can finish within a predictable bound.
+    """
+    timeout = tool_timeout(name)
+    if timeout <= 0:
+        if log_queue:
+            log_queue.put({'type': 'status', 'text': f"⏱️  Turn budget exhausted, skipping tool '{name}'"})
+        return timed_out_response(name, 0.0)
+
+    hedge_after = config.LLM_TOOL_HEDGE_AFTER
+    try:
+        if config.LLM_TOOL_HEDGE and is_read_only_tool(name) and hedge_after < timeout:
+            result, attempts = await asyncio.wait_for(_hedged(call, name, args, hedge_after), timeout)
+            if attempts > 1 and log_queue:
+                log_queue.put({'type': 'debug', 'text': f"🔁 Tool '{name}' was hedged after {hedge_after:.1f}s"})
+            return result
+        return await asyncio.wait_for(call(name, args), timeout)
+    except asyncio.TimeoutError:
+        if log_queue:
+            log_queue.put({'type': 'status', 'text': f"⏱️  Tool '{name}' timed out after {timeout:.1f}s"})
+        return timed_out_response(name, timeout)
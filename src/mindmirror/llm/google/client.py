@@ -1,7 +1,14 @@
+import time
 from typing import Any
 from google import genai
 from google.genai import types
-from mindmirror.llm.interface import TTTInterface
+from mindmirror import config
+from mindmirror.llm.interface import TTTInterface, MutatingToolRequested
+from mindmirror.llm.tools import is_read_only_tool
+from mindmirror.llm.google.history import HistoryManager, estimate_tokens, render_transcript, flatten_tool_parts
+from mindmirror.llm.google.context_cache import ContextCache, is_cache_error
+from mindmirror.llm.router import TurnRouter, LITE
+from mindmirror.llm.telemetry import TurnTelemetry
 
 def clean_schema(schema: Any) -> Any:
     """Recursively remove additionalProperties/additional_properties from schema dictionary."""
@@ -31,7 +38,6 @@ class GeminiLLMClient(TTTInterface):
         
         import os
         import json
-        from mindmirror import config
 
         key_path = getattr(config, 'GOOGLE_APPLICATION_CREDENTIALS', None)
         project_id = None
@@ -52,6 +58,27 @@ class GeminiLLMClient(TTTInterface):
             location=location
         )
         self.chat = None
+        self.chat_config = None
+        self.tool_config = None
+        self.speculative_chat = None  # (chat, final response, start time, telemetry) of the last speculation
+        self.turn_requests = 0  # Model requests made by the last turn (one per tool round)
+        self.turn_tokens = 0    # Total tokens reported by usage metadata for the last turn
+        self.turn_usage = {}    # Model -> (requests, tokens) of the last turn, including router classifier calls
+        self.telemetry = None       # TurnTelemetry of the turn in progress
+        self.last_telemetry = None  # TurnTelemetry of the last completed turn
+        self.restored_history = None  # History of a resumed session, used by the next init_chat()
+        self.history = HistoryManager(self._summarize_contents, log_queue=log_queue)
+        self.context_cache = ContextCache(self.client, self.model_name, log_queue=log_queue)
+
+        # Per-turn routing of chit-chat to a lite model (only if the main model is not lite itself)
+        self.lite_model = getattr(config, 'LLM_LITE_MODEL', None)
+        self.router = None
+        if self.lite_model and self.lite_model != model_name and "lite" not in model_name.lower():
+            self.router = TurnRouter(
+                tools,
+                classify_callback=self._classify_turn if config.LLM_ROUTER_CLASSIFIER else None,
+                log_queue=log_queue
+            )
 
     async def init_chat(self):
         """Initializes the async chat session with system instruction and tool definitions."""
@@ -67,21 +94,20 @@ class GeminiLLMClient(TTTInterface):
             )
             function_declarations.append(decl)
             
-        tool_config = None
+        self.tool_config = None
         # gemini-2.0-flash-lite-preview-02-05 / gemini-2.0-flash-lite / flash-lite models do not support function calling
         is_lite_model = "lite" in self.model_name.lower()
         if function_declarations and not is_lite_model:
-            tool_config = [types.Tool(function_declarations=function_declarations)]
-            
+            self.tool_config = [types.Tool(function_declarations=function_declarations)]
+
+        cache_name = await self.context_cache.ensure(self.system_prompt, self.tool_config)
+        self.chat_config = self._build_chat_config(cache_name)
         self.chat = self.client.aio.chats.create(
             model=self.model_name,
-            config=types.GenerateContentConfig(
-                tools=tool_config,
-                system_instruction=self.system_prompt,
-                automatic_function_calling=types.AutomaticFunctionCallingConfig(disable=True)
-            ),
-            history=[]
+            config=self.chat_config,
+            history=self.restored_history or []
         )
+        self.restored_history = None
         
         if self.log_queue:
             self.log_queue.put({
@@ -89,6 +115,22 @@ class GeminiLLMClient(TTTInterface):
                 "text": f"Gemini chat session initialized with model '{self.model_name}' and {len(function_declarations)} tools."
             })
 
+    def _build_chat_config(self, cache_name: str = None):
+        """
+        Builds the generation config. With a context cache the system instruction and
+        tools live in the cached content and must not be sent again.
+        """
+        if cache_name:
+            return types.GenerateContentConfig(
+                cached_content=cache_name,
+                automatic_function_calling=types.AutomaticFunctionCallingConfig(disable=True)
+            )
+        return types.GenerateContentConfig(
+            tools=self.tool_config,
+            system_instruction=self.system_prompt,
+            automatic_function_calling=types.AutomaticFunctionCallingConfig(disable=True)
+        )
+
     async def send_message(self, text: str) -> str:
         """
         Sends a message to the chat session. Handles the execution loop
@@ -96,16 +138,124 @@ class GeminiLLMClient(TTTInterface):
         """
         if not self.chat:
             await self.init_chat()
-            
-        response = await self.chat.send_message(text)
-        
+
+        start_t = time.time()
+        self.turn_usage = {}
+        await self._prepare_chat()
+        route = await self.router.route(text) if self.router else None
+        if route == LITE:
+            response = await self._run_lite_turn(text)
+            self.telemetry.route = LITE
+        else:
+            # Run on a fork and adopt it at the end, so a cancelled turn leaves no
+            # half-finished tool exchange behind in the session
+            fork = self._new_chat(self.chat.get_history(curated=True), self.chat_config)
+            response, self.chat = await self._run_turn(fork, text)
+        self._finish_turn(response, start_t)
+        if route:
+            self.router.record(route, time.time() - start_t)
+
+        return response.text or ""
+
+    async def _run_lite_turn(self, text: str):
+        """
+        Answers a chit-chat turn with the lite model. The lite session gets the shared
+        history with tool exchanges flattened to text; only the new exchange is
+        appended back to the main session, so both models see one history.
+        """
+        self._begin_turn(self.lite_model)
+        history = self.chat.get_history(curated=True)
+        lite_history = flatten_tool_parts(history)
+        lite_chat = self.client.aio.chats.create(
+            model=self.lite_model,
+            config=types.GenerateContentConfig(system_instruction=self.system_prompt),
+            history=lite_history
+        )
+        response = await self._send(lite_chat, text)
+        exchange = lite_chat.get_history(curated=True)[len(lite_history):]
+        self._recreate_chat(history + exchange, self.chat_config)
+        return response
+
+    async def _classify_turn(self, text: str) -> bool:
+        """Asks the lite model whether a turn needs tools (router classifier for ambiguous turns)."""
+        tool_names = ", ".join(t["name"] for t in self.tools)
+        response = await self.client.aio.models.generate_content(
+            model=self.lite_model,
+            contents=(
+                f"A voice assistant has these tools: {tool_names}.\n"
+                f"Does answering the user's message require any of them? Reply with TOOLS or CHAT only.\n\n"
+                f"User: {text}"
+            ),
+            config=types.GenerateContentConfig(temperature=0.0, max_output_tokens=4)
+        )
+        self._account_usage(self.lite_model, getattr(response, "usage_metadata", None))
+        return "TOOL" in (response.text or "").upper()
+
+    def supports_speculation(self) -> bool:
+        return True
+
+    async def speculate(self, text: str) -> str:
+        """
+        Generates a response on a fork of the chat session, leaving the main session untouched
+        until commit_speculation() is called. Mutating tools are never executed.
+        """
+        if not self.chat:
+            await self.init_chat()
+
+        self.speculative_chat = None
+        start_t = time.time()
+        self.turn_usage = {}
+        await self._prepare_chat()
+        fork = self._new_chat(self.chat.get_history(curated=True), self.chat_config)
+        response, fork = await self._run_turn(fork, text, read_only=True)
+        self.telemetry.source = "speculation"
+        self.telemetry.total_time = time.time() - start_t
+        self.speculative_chat = (fork, response, start_t, self.telemetry)
+
+        return response.text or ""
+
+    def commit_speculation(self) -> None:
+        """Adopts the forked session of the last successful speculation."""
+        if self.speculative_chat:
+            self.chat, response, start_t, self.telemetry = self.speculative_chat
+            self.speculative_chat = None
+            self._finish_turn(response, start_t)
+
+    def discard_speculation(self) -> None:
+        self.speculative_chat = None
+
+    async def _run_turn(self, chat, text: str, read_only: bool = False):
+        """
+        Runs one user turn on the given chat, resolving function calls until the model
+        returns a final text response. Returns the final response and the chat used,
+        which differs from the input if the request had to be retried without cache.
+        """
+        self._begin_turn(self.model_name)
+        try:
+            response = await self._send(chat, text)
+        except Exception as e:
+            if not self.chat_config.cached_content or not is_cache_error(e):
+                raise
+            # The cached prefix expired or was rejected server-side; retry once with the prompt inline
+            if self.log_queue:
+                self.log_queue.put({"type": "debug", "text": f"Cached request failed ({e}), retrying without cache..."})
+            await self.context_cache.close()
+            self.telemetry.retries += 1
+            self.chat_config = self._build_chat_config()
+            chat = self._new_chat(chat.get_history(curated=True), self.chat_config)
+            response = await self._send(chat, text)
+
         # Keep resolving function calls until the model returns a final text response
         while response.function_calls:
+            self.telemetry.tool_rounds += 1
             parts = []
             for function_call in response.function_calls:
                 tool_name = function_call.name
                 tool_args = function_call.args
-                
+
+                if read_only and not is_read_only_tool(tool_name):
+                    raise MutatingToolRequested(tool_name)
+
                 if self.log_queue:
                     self.log_queue.put({
                         "type": "status", 
@@ -113,10 +263,12 @@ class GeminiLLMClient(TTTInterface):
                     })
                     
                 # Call the decoupled execution callback
+                tool_start_t = time.time()
                 try:
                     tool_result = await self.execute_tool(tool_name, tool_args)
                 except Exception as e:
                     tool_result = f"Error: Tool execution failed: {e}"
+                self.telemetry.tool_calls.append([tool_name, time.time() - tool_start_t])
                     
                 parts.append(
                     types.Part.from_function_response(
@@ -126,6 +278,146 @@ class GeminiLLMClient(TTTInterface):
                 )
                 
             # Send all function responses together back to the model
-            response = await self.chat.send_message(parts)
-                
-        return response.text or ""
+            response = await self._send(chat, parts)
+
+        return response, chat
+
+    def _begin_turn(self, model_name: str):
+        """Resets the per-turn counters and starts the telemetry of a new turn."""
+        self.turn_requests = 0
+        self.turn_tokens = 0
+        self.telemetry = TurnTelemetry(model=model_name)
+
+    async def _send(self, chat, message):
+        """Sends one request and accounts for it in the per-turn request/token counters."""
+        response = await chat.send_message(message)
+        usage = getattr(response, "usage_metadata", None)
+        self.turn_requests += 1
+        self.turn_tokens += self._account_usage(self.telemetry.model, usage)
+        if self.telemetry.ttfb is None:
+            self.telemetry.ttfb = time.time() - self.telemetry.started_at
+        self.telemetry.record_usage(usage)
+        return response
+
+    def _account_usage(self, model_name: str, usage) -> int:
+        """Adds one request to the per-model usage of the turn; returns its token count."""
+        tokens = (getattr(usage, "total_token_count", None) if usage else None) or 0
+        requests, total = self.turn_usage.get(model_name, (0, 0))
+        self.turn_usage[model_name] = (requests + 1, total + tokens)
+        return tokens
+
+    def _finish_turn(self, response, start_t: float):
+        """Logs the prompt size of a completed turn and schedules history maintenance."""
+        if not self.telemetry.total_time:
+            self.telemetry.total_time = time.time() - start_t
+        self.last_telemetry = self.telemetry
+        history = self.chat.get_history(curated=True)
+        self._log_prompt_size(response, history, time.time() - start_t)
+        self.history.schedule_summary(history)
+
+    async def switch_model(self, model_name: str):
+        """Moves the session to another model, carrying over the history (used for quota failover)."""
+        if model_name == self.model_name:
+            return
+        history = self.chat.get_history(curated=True) if self.chat else []
+        self.discard_speculation()
+        await self.context_cache.close()
+        self.model_name = model_name
+        self.context_cache.model_name = model_name
+        self.context_cache.enabled = config.LLM_CONTEXT_CACHE
+        await self.init_chat()
+        self._recreate_chat(history, self.chat_config)
+
+    def record_exchange(self, user_text: str, response_text: str):
+        """Appends a cached exchange to the chat history."""
+        if not self.chat:
+            return
+        history = self.chat.get_history(curated=True) + [
+            types.Content(role="user", parts=[types.Part.from_text(text=user_text)]),
+            types.Content(role="model", parts=[types.Part.from_text(text=response_text)]),
+        ]
+        self._recreate_chat(history, self.chat_config)
+
+    def export_state(self) -> dict:
+        """Serializes the curated history and the context cache handle for session persistence."""
+        history = self.chat.get_history(curated=True) if self.chat else []
+        return {
+            "history": [content.model_dump(mode="json", exclude_none=True) for content in history],
+            "model": self.model_name,
+            "context_cache": {"name": self.context_cache.name, "expires_at": self.context_cache.expires_at},
+        }
+
+    def restore_state(self, state: dict):
+        """Restores a persisted history; a still valid context cache handle is reused instead of recreated."""
+        self.restored_history = [types.Content.model_validate(content) for content in state.get("history", [])]
+        cache = state.get("context_cache") or {}
+        if state.get("model") == self.model_name:
+            self.context_cache.restore(cache.get("name"), cache.get("expires_at", 0.0))
+
+    async def close(self, keep_state: bool = False):
+        """
+        Stops background summaries and releases the server-side context cache, unless a persisted
+        session refers to it (then it is adopted after a restart or expires at its TTL).
+        """
+        self.history.cancel()
+        if not keep_state:
+            await self.context_cache.close()
+
+    def _new_chat(self, history, chat_config):
+        return self.client.aio.chats.create(
+            model=self.model_name,
+            config=chat_config,
+            history=history
+        )
+
+    def _recreate_chat(self, history, chat_config):
+        """Replaces the chat session, carrying over the given history."""
+        self.chat_config = chat_config
+        self.chat = self._new_chat(history, chat_config)
+
+    async def _prepare_chat(self):
+        """
+        Recreates the chat session if the context cache handle changed or the
+        history manager compacted the history.
+        """
+        history = self.chat.get_history(curated=True)
+        chat_config = self.chat_config
+
+        cache_name = await self.context_cache.ensure(self.system_prompt, self.tool_config)
+        if cache_name != self.chat_config.cached_content:
+            chat_config = self._build_chat_config(cache_name)
+
+        compacted = self.history.compact(history)
+        if compacted is not None:
+            history = compacted
+
+        if compacted is not None or chat_config is not self.chat_config:
+            self._recreate_chat(history, chat_config)
+
+    async def _summarize_contents(self, contents) -> str:
+        """Summarizes older conversation contents with a single stateless model call."""
+        response = await self.client.aio.models.generate_content(
+            model=self.model_name,
+            contents=(
+                "Summarize this conversation between a user and a voice assistant in a few short sentences. "
+                "Keep names, IDs, numbers and open questions; drop small talk.\n\n"
+                + render_transcript(contents)
+            )
+        )
+        return (response.text or "").strip()
+
+    def _log_prompt_size(self, response, history, latency: float):
+        """Reports the prompt size and cached share of the final request of this turn."""
+        if not self.log_queue:
+            return
+        usage = getattr(response, "usage_metadata", None)
+        prompt_tokens = getattr(usage, "prompt_token_count", None) if usage else None
+        cached_tokens = (getattr(usage, "cached_content_token_count", None) if usage else None) or 0
+        cache_info = ""
+        if cached_tokens and prompt_tokens:
+            cache_info = f", {cached_tokens} cached ({100 * cached_tokens / prompt_tokens:.0f}%)"
+        self.log_queue.put({
+            "type": "debug",
+            "text": f"📏 Prompt: {prompt_tokens if prompt_tokens is not None else '?'} tokens{cache_info} "
+                    f"(history ≈{estimate_tokens(history)} tokens in {len(history)} contents), turn {latency:.2f}s"
+        })
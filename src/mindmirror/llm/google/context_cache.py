@@ -0,0 +1,115 @@
+import time
+from google.genai import types
+
+from mindmirror import config
+
+
+def is_cache_error(error) -> bool:
+    """
+    True if a request failed because its cached content is missing, expired or invalid.
+    Quota (429), server and network errors are not cache errors: retrying inline would not help.
+    """
+    code = getattr(error, "code", None)
+    return code in (400, 403, 404) and "cache" in str(error).lower()
+
+
+class ContextCache:
+    """
+    Server-side cache for the static prompt prefix (system instruction and tool declarations).
+    Creates a cached-content handle once, extends its TTL before it expires and
+    disables itself for the session if the model or account does not support caching.
+    """
+    def __init__(self, client, model_name: str, ttl_seconds: int = None, refresh_margin: int = None, log_queue=None):
+        self.client = client
+        self.model_name = model_name
+        self.ttl_seconds = ttl_seconds or config.LLM_CONTEXT_CACHE_TTL
+        self.refresh_margin = refresh_margin or config.LLM_CONTEXT_CACHE_REFRESH_MARGIN
+        self.log_queue = log_queue
+
+        self.enabled = config.LLM_CONTEXT_CACHE
+        self.name = None
+        self.expires_at = 0.0
+        self.system_prompt = None
+        self.tools = None
+
+    def _log(self, msg_type: str, text: str):
+        if self.log_queue:
+            self.log_queue.put({"type": msg_type, "text": text})
+
+    def _set_expiry(self, cached):
+        expire_time = getattr(cached, "expire_time", None)
+        self.expires_at = expire_time.timestamp() if expire_time else time.time() + self.ttl_seconds
+
+    async def _create(self) -> str | None:
+        try:
+            cached = await self.client.aio.caches.create(
+                model=self.model_name,
+                config=types.CreateCachedContentConfig(
+                    display_name="mindmirror-static-prefix",
+                    system_instruction=self.system_prompt,
+                    tools=self.tools,
+                    ttl=f"{self.ttl_seconds}s"
+                )
+            )
+        except Exception as e:
+            # Unsupported model, prefix below the minimum cacheable size, missing permissions, ...
+            self.enabled = False
+            self.name = None
+            self._log("status", f"[yellow]⚠️ Context caching unavailable, sending prompt inline: {e}[/yellow]")
+            return None
+
+        self.name = cached.name
+        self._set_expiry(cached)
+        usage = getattr(cached, "usage_metadata", None)
+        cached_tokens = getattr(usage, "total_token_count", None) if usage else None
+        self._log("info", f"💾 Context cache created ({cached_tokens if cached_tokens is not None else '?'} tokens, TTL {self.ttl_seconds}s).")
+        return self.name
+
+    async def ensure(self, system_prompt: str, tools) -> str | None:
+        """
+        Returns the name of a valid cache for the given prefix, or None if caching is disabled.
+        Refreshes the TTL when the cache is about to expire and recreates it if the refresh fails.
+        """
+        if not self.enabled:
+            return None
+
+        # A handle restored from a previous process has no prefix recorded yet and is adopted as is
+        if self.name and self.system_prompt is not None and (system_prompt != self.system_prompt or tools != self.tools):
+            await self.close()
+        self.system_prompt = system_prompt
+        self.tools = tools
+
+        if not self.name:
+            return await self._create()
+
+        if time.time() < self.expires_at - self.refresh_margin:
+            return self.name
+
+        try:
+            cached = await self.client.aio.caches.update(
+                name=self.name,
+                config=types.UpdateCachedContentConfig(ttl=f"{self.ttl_seconds}s")
+            )
+            self._set_expiry(cached)
+            self._log("debug", f"Context cache TTL extended by {self.ttl_seconds}s")
+            return self.name
+        except Exception as e:
+            self._log("debug", f"Context cache refresh failed ({e}), recreating...")
+            self.name = None
+            return await self._create()
+
+    def restore(self, name: str, expires_at: float):
+        """Adopts the handle of a previous process if it is still valid for a while."""
+        if self.enabled and name and time.time() < expires_at - self.refresh_margin:
+            self.name = name
+            self.expires_at = expires_at
+
+    async def close(self):
+        """Deletes the server-side cache so it stops accruing storage cost."""
+        if not self.name:
+            return
+        name, self.name = self.name, None
+        try:
+            await self.client.aio.caches.delete(name=name)
+        except Exception:
+            pass
@@ -0,0 +1,175 @@
+import asyncio
+import json
+from google.genai import types
+
+from mindmirror import config
+
+# Rough conversion used for budget checks; exact counts come from usage metadata.
+CHARS_PER_TOKEN = 4
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:"
+SUMMARY_ACK = "[NEUTRAL] Got it, I'll keep that in mind."
+
+
+def estimate_tokens(contents) -> int:
+    """Cheap token estimate for a list of GenAI contents (characters / 4)."""
+    total_chars = 0
+    for content in contents:
+        for part in content.parts or []:
+            if part.text:
+                total_chars += len(part.text)
+            elif part.function_call:
+                total_chars += len(part.function_call.name or "") + len(json.dumps(part.function_call.args or {}, default=str))
+            elif part.function_response:
+                total_chars += len(json.dumps(part.function_response.response or {}, default=str))
+    return total_chars // CHARS_PER_TOKEN
+
+
+def is_user_turn_start(content) -> bool:
+    """A turn starts at a user content carrying text (tool results are also sent with the user role)."""
+    if content.role != "user":
+        return False
+    return any(part.text for part in content.parts or [])
+
+
+def render_transcript(contents, payload_chars: int = 300) -> str:
+    """Renders contents as a plain-text transcript used as summarization input."""
+    lines = []
+    for content in contents:
+        speaker = "User" if content.role == "user" else "Assistant"
+        for part in content.parts or []:
+            if part.text:
+                lines.append(f"{speaker}: {part.text.strip()}")
+            elif part.function_call:
+                lines.append(f"Assistant called tool {part.function_call.name}({json.dumps(part.function_call.args or {}, default=str)})")
+            elif part.function_response:
+                payload = json.dumps(part.function_response.response or {}, default=str)
+                lines.append(f"Tool {part.function_response.name} returned: {payload[:payload_chars]}")
+    return "\n".join(lines)
+
+
+def flatten_tool_parts(contents, payload_chars: int = 300) -> list:
+    """
+    Rewrites function call/response parts as plain text, for models that get no tool
+    declarations (e.g. lite models answering routed chit-chat turns).
+    """
+    flattened = []
+    for content in contents:
+        parts = []
+        for part in content.parts or []:
+            if part.function_call:
+                parts.append(types.Part.from_text(text=f"(Called tool {part.function_call.name}({json.dumps(part.function_call.args or {}, default=str)}))"))
+            elif part.function_response:
+                payload = json.dumps(part.function_response.response or {}, default=str)
+                parts.append(types.Part.from_text(text=f"(Tool {part.function_response.name} returned: {payload[:payload_chars]})"))
+            else:
+                parts.append(part)
+        if parts:
+            flattened.append(types.Content(role=content.role, parts=parts))
+    return flattened
+
+
+class HistoryManager:
+    """
+    Keeps a chat history within a token budget.
+    The most recent turns stay verbatim, tool payloads of older turns are elided,
+    and once the budget is crossed the older turns are summarized in the background
+    and replaced by a single summary exchange on the next turn.
+    """
+    def __init__(self, summarize_callback, token_budget: int = None, keep_turns: int = None,
+                 tool_payload_chars: int = None, log_queue=None):
+        self.summarize = summarize_callback
+        self.token_budget = token_budget or config.LLM_HISTORY_TOKEN_BUDGET
+        self.keep_turns = keep_turns or config.LLM_HISTORY_KEEP_TURNS
+        self.tool_payload_chars = tool_payload_chars or config.LLM_HISTORY_TOOL_PAYLOAD_CHARS
+        self.log_queue = log_queue
+
+        self.summary_task = None
+        self.summarized_count = 0  # Number of leading contents covered by the pending summary
+
+    def _recent_start(self, history) -> int:
+        """Index of the first content belonging to the turns kept verbatim."""
+        starts = [i for i, content in enumerate(history) if is_user_turn_start(content)]
+        if len(starts) <= self.keep_turns:
+            return 0
+        return starts[-self.keep_turns]
+
+    def _elide_payloads(self, history, end: int) -> tuple[list, int]:
+        """Replaces large tool results before `end` with a short preview."""
+        elided = 0
+        compacted = list(history)
+        for i in range(end):
+            content = compacted[i]
+            parts = []
+            changed = False
+            for part in content.parts or []:
+                response = part.function_response
+                if response:
+                    payload = json.dumps(response.response or {}, default=str)
+                    if len(payload) > self.tool_payload_chars:
+                        preview = payload[:self.tool_payload_chars // 3]
+                        part = types.Part.from_function_response(
+                            name=response.name,
+                            response={"result": f"[elided {len(payload)} chars] {preview}..."}
+                        )
+                        changed = True
+                        elided += 1
+                parts.append(part)
+            if changed:
+                compacted[i] = types.Content(role=content.role, parts=parts)
+        return compacted, elided
+
+    def compact(self, history) -> list | None:
+        """
+        Returns a compacted copy of the history, or None if nothing changed.
+        Applies a finished background summary and elides stale tool payloads.
+        """
+        changed = False
+
+        if self.summary_task and self.summary_task.done():
+            task, count = self.summary_task, self.summarized_count
+            self.summary_task = None
+            self.summarized_count = 0
+            try:
+                summary = task.result()
+            except Exception as e:
+                summary = None
+                if self.log_queue:
+                    self.log_queue.put({"type": "status", "text": f"[yellow]⚠️ History summarization failed: {e}[/yellow]"})
+            if summary and count <= len(history):
+                before = estimate_tokens(history)
+                history = [
+                    types.Content(role="user", parts=[types.Part.from_text(text=f"{SUMMARY_PREFIX}\n{summary}")]),
+                    types.Content(role="model", parts=[types.Part.from_text(text=SUMMARY_ACK)]),
+                ] + list(history[count:])
+                changed = True
+                if self.log_queue:
+                    self.log_queue.put({
+                        "type": "debug",
+                        "text": f"History summarized: {count} contents replaced (≈{before} -> ≈{estimate_tokens(history)} tokens)"
+                    })
+
+        history, elided = self._elide_payloads(history, self._recent_start(history))
+        if elided:
+            changed = True
+            if self.log_queue:
+                self.log_queue.put({"type": "debug", "text": f"History: elided {elided} old tool payload(s)"})
+
+        return history if changed else None
+
+    def schedule_summary(self, history) -> None:
+        """Starts a background summary of the older turns if the history exceeds the budget."""
+        if self.summary_task or estimate_tokens(history) <= self.token_budget:
+            return
+        count = self._recent_start(history)
+        if count == 0:
+            return
+        self.summarized_count = count
+        self.summary_task = asyncio.create_task(self.summarize(list(history[:count])))
+
+    def cancel(self) -> None:
+        """Cancels any pending background summary."""
+        if self.summary_task:
+            self.summary_task.cancel()
+            self.summary_task = None
+            self.summarized_count = 0
@@ -58,14 +58,15 @@ class MCPClientManager:
         as standard Python dictionaries representing JSON schemas.
         """
         all_tools = []
-        self.tool_to_server.clear()
+        # Swap the mapping in at the end, so calls running during a re-discovery keep working
+        tool_to_server = {}
         
         for server_name, session in self.sessions.items():
             try:
                 tools_result = await session.list_tools()
                 for tool in tools_result.tools:
                     # Map the tool name to its providing server
-                    self.tool_to_server[tool.name] = server_name
+                    tool_to_server[tool.name] = server_name
                     
                     # Convert inputSchema to a plain dictionary if it is a Pydantic object
                     schema = tool.inputSchema
@@ -86,8 +87,18 @@ class MCPClientManager:
                     "text": f"[yellow]⚠️ Failed to list tools for '{server_name}': {e}[/yellow]"
                 })
                 
+        self.tool_to_server = tool_to_server
         return all_tools
 
+    def load_tool_catalog(self, tool_to_server: dict):
+        """
+        Registers a tool-to-server mapping persisted by a previous process, so tools can be
+        called without running discovery first. Tools of servers that are not connected are skipped.
+        """
+        self.tool_to_server.update({
+            tool: server for tool, server in tool_to_server.items() if server in self.sessions
+        })
+
     async def call_tool(self, tool_name: str, arguments: dict) -> str:
         """
         Executes a tool call on the appropriate MCP server and returns
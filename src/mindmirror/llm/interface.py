@@ -1,5 +1,12 @@
 from abc import ABC, abstractmethod
 
+
+class MutatingToolRequested(Exception):
+    """Raised when a speculative generation asks for a tool with side effects."""
+    def __init__(self, tool_name: str):
+        super().__init__(f"Speculative generation requested mutating tool '{tool_name}'")
+        self.tool_name = tool_name
+
 class TTTInterface(ABC):
     """
     Abstract Base Class defining the contract for all Text-to-Thought (TTT) / Large Language Model (LLM) engines.
@@ -31,3 +38,76 @@ class TTTInterface(ABC):
             Exception: If inference fails or rate limits are hit.
         """
         pass
+
+    async def switch_model(self, model_name: str) -> None:
+        """
+        Moves the conversation to another model (optional, used for quota failover).
+
+        Raises:
+            NotImplementedError: If the engine does not support switching models.
+        """
+        raise NotImplementedError
+
+    def has_request_quota(self) -> bool:
+        """
+        Returns True if requests count against provider quotas and must go through the request scheduler.
+        Local engines return False.
+        """
+        return True
+
+    def supports_speculation(self) -> bool:
+        """
+        Returns True if the engine can generate speculatively on a provisional transcript.
+        """
+        return False
+
+    async def speculate(self, text: str) -> str:
+        """
+        Generates a response without committing it to the conversation history.
+        Must not execute tools with side effects.
+
+        Raises:
+            MutatingToolRequested: If the model asks for a mutating tool.
+        """
+        raise NotImplementedError
+
+    def commit_speculation(self) -> None:
+        """
+        Adopts the last successful speculative generation as the current turn.
+        """
+        pass
+
+    def discard_speculation(self) -> None:
+        """
+        Drops the last speculative generation.
+        """
+        pass
+
+    def record_exchange(self, user_text: str, response_text: str) -> None:
+        """
+        Appends an exchange that was answered without the engine (e.g. from a response cache)
+        to the conversation history, so follow-up turns keep their context.
+        """
+        pass
+
+    def export_state(self) -> dict | None:
+        """
+        Returns the conversation state as JSON-serializable data ({"history": [...], ...})
+        for session persistence, or None if the engine does not support it.
+        """
+        return None
+
+    def restore_state(self, state: dict) -> None:
+        """
+        Restores state produced by export_state(). Called before init_chat() when a
+        restarted process resumes the previous session.
+        """
+        pass
+
+    async def close(self, keep_state: bool = False) -> None:
+        """
+        Releases any resources held by the engine (background tasks, server-side caches, ...).
+        With keep_state, server-side state a persisted session refers to (e.g. a context cache)
+        is left for the next process to adopt.
+        """
+        pass
@@ -0,0 +1,3 @@
+from mindmirror.llm.local.client import LocalLLMClient
+
+__all__ = ["LocalLLMClient"]
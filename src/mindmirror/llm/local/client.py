@@ -0,0 +1,265 @@
+import re
+import json
+import time
+import asyncio
+import threading
+from mindmirror import config
+from mindmirror.llm.interface import TTTInterface
+from mindmirror.llm.telemetry import TurnTelemetry
+
+TOOL_CALL_RE = re.compile(r'<tool_call>\s*(\{.*?\})\s*</tool_call>', re.DOTALL)
+
+TOOL_INSTRUCTIONS = """
+You can call the following tools. To call a tool, reply with nothing but one or more blocks of the form
+<tool_call>{{"name": "<tool name>", "arguments": {{<JSON arguments>}}}}</tool_call>
+Tool results are returned to you inside <tool_response> blocks. Then answer the user as usual.
+
+Tools:
+{tools}
+"""
+
+
+def render_tools(tools: list[dict]) -> str:
+    """Renders MCP tool dictionaries as JSON function signatures for the system prompt."""
+    lines = []
+    for t in tools:
+        lines.append(json.dumps({
+            "name": t["name"],
+            "description": t.get("description", ""),
+            "parameters": t.get("inputSchema", {})
+        }, ensure_ascii=False))
+    return "\n".join(lines)
+
+
+def parse_tool_calls(text: str) -> list[tuple[str, dict]]:
+    """Extracts (name, arguments) pairs from <tool_call> blocks. Malformed blocks are ignored."""
+    calls = []
+    for match in TOOL_CALL_RE.finditer(text):
+        try:
+            call = json.loads(match.group(1))
+        except json.JSONDecodeError:
+            continue
+        if isinstance(call, dict) and call.get("name"):
+            calls.append((call["name"], call.get("arguments") or {}))
+    return calls
+
+
+class LocalLLMClient(TTTInterface):
+    """
+    Local LLM client running quantized GGUF models on CPU via llama.cpp.
+    Maps MCP tool dictionaries to prompt-based function calling, streams tokens
+    to measure time-to-first-token and throughput, and keeps the KV cache of the
+    conversation prefix alive across turns.
+    """
+    def __init__(self, model_path: str = None, system_prompt: str = "", tools: list[dict] = None,
+                 execute_tool_callback=None, log_queue=None, n_threads: int = None, n_ctx: int = None):
+        self.model_path = model_path or config.LOCAL_LLM_MODEL_PATH
+        self.model_name = self.model_path.replace("\\", "/").rsplit("/", 1)[-1]
+        self.system_prompt = system_prompt
+        self.tools = tools or []
+        self.execute_tool = execute_tool_callback
+        self.log_queue = log_queue
+        self.n_threads = n_threads or config.LOCAL_LLM_THREADS
+        self.n_ctx = n_ctx or config.LOCAL_LLM_CONTEXT
+
+        self.llm = None
+        self.messages = []      # Conversation in chat-completion format, starting with the system message
+        self.lock = asyncio.Lock()  # llama.cpp contexts are not thread-safe: one generation at a time
+        self.turn_requests = 0
+        self.turn_tokens = 0
+        self.last_ttft = None
+        self.last_tokens_per_second = None
+        self.telemetry = None
+        self.last_telemetry = None
+        self.restored_history = None
+
+    async def init_chat(self):
+        """Loads the GGUF model (once) and starts a new conversation."""
+        if self.llm is None:
+            self.llm = await asyncio.to_thread(self._load_model)
+
+        system_prompt = self.system_prompt
+        if self.tools:
+            system_prompt += TOOL_INSTRUCTIONS.format(tools=render_tools(self.tools))
+        self.messages = [{"role": "system", "content": system_prompt}] + (self.restored_history or [])
+        self.restored_history = None
+
+        if self.log_queue:
+            self.log_queue.put({
+                "type": "info",
+                "text": f"Local chat session initialized with model '{self.model_name}' "
+                        f"({self.n_threads} threads, {self.n_ctx} ctx) and {len(self.tools)} tools."
+            })
+
+    def _load_model(self):
+        try:
+            from llama_cpp import Llama, LlamaRAMCache
+        except ImportError:
+            if self.log_queue:
+                self.log_queue.put({'type': 'error', 'text': "Could not import 'llama_cpp'. Install it with 'pip install -r requirements-local.txt'."})
+            raise ImportError("llama-cpp-python is required for the local LLM backend.")
+
+        start_t = time.time()
+        llm = Llama(
+            model_path=self.model_path,
+            n_ctx=self.n_ctx,
+            n_threads=self.n_threads,
+            n_threads_batch=self.n_threads,
+            n_batch=config.LOCAL_LLM_BATCH,
+            chat_format=config.LOCAL_LLM_CHAT_FORMAT,
+            verbose=False
+        )
+        # Consecutive turns share their prompt prefix, so llama.cpp only evaluates the new
+        # tokens. The RAM cache additionally restores states after a cancelled or trimmed turn.
+        if config.LOCAL_LLM_STATE_CACHE_MB > 0:
+            llm.set_cache(LlamaRAMCache(capacity_bytes=config.LOCAL_LLM_STATE_CACHE_MB << 20))
+
+        if self.log_queue:
+            self.log_queue.put({'type': 'success', 'text': f"✅ Local LLM ({self.model_name}) loaded in {time.time() - start_t:.1f}s."})
+        return llm
+
+    def has_request_quota(self) -> bool:
+        return False
+
+    async def send_message(self, text: str) -> str:
+        """
+        Sends a message to the local model. Handles the execution loop
+        if the model requests any function calls.
+        """
+        if self.llm is None:
+            await self.init_chat()
+
+        start_t = time.time()
+        self.turn_requests = 0
+        self.turn_tokens = 0
+        self.telemetry = TurnTelemetry(model=self.model_name)
+        # Work on a copy and adopt it at the end, so a cancelled turn leaves the conversation untouched
+        messages = self._trimmed(self.messages + [{"role": "user", "content": text}])
+        response_text = await self._generate(messages)
+
+        rounds = 0
+        calls = parse_tool_calls(response_text)
+        while calls and rounds < config.LOCAL_LLM_MAX_TOOL_ROUNDS:
+            rounds += 1
+            self.telemetry.tool_rounds = rounds
+            messages.append({"role": "assistant", "content": response_text})
+            results = []
+            for tool_name, tool_args in calls:
+                if self.log_queue:
+                    self.log_queue.put({
+                        "type": "status",
+                        "text": f"🤖 LLM requested tool '{tool_name}' with arguments: {tool_args}"
+                    })
+                tool_start_t = time.time()
+                try:
+                    tool_result = await self.execute_tool(tool_name, tool_args)
+                except Exception as e:
+                    tool_result = f"Error: Tool execution failed: {e}"
+                self.telemetry.tool_calls.append([tool_name, time.time() - tool_start_t])
+                results.append(f"<tool_response>{json.dumps({'name': tool_name, 'result': tool_result}, ensure_ascii=False, default=str)}</tool_response>")
+
+            messages.append({"role": "user", "content": "\n".join(results)})
+            response_text = await self._generate(self._trimmed(messages))
+            calls = parse_tool_calls(response_text)
+
+        # Never speak raw tool call markup
+        response_text = TOOL_CALL_RE.sub("", response_text).strip()
+        messages.append({"role": "assistant", "content": response_text})
+        self.messages = messages
+        self.telemetry.total_time = time.time() - start_t
+        self.last_telemetry = self.telemetry
+
+        if self.log_queue:
+            self.log_queue.put({
+                "type": "debug",
+                "text": f"📏 Local turn: {self.turn_requests} requests, {self.turn_tokens} generated tokens, {time.time() - start_t:.2f}s"
+            })
+        return response_text
+
+    def record_exchange(self, user_text: str, response_text: str):
+        """Appends a cached exchange to the conversation."""
+        if self.messages:
+            self.messages += [
+                {"role": "user", "content": user_text},
+                {"role": "assistant", "content": response_text},
+            ]
+
+    def export_state(self) -> dict:
+        """Returns the conversation without the system message (it is rebuilt by init_chat)."""
+        return {"history": self.messages[1:]}
+
+    def restore_state(self, state: dict):
+        self.restored_history = list(state.get("history", []))
+
+    def _trimmed(self, messages: list[dict]) -> list[dict]:
+        """
+        Drops the oldest exchanges (never the system message or the current turn) until the
+        prompt leaves room for an answer in the context window.
+        """
+        budget = self.n_ctx - config.LOCAL_LLM_MAX_TOKENS
+        messages = list(messages)
+        while len(messages) > 2 and self._count_tokens(messages) > budget:
+            del messages[1]
+        return messages
+
+    def _count_tokens(self, messages: list[dict]) -> int:
+        text = "\n".join(m["content"] for m in messages)
+        return len(self.llm.tokenize(text.encode("utf-8"), add_bos=False, special=True))
+
+    async def _generate(self, messages: list[dict]) -> str:
+        """Runs one streamed completion in a worker thread; cancelling the caller stops generation."""
+        async with self.lock:
+            stop = threading.Event()
+            future = asyncio.get_running_loop().run_in_executor(None, self._generate_sync, messages, stop)
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Let the worker stop at the next token before the model is used again
+                stop.set()
+                await asyncio.gather(future, return_exceptions=True)
+                raise
+
+    def _generate_sync(self, messages: list[dict], stop: threading.Event) -> str:
+        start_t = time.perf_counter()
+        first_token_t = None
+        tokens = 0
+        pieces = []
+
+        stream = self.llm.create_chat_completion(
+            messages=messages,
+            max_tokens=config.LOCAL_LLM_MAX_TOKENS,
+            temperature=config.LOCAL_LLM_TEMPERATURE,
+            stream=True
+        )
+        try:
+            for chunk in stream:
+                if stop.is_set():
+                    break
+                delta = chunk["choices"][0]["delta"].get("content")
+                if not delta:
+                    continue
+                if first_token_t is None:
+                    first_token_t = time.perf_counter()
+                    if self.telemetry.ttfb is None:
+                        self.telemetry.ttfb = time.time() - self.telemetry.started_at
+                tokens += 1
+                pieces.append(delta)
+        finally:
+            stream.close()
+
+        end_t = time.perf_counter()
+        self.turn_requests += 1
+        self.turn_tokens += tokens
+        self.telemetry.requests += 1
+        self.telemetry.output_tokens += tokens
+        self.last_ttft = (first_token_t or end_t) - start_t
+        decode_time = end_t - (first_token_t or end_t)
+        self.last_tokens_per_second = (tokens - 1) / decode_time if tokens > 1 and decode_time > 0 else None
+
+        if self.log_queue:
+            speed = f"{self.last_tokens_per_second:.1f} tok/s" if self.last_tokens_per_second else "n/a"
+            self.log_queue.put({
+                "type": "debug",
+                "text": f"⚡ Local LLM: TTFT {self.last_ttft:.2f}s, {speed} ({tokens} tokens)"
+            })
+        return "".join(pieces)
@@ -0,0 +1,120 @@
+import time
+import asyncio
+
+from mindmirror import config
+from mindmirror.llm.tools import is_read_only_tool
+
+
+class ToolPrefetcher:
+    """
+    Runs selected read-only MCP tools at startup and periodically in the background,
+    so the model's first tool calls of a session are answered without a round-trip.
+    A prefetched result is served while it is fresh; a call arriving while a fetch is
+    in flight joins that fetch. Any mutating tool call marks all results stale.
+    """
+    def __init__(self, call_tool, available_tools: list[dict], log_queue=None):
+        self.call_tool = call_tool
+        self.log_queue = log_queue
+
+        names = {t["name"] for t in available_tools}
+        self.ttls = {
+            name: ttl for name, ttl in getattr(config, 'LLM_PREFETCH_TOOLS', {}).items()
+            if name in names and is_read_only_tool(name)
+        }
+        self.refresh_ratio = getattr(config, 'LLM_PREFETCH_REFRESH_RATIO', 0.8)
+
+        self.results = {}    # name -> (result, fetched_at)
+        self.inflight = {}   # name -> asyncio.Task
+        self.generation = 0  # Bumped by invalidate(); fetches started earlier are not stored
+        self.task = None
+        self.wakeup = asyncio.Event()
+
+        self.hits = 0
+        self.misses = 0
+
+    def start(self):
+        """Starts the background refresh loop (the first pass fetches every tool)."""
+        if self.ttls and self.task is None:
+            self.task = asyncio.create_task(self._refresh_loop())
+            if self.log_queue:
+                self.log_queue.put({'type': 'debug', 'text': f"📥 Prefetching tools: {', '.join(self.ttls)}"})
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        for task in self.inflight.values():
+            task.cancel()
+
+    def _age(self, name: str) -> float:
+        entry = self.results.get(name)
+        return time.monotonic() - entry[1] if entry else float("inf")
+
+    def _fetch(self, name: str) -> asyncio.Task:
+        """Starts (or joins) a background fetch of one tool."""
+        task = self.inflight.get(name)
+        if task is None:
+            task = self.inflight[name] = asyncio.create_task(self._fetch_once(name))
+        return task
+
+    async def _fetch_once(self, name: str):
+        start_t = time.monotonic()
+        generation = self.generation
+        try:
+            result = await self.call_tool(name, {})
+        except Exception as e:
+            if self.log_queue:
+                self.log_queue.put({'type': 'debug', 'text': f"📥 Prefetch of '{name}' failed: {e}"})
+            return None
+        finally:
+            if generation == self.generation:
+                self.inflight.pop(name, None)
+        if generation != self.generation:
+            return None
+        self.results[name] = (result, start_t)
+        return result
+
+    async def _refresh_loop(self):
+        while True:
+            due = [name for name, ttl in self.ttls.items() if self._age(name) >= ttl * self.refresh_ratio]
+            if due:
+                await asyncio.gather(*(self._fetch(name) for name in due), return_exceptions=True)
+            next_due = min(max(ttl * self.refresh_ratio - self._age(name), 0.5) for name, ttl in self.ttls.items())
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), next_due)
+            except asyncio.TimeoutError:
+                pass
+
+    async def get(self, name: str, args: dict) -> str | None:
+        """
+        Returns the prefetched result of a tool call if it is fresh (or being fetched right now),
+        otherwise None so the caller executes the tool itself.
+        """
+        if name not in self.ttls or args:
+            return None
+        if self._age(name) < self.ttls[name]:
+            result = self.results[name][0]
+        elif name in self.inflight:
+            result = await asyncio.shield(self.inflight[name])
+        else:
+            result = None
+
+        if result is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if self.log_queue:
+            self.log_queue.put({
+                'type': 'debug',
+                'text': f"📥 Served '{name}' from prefetch (age {self._age(name):.1f}s) | hits {self.hits}, misses {self.misses}"
+            })
+        return result
+
+    def invalidate(self):
+        """Marks every prefetched result stale (after a mutating tool call) and refreshes them."""
+        self.generation += 1
+        self.results.clear()
+        self.inflight.clear()
+        self.wakeup.set()
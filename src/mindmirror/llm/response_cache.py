@@ -0,0 +1,112 @@
+import os
+import re
+import json
+import time
+import hashlib
+
+from mindmirror import config
+
+
+def normalize_transcript(text: str) -> str:
+    """Lowercases, strips punctuation and collapses whitespace so trivial variations share a key."""
+    text = re.sub(r"[^\w\s']", " ", text.lower())
+    return " ".join(text.split())
+
+
+class ResponseCache:
+    """
+    Caches final LLM responses for short, repeated utterances and the startup greeting.
+    Keys combine the normalized transcript with a hash of the system prompt and a
+    tool-state version that is bumped whenever a mutating tool runs.
+    Entries are persisted to disk together with the tool-state version, so the greeting
+    survives restarts but an entry from before a mutation is never served again.
+    """
+    def __init__(self, system_prompt: str, path: str = None, rules: dict = None, max_words: int = None,
+                 default_ttl: int = None, log_queue=None):
+        self.path = path or config.LLM_RESPONSE_CACHE_PATH
+        self.rules = {normalize_transcript(k): v for k, v in (rules or config.LLM_RESPONSE_CACHE_RULES).items()}
+        self.max_words = max_words if max_words is not None else config.LLM_RESPONSE_CACHE_MAX_WORDS
+        self.default_ttl = default_ttl if default_ttl is not None else config.LLM_RESPONSE_CACHE_TTL
+        self.log_queue = log_queue
+
+        self.enabled = config.LLM_RESPONSE_CACHE
+        self.prompt_hash = hashlib.sha1(system_prompt.encode("utf-8")).hexdigest()[:12]
+        self.tool_state_version = 0
+        self.entries = {}  # key -> {"response": str, "expires_at": float}
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self):
+        if not self.enabled or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            if "entries" not in data:
+                return  # Written without a tool-state version: entries may predate a mutation
+            now = time.time()
+            self.tool_state_version = data.get("tool_state_version", 0)
+            self.entries = {k: v for k, v in data["entries"].items() if v.get("expires_at", 0) > now}
+        except Exception:
+            self.entries = {}
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"tool_state_version": self.tool_state_version, "entries": self.entries}, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            if self.log_queue:
+                self.log_queue.put({"type": "debug", "text": f"Response cache could not be saved: {e}"})
+
+    def ttl_for(self, text: str) -> int | None:
+        """Returns the TTL for an eligible utterance, or None if it must always reach the model."""
+        normalized = normalize_transcript(text)
+        if normalized in self.rules:
+            return self.rules[normalized]
+        if self.default_ttl and 0 < len(normalized.split()) <= self.max_words:
+            return self.default_ttl
+        return None
+
+    def key(self, text: str) -> str:
+        return f"{self.prompt_hash}:{self.tool_state_version}:{normalize_transcript(text)}"
+
+    def bump_tool_state(self):
+        """Invalidates all entries that were produced against the previous tool state."""
+        self.tool_state_version += 1
+        self.entries = {}  # Keyed by an older version, so they can never be hit again
+        if self.enabled:
+            self._save()
+
+    def get(self, text: str) -> str | None:
+        """Returns a cached response for the utterance, if eligible and still fresh."""
+        if not self.enabled or self.ttl_for(text) is None:
+            return None
+        entry = self.entries.get(self.key(text))
+        if entry and entry["expires_at"] > time.time():
+            self.hits += 1
+            self._log_stats("hit")
+            return entry["response"]
+        self.misses += 1
+        return None
+
+    def put(self, text: str, response_text: str):
+        """Stores a response if the utterance is eligible."""
+        ttl = self.ttl_for(text)
+        if not self.enabled or ttl is None or not response_text.strip():
+            return
+        now = time.time()
+        self.entries = {k: v for k, v in self.entries.items() if v["expires_at"] > now}
+        self.entries[self.key(text)] = {"response": response_text, "expires_at": now + ttl}
+        self._save()
+
+    def _log_stats(self, outcome: str):
+        if self.log_queue:
+            total = self.hits + self.misses
+            self.log_queue.put({
+                "type": "debug",
+                "text": f"Response cache {outcome} (hit rate {self.hits}/{total})"
+            })
@@ -0,0 +1,113 @@
+import re
+
+STYLE_TAGS = ("NEUTRAL", "EXCITED", "SERIOUS", "LAZY")
+TAG_RE = re.compile(r'\[(' + '|'.join(STYLE_TAGS) + r')\]', re.IGNORECASE)
+MAX_TAG_LENGTH = max(len(tag) for tag in STYLE_TAGS) + 2
+
+# Markdown passes, applied in this order (later passes see the output of earlier ones)
+MARKDOWN_PASSES = [
+    (re.compile(r'```[\w]*\n?'), ''),
+    (re.compile(r'```'), ''),
+    (re.compile(r'`([^`]*)`'), r'\1'),
+    (re.compile(r'\*\*([^*]+)\*\*'), r'\1'),
+    (re.compile(r'__([^_]+)__'), r'\1'),
+    (re.compile(r'\*([^*]+)\*'), r'\1'),
+    (re.compile(r'_([^_]+)_'), r'\1'),
+    (re.compile(r'^#+\s+', re.MULTILINE), ''),
+    (re.compile(r'\[([^\]]+)\]\([^\)]+\)'), r'\1'),
+    (re.compile(r'^\s*[-*+]\s+', re.MULTILINE), ''),
+    (re.compile(r'^\s*\d+\.\s+', re.MULTILINE), ''),
+]
+MARKDOWN_CHARS = frozenset('`*_#[-+0123456789')
+
+
+def strip_markdown(text):
+    """Remove markdown formatting but preserve all text content including code"""
+    # Plain sentences (the common case for a voice assistant) skip the passes entirely
+    if MARKDOWN_CHARS.isdisjoint(text):
+        return text.strip()
+    for pattern, replacement in MARKDOWN_PASSES:
+        text = pattern.sub(replacement, text)
+    return text.strip()
+
+
+def _partial_tag_start(buffer: str) -> int:
+    """Returns the index where a possibly incomplete style tag starts at the end of the buffer, or -1."""
+    start = buffer.rfind('[', max(0, len(buffer) - MAX_TAG_LENGTH + 1))
+    if start == -1:
+        return -1
+    fragment = buffer[start + 1:].upper()
+    if any(tag.startswith(fragment) for tag in STYLE_TAGS):
+        return start
+    return -1
+
+
+class ResponseTokenizer:
+    """
+    Incremental parser for streamed LLM output.
+    Consumes text deltas, tracks `[STYLE]` tags across chunk boundaries and returns
+    `(style, text)` segments as soon as the next tag (or the end of the response) closes them.
+
+    Produces the same segments as parsing the complete response: text before the first tag
+    is dropped, tags without content are skipped, and a response without any tagged
+    segment is spoken in full with the neutral style.
+    """
+    def __init__(self, clean: bool = True):
+        self.clean = clean
+        self.buffer = ""        # Text not yet assigned to a segment (may end in a partial tag)
+        self.style = None       # Style of the open segment, None before the first tag
+        self.segment = []       # Text deltas of the open segment
+        self.raw = []           # Full response, kept until the first segment is emitted
+        self.emitted = False
+
+    def _finish(self, text: str) -> str:
+        return strip_markdown(text.strip()) if self.clean else text.strip()
+
+    def _close_segment(self, segments: list):
+        text = "".join(self.segment)
+        self.segment = []
+        # An empty segment (tag immediately followed by another tag or the end) is dropped
+        if self.style is not None and text:
+            segments.append((self.style, self._finish(text)))
+            self.emitted = True
+            self.raw = []
+
+    def feed(self, delta: str) -> list[tuple[str, str]]:
+        """Consumes a text delta and returns the segments it closed."""
+        if not self.emitted:
+            self.raw.append(delta)
+        self.buffer += delta
+
+        segments = []
+        pos = 0
+        for match in TAG_RE.finditer(self.buffer):
+            self.segment.append(self.buffer[pos:match.start()])
+            self._close_segment(segments)
+            self.style = match.group(1).lower()
+            pos = match.end()
+
+        # Hold back a trailing fragment that may turn into a tag with the next delta
+        hold = _partial_tag_start(self.buffer)
+        if hold < pos:
+            hold = len(self.buffer)
+        self.segment.append(self.buffer[pos:hold])
+        self.buffer = self.buffer[hold:]
+        return segments
+
+    def close(self) -> list[tuple[str, str]]:
+        """Flushes the final segment once the response is complete."""
+        segments = []
+        self.segment.append(self.buffer)
+        self.buffer = ""
+        self._close_segment(segments)
+        if not self.emitted:
+            segments.append(("neutral", self._finish("".join(self.raw))))
+            self.emitted = True
+        self.raw = []
+        return segments
+
+
+def parse_llm_response(response_text):
+    """Parses LLM output to separate style tags from spoken text."""
+    tokenizer = ResponseTokenizer(clean=False)
+    return tokenizer.feed(response_text) + tokenizer.close()
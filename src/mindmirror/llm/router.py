@@ -0,0 +1,99 @@
+import re
+
+from mindmirror import config
+from mindmirror.llm.response_cache import normalize_transcript
+
+LITE = "lite"
+FULL = "full"
+
+ID_RE = re.compile(r'\b(?=\w*\d)\w+\b')
+GENERIC_NAME_TERMS = {"get", "set", "list", "by", "for", "the", "and", "of", "to", "all", "info", "data"}
+
+
+def tool_terms(tools: list[dict]) -> set[str]:
+    """Words taken from tool names (e.g. get_unresolved_alerts -> unresolved, alert)."""
+    terms = set()
+    for t in tools:
+        for word in t["name"].lower().split("_"):
+            if word and word not in GENERIC_NAME_TERMS:
+                terms.add(word.rstrip("s"))
+    return terms
+
+
+def _contains_phrase(text: str, phrases) -> str | None:
+    padded = f" {text} "
+    return next((p for p in phrases if f" {p} " in padded), None)
+
+
+class TurnRouter:
+    """
+    Decides per turn whether the lite model (fast, no tools) or the full model (with tools)
+    answers. Cheap heuristics decide most turns; an optional classifier callback
+    (`async (text) -> bool needs_tools`) settles the ambiguous ones.
+    Routing decisions and per-route latency are logged.
+    """
+    def __init__(self, tools: list[dict], classify_callback=None, log_queue=None):
+        self.has_tools = bool(tools)
+        self.tool_terms = tool_terms(tools)
+        self.tool_cues = [normalize_transcript(c) for c in config.LLM_ROUTER_TOOL_CUES]
+        self.chat_cues = [normalize_transcript(c) for c in config.LLM_ROUTER_CHAT_CUES]
+        self.followup_words = set(config.LLM_ROUTER_FOLLOWUP_WORDS)
+        self.reply_cues = [normalize_transcript(c) for c in config.LLM_ROUTER_REPLY_CUES]
+        self.classify = classify_callback
+        self.log_queue = log_queue
+
+        self.last_route = FULL
+        self.stats = {LITE: [0, 0.0], FULL: [0, 0.0]}  # route -> [turns, total latency]
+
+    def heuristic(self, text: str) -> tuple[str | None, str]:
+        """Returns (route, reason); the route is None if the heuristics are unsure."""
+        normalized = normalize_transcript(text)
+        words = normalized.split()
+        if not self.has_tools:
+            return LITE, "no tools available"
+        if ID_RE.search(normalized):
+            return FULL, "mentions an ID or number"
+        term = next((w for w in words if w.rstrip("s") in self.tool_terms), None)
+        if term:
+            return FULL, f"mentions '{term}'"
+        cue = _contains_phrase(normalized, self.tool_cues)
+        if cue:
+            return FULL, f"tool cue '{cue}'"
+        if self.last_route == FULL and self.followup_words.intersection(words) and len(words) <= 8:
+            return FULL, "follow-up to a tool turn"
+        # "Should I resolve alert 123?" - "yes": only the full model can run the confirmed action
+        cue = _contains_phrase(normalized, self.reply_cues)
+        if self.last_route == FULL and cue and len(words) <= 8:
+            return FULL, f"reply '{cue}' to a tool turn"
+        cue = _contains_phrase(normalized, self.chat_cues)
+        if cue:
+            return LITE, f"small talk '{cue}'"
+        return None, "no cues"
+
+    async def route(self, text: str) -> str:
+        route, reason = self.heuristic(text)
+        if route is None and self.classify:
+            try:
+                route = FULL if await self.classify(text) else LITE
+                reason = "classifier"
+            except Exception as e:
+                reason = f"classifier failed: {e}"
+        if route is None:
+            # When in doubt, the model with tools can answer anything
+            route = FULL
+        self.last_route = route
+        if self.log_queue:
+            self.log_queue.put({'type': 'debug', 'text': f"🧭 Route → {route} ({reason})"})
+        return route
+
+    def record(self, route: str, latency: float):
+        """Accounts for the latency of a routed turn and logs the per-route averages."""
+        stats = self.stats[route]
+        stats[0] += 1
+        stats[1] += latency
+        if self.log_queue:
+            summary = ", ".join(
+                f"{name} {turns} turns avg {total / turns:.2f}s"
+                for name, (turns, total) in self.stats.items() if turns
+            )
+            self.log_queue.put({'type': 'debug', 'text': f"🧭 {route} turn: {latency:.2f}s | {summary}"})
@@ -1,58 +1,119 @@
-import re
-import time
+import queue
 import asyncio
 from dotenv import load_dotenv
-from google.api_core import exceptions
 
 from mindmirror import config
 from mindmirror.llm.google.mcp_client import MCPClientManager
+from mindmirror.llm.response_parser import ResponseTokenizer
+from mindmirror.llm.response_cache import ResponseCache, normalize_transcript
+from mindmirror.llm.tools import is_read_only_tool
+from mindmirror.llm.speculation import SpeculativeGenerator
+from mindmirror.llm.prefetch import ToolPrefetcher
+from mindmirror.llm.telemetry import TelemetryAggregator
+from mindmirror.llm.tool_results import ToolResultCompactor, RESULT_PAGE_TOOL, RESULT_PAGE_TOOL_SPEC
+from mindmirror.llm.deadline import call_with_deadline, start_turn_deadline
+from mindmirror.llm.session_store import SessionStore, catalog_version
+from mindmirror.llm.scheduler import RequestScheduler, is_rate_limit_error, retry_after_seconds
 
-def strip_markdown(text):
-    """Remove markdown formatting but preserve all text content including code"""
-    text = re.sub(r'```[\w]*\n?', '', text)
-    text = re.sub(r'```', '', text)
-    text = re.sub(r'`([^`]*)`', r'\1', text)
-    text = re.sub(r'\*\*([^*]+)\*\*', r'\1', text)
-    text = re.sub(r'__([^_]+)__', r'\1', text)
-    text = re.sub(r'\*([^*]+)\*', r'\1', text)
-    text = re.sub(r'_([^_]+)_', r'\1', text)
-    text = re.sub(r'^#+\s+', '', text, flags=re.MULTILINE)
-    text = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', text)
-    text = re.sub(r'^\s*[-*+]\s+', '', text, flags=re.MULTILINE)
-    text = re.sub(r'^\s*\d+\.\s+', '', text, flags=re.MULTILINE)
-    return text.strip()
-
-def parse_llm_response(response_text):
-    """Parses LLM output to separate style tags from spoken text."""
-    pattern = r'\[(NEUTRAL|EXCITED|SERIOUS|LAZY)\]\s*((?:(?!\[(?:NEUTRAL|EXCITED|SERIOUS|LAZY)\]).)+)'
-    matches = re.findall(pattern, response_text, re.IGNORECASE | re.DOTALL)
-    if matches:
-        return [(style.lower(), text.strip()) for style, text in matches]
-    return [("neutral", response_text.strip())]
-
-def run_ttt_loop(ttt_class, ttt_kwargs, system_prompt, log_queue, text_queue, response_queue):
+def emit_response(response_text, log_queue, response_queue, epoch=0):
+    """
+    Logs a final response and queues its styled, markdown-free segments for TTS.
+    Each segment carries the turn epoch, so TTS can drop segments of cancelled turns.
+    """
+    log_queue.put({'type': 'ai', 'text': response_text})
+
+    # Parse response into markdown-free segments based on style tags
+    tokenizer = ResponseTokenizer()
+    segments = tokenizer.feed(response_text) + tokenizer.close()
+
+    # Send to response queue for TTS synthesis
+    for style, clean_text in segments:
+        response_queue.put((style, clean_text, epoch))
+
+def run_ttt_loop(ttt_class, ttt_kwargs, system_prompt, log_queue, text_queue, response_queue, control_queue=None):
     """Process text from STT and send to TTT/LLM engine."""
     try:
         load_dotenv()
-        asyncio.run(async_run_ttt_loop(ttt_class, ttt_kwargs, system_prompt, log_queue, text_queue, response_queue))
+        asyncio.run(async_run_ttt_loop(ttt_class, ttt_kwargs, system_prompt, log_queue, text_queue, response_queue, control_queue))
     except KeyboardInterrupt:
         print("TTT (AI) shutting down...")
     except Exception as e:
         log_queue.put({'type': 'status', 'text': f"❌ Critical error in TTT task: {e}"})
 
-async def async_run_ttt_loop(ttt_class, ttt_kwargs, system_prompt, log_queue, text_queue, response_queue):
+async def async_run_ttt_loop(ttt_class, ttt_kwargs, system_prompt, log_queue, text_queue, response_queue, control_queue=None):
     """Async text-to-text loop task using MCP clients and custom TTT client."""
     mcp_servers_config = getattr(config, 'MCP_SERVERS', [])
     mcp_manager = MCPClientManager(mcp_servers_config, log_queue)
     await mcp_manager.start()
+    llm_client = None
+    prefetcher = None
+    catalog_task = None
+    session_store = None
 
     try:
-        # Discover tools from MCP servers
-        tools = await mcp_manager.get_all_tools()
+        # Resume the previous session if one was checkpointed (skips discovery and greeting)
+        session_store = SessionStore(system_prompt, client=ttt_class.__name__, log_queue=log_queue) if getattr(config, 'LLM_SESSION_PERSIST', False) else None
+        session = session_store.load() if session_store else None
+
+        if session and session.get("tools") is not None:
+            mcp_tools = session["tools"]
+            mcp_manager.load_tool_catalog(session.get("tool_servers", {}))
+
+            async def verify_tool_catalog():
+                nonlocal mcp_tools
+                fresh_tools = await mcp_manager.get_all_tools()
+                if catalog_version(fresh_tools) != session.get("catalog_version"):
+                    log_queue.put({'type': 'status', 'text': "[yellow]⚠️ MCP tool catalog changed since the last session, the new tools are declared after the next restart[/yellow]"})
+                    mcp_tools = fresh_tools
+
+            catalog_task = asyncio.create_task(verify_tool_catalog())
+        else:
+            # Discover tools from MCP servers
+            mcp_tools = await mcp_manager.get_all_tools()
+        tools = mcp_tools
+
+        response_cache = ResponseCache(system_prompt, log_queue=log_queue)
+        replay_phrases = {normalize_transcript(p) for p in getattr(config, 'LLM_REPLAY_PHRASES', [])}
+        last_response = session.get("last_response") if session else None
+        turns = session.get("turns", 0) if session else 0
+
+        # Run likely read-only tools ahead of the first turn and keep their results fresh
+        if getattr(config, 'LLM_PREFETCH', False):
+            prefetcher = ToolPrefetcher(mcp_manager.call_tool, tools, log_queue)
+            prefetcher.start()
+
+        # Keep large tool results out of the prompt; the full payload stays reachable via a handle
+        compactor = None
+        if getattr(config, 'LLM_TOOL_RESULT_COMPACTION', False):
+            compactor = ToolResultCompactor(log_queue)
+            tools = tools + [RESULT_PAGE_TOOL_SPEC]
+
+        turn_mutated = False  # A mutating tool ran in the current turn, so it must not be restarted
 
-        # Decoupled callback for tool execution
+        async def run_tool(name, args):
+            nonlocal turn_mutated
+            if is_read_only_tool(name):
+                if prefetcher is not None:
+                    result = await prefetcher.get(name, args or {})
+                    if result is not None:
+                        return result
+                return await mcp_manager.call_tool(name, args)
+
+            # Mutating tools change the state cached responses and prefetched results were built on
+            turn_mutated = True
+            response_cache.bump_tool_state()
+            try:
+                return await mcp_manager.call_tool(name, args)
+            finally:
+                if prefetcher is not None:
+                    prefetcher.invalidate()
+
+        # Decoupled callback for tool execution, bounded by per-tool timeouts and the turn deadline
         async def execute_tool_callback(name, args):
-            return await mcp_manager.call_tool(name, args)
+            if compactor is not None and name == RESULT_PAGE_TOOL:
+                return compactor.page(args or {})
+            result = await call_with_deadline(run_tool, name, args, log_queue)
+            return compactor.compact(name, result) if compactor is not None else result
 
         # Merge composition configurations
         kwargs = dict(ttt_kwargs)
@@ -65,77 +126,249 @@ async def async_run_ttt_loop(ttt_class, ttt_kwargs, system_prompt, log_queue, te
 
         # Instantiate concrete TTT client inside child process boundary
         llm_client = ttt_class(**kwargs)
+        if session:
+            llm_client.restore_state({**session.get("engine", {}), "history": session["history"]})
         await llm_client.init_chat()
 
+        def checkpoint():
+            """Journals the conversation state after a turn, for a fast resume after a restart."""
+            if session_store is None:
+                return
+            state = llm_client.export_state()
+            if state is None:
+                return
+            history = state.pop("history")
+            session_store.checkpoint(
+                history,
+                engine=state,
+                tools=mcp_tools,
+                tool_servers=dict(mcp_manager.tool_to_server),
+                catalog_version=catalog_version(mcp_tools),
+                turns=turns,
+                last_response=last_response
+            )
+
+        # Quota-aware request scheduling (replaces a fixed gap between requests)
+        scheduler = RequestScheduler(
+            getattr(llm_client, 'model_name', 'default'),
+            getattr(config, 'LLM_FALLBACK_MODEL', None),
+            log_queue
+        )
+        estimated_tokens = 0  # Token usage of the previous turn, used as estimate for the next one
+
+        def record_turn_usage(model):
+            """Settles the turn's usage per serving model; `model` is the one the turn was admitted on."""
+            nonlocal estimated_tokens
+            tokens = getattr(llm_client, 'turn_tokens', 0)
+            usage = getattr(llm_client, 'turn_usage', None) or {model: (getattr(llm_client, 'turn_requests', 1), tokens)}
+            scheduler.record_usage(model, *usage.get(model, (0, 0)), estimated_tokens)
+            for served_by, (requests, served_tokens) in usage.items():
+                if served_by != model:
+                    scheduler.record_usage(served_by, requests, served_tokens, admitted=False)
+            estimated_tokens = tokens or estimated_tokens
+
+        # Typed per-turn telemetry with rolling percentiles
+        telemetry_stats = TelemetryAggregator(log_queue=log_queue)
+        last_reported = None
+
+        def report_turn(retries=0, queue_wait=0.0):
+            nonlocal last_reported
+            telemetry = getattr(llm_client, 'last_telemetry', None)
+            if telemetry is None or telemetry is last_reported:
+                return
+            telemetry.retries += retries
+            telemetry.queue_wait = queue_wait
+            telemetry_stats.record(telemetry)
+            last_reported = telemetry
+
+        async def scheduled_send(text):
+            """
+            Sends a turn once quota allows, retrying quota errors with short backoffs or on the fallback model.
+            The turn budget starts with each admitted attempt, so quota waits do not use it up.
+            """
+            turn_budget = getattr(config, 'LLM_TURN_DEADLINE', 0)
+            if not llm_client.has_request_quota():
+                start_turn_deadline(turn_budget)
+                response_text = await llm_client.send_message(text)
+                report_turn()
+                return response_text
+            max_retries = getattr(config, 'LLM_MAX_RETRIES', 3)
+            queue_wait = 0.0
+            for attempt in range(1, max_retries + 1):
+                model = scheduler.pick_model(estimated_tokens)
+                if model != getattr(llm_client, 'model_name', model):
+                    log_queue.put({'type': 'status', 'text': f"🔀 Switching to model '{model}' while quota recovers..."})
+                    await llm_client.switch_model(model)
+                queue_wait += await scheduler.acquire(model, estimated_tokens)
+                start_turn_deadline(turn_budget)
+                try:
+                    response_text = await llm_client.send_message(text)
+                except Exception as e:
+                    if not is_rate_limit_error(e):
+                        raise
+                    delay = scheduler.throttled(model, attempt, retry_after_seconds(e))
+                    log_queue.put({'type': 'status', 'text': f"❌ Rate limit hit on '{model}'! Retry {attempt}/{max_retries} (blocked for {delay:.1f}s)"})
+                    continue
+                record_turn_usage(model)
+                report_turn(attempt - 1, queue_wait)
+                return response_text
+
+            log_queue.put({'type': 'status', 'text': f"❌ Failed after {max_retries} retries, skipping message"})
+            return None
+
         # Handle optional greeting on start
         greet_on_start = getattr(config, 'GREET_ON_START', False)
-        if greet_on_start:
-            log_queue.put({'type': 'status', 'text': '🤖 Generating initial greeting...'})
+        if greet_on_start and not session:
             try:
                 greeting_trigger = getattr(config, 'GREETING_TRIGGER_TEXT', 'Greet the user shortly.')
-                response_text = await llm_client.send_message(greeting_trigger)
-                log_queue.put({'type': 'ai', 'text': response_text})
-
-                # Parse response into segments based on style tags
-                segments = parse_llm_response(response_text)
-
-                # Send to response queue for TTS synthesis
-                for style, segment_text in segments:
-                    clean_text = strip_markdown(segment_text)
-                    response_queue.put((style, clean_text))
+                response_text = response_cache.get(greeting_trigger)
+                if response_text is not None:
+                    llm_client.record_exchange(greeting_trigger, response_text)
+                else:
+                    log_queue.put({'type': 'status', 'text': '🤖 Generating initial greeting...'})
+                    response_text = await scheduled_send(greeting_trigger)
+                    if response_text is not None:
+                        response_cache.put(greeting_trigger, response_text)
+                if response_text is not None:
+                    emit_response(response_text, log_queue, response_queue)
+                    last_response = response_text
+                    checkpoint()
             except Exception as e:
                 log_queue.put({'type': 'status', 'text': f"❌ Error generating startup greeting: {e}"})
 
-        last_request_time = time.time() if greet_on_start else 0
-        min_interval = 5.0  # 5 seconds between requests
-
-        while True:
-            text = await asyncio.to_thread(text_queue.get)
+        speculative = getattr(config, 'LLM_SPECULATIVE', False) and llm_client.supports_speculation()
+        speculator = SpeculativeGenerator(llm_client, log_queue)
 
-            if not text.strip():
-                continue
+        async def handle_turn(text):
+            """Answers one (possibly merged) user turn and queues the response for TTS."""
+            nonlocal last_response
+            turn_epoch = epoch
 
-            # Rate limiting
-            elapsed = time.time() - last_request_time
-            if elapsed < min_interval:
-                wait_time = min_interval - elapsed
-                log_queue.put({'type': 'status', 'text': f"⏱️  Rate limiting: waiting {wait_time:.1f}s..."})
-                await asyncio.sleep(wait_time)
+            # Answer replay requests and cached utterances without the model
+            if last_response and normalize_transcript(text) in replay_phrases:
+                speculator.cancel("answered locally")
+                emit_response(last_response, log_queue, response_queue, turn_epoch)
+                return
 
-            # Retry logic
-            max_retries = 3
-            retry_count = 0
+            cached_response = response_cache.get(text)
+            if cached_response is not None:
+                speculator.cancel("answered locally")
+                llm_client.record_exchange(text, cached_response)
+                emit_response(cached_response, log_queue, response_queue, turn_epoch)
+                last_response = cached_response
+                return
 
-            while retry_count < max_retries:
+            response_text = await speculator.resolve(text)
+            if response_text is not None:
+                record_turn_usage(scheduler.primary_model)
+                report_turn()
+            else:
                 try:
-                    response_text = await llm_client.send_message(text)
-                    log_queue.put({'type': 'ai', 'text': response_text})
+                    response_text = await scheduled_send(text)
+                except Exception as e:
+                    log_queue.put({'type': 'status', 'text': f"❌ Error with TTT: {e}"})
+                    log_queue.put({'type': 'status', 'text': "Skipping this message..."})
+                    return
+                if response_text is None:
+                    return
 
-                    # Parse response into segments based on style tags
-                    segments = parse_llm_response(response_text)
+            response_cache.put(text, response_text)
+            emit_response(response_text, log_queue, response_queue, turn_epoch)
+            last_response = response_text
 
-                    # Send to response queue for TTS synthesis
-                    for style, segment_text in segments:
-                        clean_text = strip_markdown(segment_text)
-                        response_queue.put((style, clean_text))
+        # Barge-in: abort the turn in flight (model request and pending tool calls)
+        # and tell TTS to drop every segment of earlier turns
+        epoch = 0
 
-                    last_request_time = time.time()
-                    break
+        def cancel_turn():
+            nonlocal epoch
+            epoch += 1
+            speculator.cancel("barge-in")
+            if current_turn is not None and not current_turn.done():
+                current_turn.cancel()
+                log_queue.put({'type': 'status', 'text': "🛑 Barge-in: cancelled the response in progress"})
+            if control_queue is not None:
+                control_queue.put({'command': 'epoch', 'value': epoch})
 
-                except exceptions.ResourceExhausted as e:
-                    retry_count += 1
-                    wait_time = 60 * (2 ** (retry_count - 1))  # Exponential backoff: 60s, 120s, 240s
-                    log_queue.put({'type': 'status', 'text': f"❌ Rate limit hit! Retry {retry_count}/{max_retries}"})
-                    log_queue.put({'type': 'status', 'text': f"⏱️  Waiting {wait_time}s before retrying..."})
-                    await asyncio.sleep(wait_time)
+        # Read the multiprocessing queue in the background so utterances arriving
+        # while a turn is in flight can be merged into it
+        inbox = asyncio.Queue()
 
-                except Exception as e:
-                    log_queue.put({'type': 'status', 'text': f"❌ Error with TTT: {e}"})
-                    log_queue.put({'type': 'status', 'text': "Skipping this message..."})
-                    break
+        async def pump_text_queue():
+            while True:
+                try:
+                    message = await asyncio.to_thread(text_queue.get, True, config.QUEUE_TIMEOUT)
+                except queue.Empty:
+                    continue
+                # Provisional transcript from STT: start generating ahead of the final one (only if quota is free)
+                if isinstance(message, dict):
+                    if message.get('type') == 'cancel':
+                        cancel_turn()
+                        continue
+                    idle = current_turn is None or current_turn.done()
+                    if (message.get('type') == 'speculative' and speculative and idle
+                            and scheduler.try_acquire(scheduler.primary_model, estimated_tokens)):
+                        speculator.start(message['text'])
+                    continue
+                if message.strip():
+                    inbox.put_nowait(message)
+
+        current_turn = None
+        pump_task = asyncio.create_task(pump_text_queue())
+        coalesce_window = getattr(config, 'LLM_COALESCE_WINDOW', 0.0)
+        cancel_inflight = getattr(config, 'LLM_COALESCE_CANCEL_INFLIGHT', False)
+        pending = []
+
+        try:
+            while True:
+                # Take the next utterance plus everything queued behind it (or arriving within the window)
+                if not pending:
+                    pending.append(await inbox.get())
+                while True:
+                    try:
+                        pending.append(await asyncio.wait_for(inbox.get(), coalesce_window) if coalesce_window > 0 else inbox.get_nowait())
+                    except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                        break
+                if len(pending) > 1:
+                    log_queue.put({'type': 'status', 'text': f"🧩 Merged {len(pending)} utterances into one turn"})
+                text = " ".join(pending)
+                pending = []
+
+                turn_mutated = False
+                turn = current_turn = asyncio.create_task(handle_turn(text))
+                started_epoch = epoch
+                while not turn.done():
+                    next_message = asyncio.create_task(inbox.get())
+                    await asyncio.wait({turn, next_message}, return_when=asyncio.FIRST_COMPLETED)
+                    if not next_message.done():
+                        next_message.cancel()
+                        continue
+                    pending.append(next_message.result())
+                    if cancel_inflight and not turn.done() and started_epoch == epoch and turn_mutated:
+                        # Restarting would discard a tool exchange that already changed state and run it again
+                        log_queue.put({'type': 'status', 'text': "✋ New utterance arrived after an action was taken, answering it next"})
+                    elif cancel_inflight and not turn.done() and started_epoch == epoch:
+                        # The user kept talking: restart the turn with the merged text
+                        turn.cancel()
+                        log_queue.put({'type': 'status', 'text': "✋ New utterance arrived, restarting the turn with merged text"})
+                        pending.insert(0, text)
+                        await asyncio.gather(turn, return_exceptions=True)
+                        break
+                if turn.done() and not turn.cancelled():
+                    if turn.exception():
+                        log_queue.put({'type': 'status', 'text': f"❌ Error with TTT: {turn.exception()}"})
+                    else:
+                        turns += 1
+                        checkpoint()
+        finally:
+            pump_task.cancel()
 
-            if retry_count >= max_retries:
-                log_queue.put({'type': 'status', 'text': f"❌ Failed after {max_retries} retries, skipping message"})
-                
     finally:
+        if catalog_task is not None:
+            catalog_task.cancel()
+        if prefetcher is not None:
+            await prefetcher.stop()
+        if llm_client is not None:
+            # A persisted session keeps referring to the context cache, so it must outlive this process
+            await llm_client.close(keep_state=session_store is not None)
         await mcp_manager.close()
@@ -0,0 +1,155 @@
+import re
+import time
+import random
+import asyncio
+from google.api_core import exceptions
+
+from mindmirror import config
+
+RETRY_DELAY_RE = re.compile(r"retry(?:Delay|[-_ ]after)['\"]?\s*[:=]?\s*['\"]?(\d+(?:\.\d+)?)\s*s?", re.IGNORECASE)
+
+
+def is_rate_limit_error(e: Exception) -> bool:
+    """True for quota errors from both the GenAI SDK (HTTP 429) and google-api-core."""
+    if isinstance(e, exceptions.ResourceExhausted):
+        return True
+    return getattr(e, "code", None) == 429 or getattr(e, "status", None) == "RESOURCE_EXHAUSTED"
+
+
+def retry_after_seconds(e: Exception) -> float | None:
+    """Extracts a server retry hint (Retry-After header or RetryInfo.retryDelay) from a quota error."""
+    response = getattr(e, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            pass
+    match = RETRY_DELAY_RE.search(str(getattr(e, "details", None) or e))
+    return float(match.group(1)) if match else None
+
+
+class TokenBucket:
+    """Classic token bucket; the level may go negative to carry debt from underestimated requests."""
+    def __init__(self, capacity: float, per_seconds: float = 60.0):
+        self.capacity = capacity
+        self.rate = capacity / per_seconds
+        self.level = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` can be taken (0 if available now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.level -= amount
+
+    def give(self, amount: float):
+        """Returns quota that was taken but not used."""
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RequestScheduler:
+    """
+    Quota-aware admission control for LLM requests.
+    Keeps requests/min and tokens/min buckets per model, honours server retry hints,
+    backs off with short jittered delays and optionally fails over to a secondary
+    model while the primary one is throttled.
+    """
+    def __init__(self, primary_model: str, fallback_model: str = None, log_queue=None):
+        self.primary_model = primary_model
+        self.fallback_model = fallback_model if fallback_model != primary_model else None
+        self.log_queue = log_queue
+
+        self.request_buckets = {}
+        self.token_buckets = {}
+        self.blocked_until = {}
+        for model in filter(None, (self.primary_model, self.fallback_model)):
+            self._track(model)
+
+        self.last_wait = 0.0
+        self.total_wait = 0.0
+
+    def _track(self, model: str):
+        self.request_buckets[model] = TokenBucket(config.LLM_REQUESTS_PER_MINUTE)
+        self.token_buckets[model] = TokenBucket(config.LLM_TOKENS_PER_MINUTE)
+        self.blocked_until[model] = 0.0
+
+    def wait_time(self, model: str, tokens: int = 0) -> float:
+        """Seconds a request for `model` would currently have to wait."""
+        return max(
+            self.blocked_until[model] - time.monotonic(),
+            self.request_buckets[model].wait_time(1),
+            self.token_buckets[model].wait_time(tokens),
+            0.0
+        )
+
+    def pick_model(self, tokens: int = 0) -> str:
+        """Returns the primary model unless the fallback is available sooner."""
+        if self.fallback_model and self.wait_time(self.fallback_model, tokens) < self.wait_time(self.primary_model, tokens):
+            return self.fallback_model
+        return self.primary_model
+
+    def try_acquire(self, model: str, tokens: int = 0) -> bool:
+        """Takes quota only if no wait is needed (used for optional requests like speculation)."""
+        if self.wait_time(model, tokens) > 0:
+            return False
+        self.request_buckets[model].take(1)
+        self.token_buckets[model].take(tokens)
+        return True
+
+    async def acquire(self, model: str, tokens: int = 0) -> float:
+        """Waits until quota for one request of `tokens` is available, takes it and returns the wait."""
+        start = time.monotonic()
+        while True:
+            wait = self.wait_time(model, tokens)
+            if wait <= 0:
+                break
+            if self.log_queue:
+                self.log_queue.put({'type': 'status', 'text': f"⏱️  Rate limiting ({model}): waiting {wait:.1f}s..."})
+            await asyncio.sleep(wait)
+        self.request_buckets[model].take(1)
+        self.token_buckets[model].take(tokens)
+
+        self.last_wait = time.monotonic() - start
+        self.total_wait += self.last_wait
+        if self.log_queue and self.last_wait > 0:
+            self.log_queue.put({'type': 'debug', 'text': f"Scheduler wait: {self.last_wait:.2f}s (total {self.total_wait:.1f}s)"})
+        return self.last_wait
+
+    def record_usage(self, model: str, requests: int, tokens: int, estimated_tokens: int = 0, admitted: bool = True):
+        """
+        Charges requests/tokens that were not known up front (tool rounds, real token counts) to the
+        model that served them. `admitted` is False for a model the turn used without being admitted
+        on it (lite route, router classifier), so none of its requests were taken yet.
+        """
+        if model not in self.request_buckets:
+            self._track(model)
+        if admitted and requests == 0:
+            # Admitted here, but the turn was served by another model
+            self.request_buckets[model].give(1)
+            self.token_buckets[model].give(estimated_tokens)
+            return
+        taken = 1 if admitted else 0
+        if requests > taken:
+            self.request_buckets[model].take(requests - taken)
+        if tokens > estimated_tokens:
+            self.token_buckets[model].take(tokens - estimated_tokens)
+
+    def throttled(self, model: str, attempt: int, retry_after: float = None) -> float:
+        """Blocks `model` after a quota error, using the server hint or a short jittered backoff."""
+        if retry_after is None:
+            delay = min(config.LLM_BACKOFF_BASE * (2 ** (attempt - 1)), config.LLM_BACKOFF_MAX)
+            retry_after = delay * random.uniform(0.5, 1.5)
+        self.blocked_until[model] = time.monotonic() + retry_after
+        return retry_after
@@ -0,0 +1,151 @@
+import os
+import json
+import time
+import hashlib
+
+from mindmirror import config
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def catalog_version(tools: list[dict]) -> str:
+    """Stable hash of a tool catalog (names and schemas)."""
+    return hashlib.sha1(_dumps(sorted(tools, key=lambda t: t["name"])).encode("utf-8")).hexdigest()[:12]
+
+
+class SessionStore:
+    """
+    Checkpoints conversation state so a restarted TTT process resumes the session instead of
+    re-running tool discovery and the greeting.
+    State is written incrementally to an append-only journal (one compact JSON record per line):
+    new history contents are appended, a replaced history (summary) is written whole, and
+    metadata (tool catalog, counters, engine extras) is updated per checkpoint. Every
+    LLM_SESSION_SNAPSHOT_EVERY records the state is folded into a snapshot and the journal restarts.
+    """
+    def __init__(self, system_prompt: str, client: str = None, path: str = None, log_queue=None):
+        self.dir = path or config.LLM_SESSION_PATH
+        self.snapshot_path = os.path.join(self.dir, "snapshot.json")
+        self.journal_path = os.path.join(self.dir, "journal.jsonl")
+        self.log_queue = log_queue
+
+        self.prompt_hash = hashlib.sha1(system_prompt.encode("utf-8")).hexdigest()[:12]
+        self.client = client  # Engine class name: each engine persists history in its own format
+        self.history = []   # History contents as persisted so far
+        self.meta = {}
+        self.journal_records = 0
+        self.torn = False
+
+    def _log(self, msg_type: str, text: str):
+        if self.log_queue:
+            self.log_queue.put({"type": msg_type, "text": text})
+
+    # --- LOADING ---
+
+    def load(self) -> dict | None:
+        """
+        Rebuilds the last session from snapshot and journal. Returns {"history": [...], **meta},
+        or None if there is no usable session (missing, for another system prompt or engine, or too old).
+        """
+        start_t = time.perf_counter()
+        try:
+            if os.path.exists(self.snapshot_path):
+                with open(self.snapshot_path, "r") as f:
+                    snapshot = json.load(f)
+                self.history = snapshot.get("history", [])
+                self.meta = snapshot.get("meta", {})
+            if os.path.exists(self.journal_path):
+                with open(self.journal_path, "r") as f:
+                    for line in f:
+                        try:
+                            self._apply(json.loads(line))
+                        except json.JSONDecodeError:
+                            self.torn = True  # Torn last line after a crash: everything before it is valid
+                            break
+                        self.journal_records += 1
+        except Exception as e:
+            self._log("debug", f"Session state could not be loaded: {e}")
+            self.reset()
+            return None
+
+        if not self.meta:
+            return None
+        age = time.time() - self.meta.get("updated_at", 0)
+        if (self.meta.get("prompt_hash") != self.prompt_hash or self.meta.get("client") != self.client
+                or age > config.LLM_SESSION_MAX_AGE):
+            self._log("debug", "Stored session is stale or belongs to another system prompt or engine, starting fresh.")
+            self.reset()
+            return None
+        if self.torn:
+            self._snapshot()
+
+        self._log("info", f"♻️  Resumed session: {len(self.history)} history contents, "
+                          f"{self.meta.get('turns', 0)} turns, loaded in {(time.perf_counter() - start_t) * 1000:.1f}ms.")
+        return {"history": list(self.history), **self.meta}
+
+    def _apply(self, record: dict):
+        op = record.get("op")
+        if op == "append":
+            self.history.extend(record["contents"])
+        elif op == "replace":
+            self.history = record["contents"]
+        elif op == "meta":
+            self.meta.update(record["meta"])
+
+    # --- WRITING ---
+
+    def checkpoint(self, history: list[dict], **meta):
+        """Journals the difference between the given state and what is already persisted."""
+        records = []
+        if history[:len(self.history)] == self.history:
+            if len(history) > len(self.history):
+                records.append({"op": "append", "contents": history[len(self.history):]})
+        else:
+            records.append({"op": "replace", "contents": history})
+
+        # Only changed metadata is journaled (the tool catalog is written once, not per turn)
+        meta = {k: v for k, v in {**meta, "prompt_hash": self.prompt_hash, "client": self.client}.items() if self.meta.get(k) != v}
+        meta["updated_at"] = time.time()
+        records.append({"op": "meta", "meta": meta})
+
+        for record in records:
+            self._apply(record)
+        try:
+            if self.journal_records + len(records) > config.LLM_SESSION_SNAPSHOT_EVERY:
+                self._snapshot()
+            else:
+                self._append(records)
+        except Exception as e:
+            self._log("debug", f"Session checkpoint failed: {e}")
+
+    def _append(self, records: list[dict]):
+        os.makedirs(self.dir, exist_ok=True)
+        with open(self.journal_path, "a") as f:
+            f.write("".join(_dumps(record) + "\n" for record in records))
+            f.flush()
+            os.fsync(f.fileno())
+        self.journal_records += len(records)
+
+    def _snapshot(self):
+        """Writes the full state atomically and starts a new journal."""
+        os.makedirs(self.dir, exist_ok=True)
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(_dumps({"history": self.history, "meta": self.meta}))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        open(self.journal_path, "w").close()
+        self.journal_records = 0
+
+    def reset(self):
+        """Forgets the stored session."""
+        self.history = []
+        self.meta = {}
+        self.journal_records = 0
+        for path in (self.snapshot_path, self.journal_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,99 @@
+import time
+import asyncio
+
+from mindmirror import config
+from mindmirror.llm.interface import MutatingToolRequested
+from mindmirror.llm.deadline import start_turn_deadline
+from mindmirror.llm.response_cache import normalize_transcript
+
+
+class SpeculativeGenerator:
+    """
+    Starts LLM generation on a stable provisional transcript before the final transcript arrives.
+    The result is committed if the final transcript matches and discarded otherwise.
+    Commit/abort counts and the head start gained by committed turns are tracked and logged.
+    """
+    def __init__(self, llm_client, log_queue):
+        self.llm_client = llm_client
+        self.log_queue = log_queue
+
+        self.task = None
+        self.normalized = None
+        self.started_at = 0.0
+        self.finished_at = None
+
+        self.commits = 0
+        self.aborts = 0
+        self.saved_seconds = 0.0
+
+    async def _generate(self, text: str) -> str:
+        # Same budget as a regular turn; the deadline lives in this task's context only
+        start_turn_deadline(config.LLM_TURN_DEADLINE)
+        response_text = await self.llm_client.speculate(text)
+        self.finished_at = time.time()
+        return response_text
+
+    def start(self, text: str):
+        """Starts a speculative generation, superseding a running one for a different text."""
+        normalized = normalize_transcript(text)
+        if not normalized or (self.task and normalized == self.normalized):
+            return
+        self.cancel("partial transcript changed")
+
+        self.normalized = normalized
+        self.started_at = time.time()
+        self.finished_at = None
+        self.task = asyncio.create_task(self._generate(text))
+        self.log_queue.put({'type': 'debug', 'text': f"🔮 Speculating on: '{text}'"})
+
+    def cancel(self, reason: str):
+        """Cancels and discards the running speculation, if any."""
+        if not self.task:
+            return
+        self.task.cancel()
+        self.task = None
+        self.llm_client.discard_speculation()
+        self._record_abort(reason)
+
+    async def resolve(self, final_text: str) -> str | None:
+        """
+        Returns the speculative response if it was generated for the final transcript,
+        committing it to the conversation. Returns None if the caller must generate normally.
+        """
+        if not self.task:
+            return None
+        if normalize_transcript(final_text) != self.normalized:
+            self.cancel("final transcript differs")
+            return None
+
+        arrived_at = time.time()
+        task, self.task = self.task, None
+        try:
+            response_text = await task
+        except MutatingToolRequested as e:
+            self.llm_client.discard_speculation()
+            self._record_abort(f"needs mutating tool '{e.tool_name}'")
+            return None
+        except Exception as e:
+            self.llm_client.discard_speculation()
+            self._record_abort(f"error: {e}")
+            return None
+
+        self.llm_client.commit_speculation()
+        self.commits += 1
+        saved = min(arrived_at, self.finished_at or arrived_at) - self.started_at
+        self.saved_seconds += saved
+        self._log_outcome(f"committed (head start {saved:.2f}s)")
+        return response_text
+
+    def _record_abort(self, reason: str):
+        self.aborts += 1
+        self._log_outcome(f"aborted ({reason})")
+
+    def _log_outcome(self, outcome: str):
+        total = self.commits + self.aborts
+        self.log_queue.put({
+            'type': 'debug',
+            'text': f"🔮 Speculation {outcome} | commit rate {self.commits}/{total}, "
+                    f"total head start {self.saved_seconds:.1f}s"
+        })
@@ -0,0 +1,97 @@
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field, asdict
+
+
+@dataclass
+class TurnTelemetry:
+    """Timing and token accounting of one LLM turn, emitted as a typed event on the log queue."""
+    model: str
+    route: str = "full"
+    source: str = "model"          # "model" or "speculation"
+    started_at: float = field(default_factory=time.time)
+    ttfb: float | None = None      # Seconds until the first model response arrived
+    total_time: float = 0.0        # Seconds for the whole turn, tool rounds included
+    queue_wait: float = 0.0        # Seconds waited for request quota
+    requests: int = 0
+    prompt_tokens: int = 0         # Summed over all requests of the turn
+    output_tokens: int = 0
+    cached_tokens: int = 0
+    tool_rounds: int = 0
+    tool_calls: list = field(default_factory=list)  # [tool name, seconds] per call
+    retries: int = 0
+
+    @property
+    def tool_time(self) -> float:
+        return sum(seconds for _, seconds in self.tool_calls)
+
+    def record_usage(self, usage):
+        """Adds the token counts of one response's usage metadata."""
+        self.requests += 1
+        if usage is None:
+            return
+        self.prompt_tokens += getattr(usage, "prompt_token_count", None) or 0
+        self.output_tokens += getattr(usage, "candidates_token_count", None) or 0
+        self.cached_tokens += getattr(usage, "cached_content_token_count", None) or 0
+
+    def to_event(self) -> dict:
+        return {"type": "telemetry", "event": "llm_turn", "data": asdict(self), "text": self.describe()}
+
+    def describe(self) -> str:
+        ttfb = f"{self.ttfb:.2f}s" if self.ttfb is not None else "n/a"
+        tools = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.tool_calls)
+        return (
+            f"{self.model} [{self.route}/{self.source}] TTFB {ttfb}, total {self.total_time:.2f}s, "
+            f"wait {self.queue_wait:.2f}s | tokens in {self.prompt_tokens} (cached {self.cached_tokens}), "
+            f"out {self.output_tokens} | {self.tool_rounds} tool rounds{f' ({tools})' if tools else ''}, "
+            f"{self.retries} retries"
+        )
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class TelemetryAggregator:
+    """
+    Keeps the telemetry of the most recent turns and reports rolling percentiles,
+    showing where turn latency goes (first response, tools, quota waits).
+    """
+    METRICS = ("ttfb", "total_time", "tool_time", "queue_wait")
+    PERCENTILES = (50, 90, 99)
+
+    def __init__(self, window: int = 50, log_queue=None):
+        self.turns = deque(maxlen=window)
+        self.log_queue = log_queue
+
+    def record(self, telemetry: TurnTelemetry):
+        """Stores a finished turn and emits its event plus the updated percentiles."""
+        self.turns.append(telemetry)
+        if self.log_queue:
+            self.log_queue.put(telemetry.to_event())
+            self.log_queue.put({
+                "type": "telemetry",
+                "event": "llm_percentiles",
+                "data": self.percentiles(),
+                "text": self.describe()
+            })
+
+    def percentiles(self) -> dict:
+        """Returns {metric: {"p50": ..., "p90": ..., "p99": ...}} over the window."""
+        stats = {}
+        for metric in self.METRICS:
+            values = [getattr(t, metric) for t in self.turns if getattr(t, metric) is not None]
+            if values:
+                stats[metric] = {f"p{p}": percentile(values, p) for p in self.PERCENTILES}
+        return stats
+
+    def describe(self) -> str:
+        parts = [
+            f"{metric} " + "/".join(f"{value:.2f}" for value in stats.values())
+            for metric, stats in self.percentiles().items()
+        ]
+        return f"last {len(self.turns)} turns p50/p90/p99 (s): " + " | ".join(parts)
@@ -0,0 +1,179 @@
+import json
+from collections import Counter, OrderedDict
+
+from mindmirror import config
+
+CHARS_PER_TOKEN = 4
+RESULT_PAGE_TOOL = "get_tool_result_page"
+MAX_COUNTED_VALUES = 8  # String fields with more distinct values are not summarized as counts
+
+RESULT_PAGE_TOOL_SPEC = {
+    "name": RESULT_PAGE_TOOL,
+    "description": (
+        "Fetch part of a tool result that was shortened before it reached you. "
+        "Pass the 'result_handle' from the shortened result; for lists, offset and limit select items."
+    ),
+    "inputSchema": {
+        "type": "object",
+        "properties": {
+            "result_handle": {"type": "string"},
+            "offset": {"type": "integer"},
+            "limit": {"type": "integer"}
+        },
+        "required": ["result_handle"]
+    }
+}
+
+
+def estimate_text_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN
+
+
+def parse_json_values(text: str):
+    """
+    Parses a tool result as JSON. MCP servers may return one text block per list item,
+    which arrive newline-joined, so a sequence of JSON values is returned as a list.
+    Returns None if the text is not JSON.
+    """
+    decoder = json.JSONDecoder()
+    values = []
+    pos = 0
+    text = text.strip()
+    while pos < len(text):
+        try:
+            value, end = decoder.raw_decode(text, pos)
+        except json.JSONDecodeError:
+            return None
+        values.append(value)
+        pos = end
+        while pos < len(text) and text[pos].isspace():
+            pos += 1
+    if not values:
+        return None
+    return values[0] if len(values) == 1 else values
+
+
+def project(value, fields: list[str]):
+    """Keeps only the given fields of a dict, or of every dict in a list."""
+    if isinstance(value, list):
+        return [project(item, fields) for item in value]
+    if isinstance(value, dict):
+        return {k: v for k, v in value.items() if k in fields}
+    return value
+
+
+def summarize_array(items: list, top_n: int) -> dict:
+    """Replaces a long list by its length, value counts of categorical fields and the top-N items."""
+    summary = {"count": len(items)}
+    records = [item for item in items if isinstance(item, dict)]
+
+    counts = {}
+    for key in (records[0].keys() if records else []):
+        values = [r.get(key) for r in records]
+        if all(isinstance(v, str) for v in values):
+            counter = Counter(values)
+            if 1 < len(counter) <= MAX_COUNTED_VALUES:
+                counts[key] = dict(counter.most_common())
+    if counts:
+        summary["counts_by"] = counts
+
+    rank_field = next((f for f in config.LLM_TOOL_RESULT_RANK_FIELDS
+                       if records and all(isinstance(r.get(f), (int, float)) for r in records)), None)
+    if rank_field:
+        summary["top_by"] = rank_field
+        summary["top"] = sorted(records, key=lambda r: r[rank_field], reverse=True)[:top_n]
+    else:
+        summary["first"] = items[:top_n]
+    return summary
+
+
+class ToolResultCompactor:
+    """
+    Enforces per-tool size budgets on tool results before they reach the model.
+    Oversized results are projected to their relevant fields, long arrays are summarized
+    with counts and top-N items, and anything still too large is truncated. The full
+    payload stays available through a result handle and the get_tool_result_page tool.
+    """
+    def __init__(self, log_queue=None, max_handles: int = 20):
+        self.log_queue = log_queue
+        self.max_handles = max_handles
+        self.payloads = OrderedDict()  # handle -> (tool name, parsed payload or raw text)
+        self.next_handle = 1
+
+    def budget_for(self, name: str) -> int:
+        return config.LLM_TOOL_RESULT_BUDGETS.get(name, config.LLM_TOOL_RESULT_BUDGET)
+
+    def _store(self, name: str, payload) -> str:
+        handle = f"res_{self.next_handle}"
+        self.next_handle += 1
+        self.payloads[handle] = (name, payload)
+        while len(self.payloads) > self.max_handles:
+            self.payloads.popitem(last=False)
+        return handle
+
+    def compact(self, name: str, result) -> str:
+        """Returns the result unchanged if it fits its budget, otherwise a compacted JSON string."""
+        if not isinstance(result, str):
+            result = json.dumps(result, ensure_ascii=False, default=str)
+        budget = self.budget_for(name)
+        before = estimate_text_tokens(result)
+        if before <= budget:
+            return result
+
+        payload = parse_json_values(result)
+        handle = self._store(name, payload if payload is not None else result)
+        steps = []
+
+        if payload is None:
+            compacted = {"text": result[:budget * CHARS_PER_TOKEN]}
+            steps.append("truncated")
+        else:
+            compacted = payload
+            fields = config.LLM_TOOL_RESULT_FIELDS.get(name)
+            if fields:
+                compacted = project(compacted, fields)
+                steps.append("projected")
+            if isinstance(compacted, list) and self._size(compacted) > budget:
+                compacted = summarize_array(compacted, config.LLM_TOOL_RESULT_TOP_N)
+                steps.append("summarized")
+            if self._size(compacted) > budget:
+                text = json.dumps(compacted, ensure_ascii=False, default=str)
+                compacted = {"partial_json": text[:budget * CHARS_PER_TOKEN]}
+                steps.append("truncated")
+            compacted = {"data": compacted}
+
+        compacted["result_handle"] = handle
+        compacted["note"] = f"Result shortened ({', '.join(steps)}). Call {RESULT_PAGE_TOOL} with this handle for the full data."
+        text = json.dumps(compacted, ensure_ascii=False, default=str)
+
+        if self.log_queue:
+            self.log_queue.put({
+                'type': 'debug',
+                'text': f"🗜️  Compacted '{name}': ≈{before} → ≈{estimate_text_tokens(text)} tokens ({', '.join(steps)}, handle {handle})"
+            })
+        return text
+
+    def page(self, args: dict) -> str:
+        """Serves (part of) a stored full payload for the get_tool_result_page tool."""
+        handle = args.get("result_handle")
+        if handle not in self.payloads:
+            return json.dumps({"error": "Unknown or expired result handle", "result_handle": handle})
+        name, payload = self.payloads[handle]
+        offset = max(int(args.get("offset") or 0), 0)
+        limit = max(int(args.get("limit") or config.LLM_TOOL_RESULT_PAGE_SIZE), 1)
+
+        if isinstance(payload, list):
+            return json.dumps({
+                "tool": name, "total": len(payload), "offset": offset,
+                "items": payload[offset:offset + limit]
+            }, ensure_ascii=False, default=str)
+        text = payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False, default=str)
+        chars = self.budget_for(name) * CHARS_PER_TOKEN
+        return json.dumps({
+            "tool": name, "total_chars": len(text), "offset": offset,
+            "text": text[offset:offset + chars]
+        }, ensure_ascii=False)
+
+    @staticmethod
+    def _size(value) -> int:
+        return estimate_text_tokens(json.dumps(value, ensure_ascii=False, default=str))
@@ -0,0 +1,6 @@
+from mindmirror import config
+
+
+def is_read_only_tool(name: str) -> bool:
+    """Tools are treated as read-only (side-effect free) based on their name prefix."""
+    return name.startswith(tuple(getattr(config, 'LLM_READ_ONLY_TOOL_PREFIXES', ("get_",))))
@@ -13,6 +13,7 @@ from mindmirror.stt.local_whisper import LocalWhisperSTT
 from mindmirror.stt.aws_whisper import SageMakerWhisperSTT
 from mindmirror.stt.google import GoogleCloudSTT
 from mindmirror.llm.google.client import GeminiLLMClient
+from mindmirror.llm.local import LocalLLMClient
 from mindmirror.tts.pipervoice.tts import PiperTTS
 from mindmirror.tts.f5_tts.tts import F5TTS
 from mindmirror.tts.google import GoogleCloudTTS
@@ -139,9 +140,18 @@ def main():
     }
 
     # --- Text-To-Thought (TTT / LLM) Selection ---
+    # Choice A: Google Gemini (Remote, requires internet connection and credentials)
     ttt_class = GeminiLLMClient
     ttt_kwargs = {"model_name": config.GOOGLE_TTT_MODEL}
 
+    # Choice B: Local GGUF model via llama.cpp (CPU, works offline)
+    # ttt_class = LocalLLMClient
+    # ttt_kwargs = {
+    #     "model_path": config.LOCAL_LLM_MODEL_PATH,
+    #     "n_threads": config.LOCAL_LLM_THREADS,
+    #     "n_ctx": config.LOCAL_LLM_CONTEXT
+    # }
+
     # --- Text-To-Speech (TTS) Selection ---
     # Choice A: Piper TTS (Fast ONNX CPU synthesis)
     # tts_class = PiperTTS
@@ -162,7 +172,7 @@ def main():
     # 4. INITIALIZE QUEUES
     stt_queue = Queue()       # STT -> TTT
     ttt_queue = Queue()       # TTT -> TTS
-    control_queue = Queue()   # STT -> TTS (Volume/Stop)
+    control_queue = Queue()   # STT/TTT -> TTS (Volume/Stop/Turn epoch)
     log_queue = Queue()       # ALL -> Console UI
 
     log_queue.put({
@@ -179,7 +189,7 @@ def main():
     )
     p_ttt = Process(
         target=run_ttt_loop, 
-        args=(ttt_class, ttt_kwargs, SYSTEM_PROMPT, log_queue, stt_queue, ttt_queue), 
+        args=(ttt_class, ttt_kwargs, SYSTEM_PROMPT, log_queue, stt_queue, ttt_queue, control_queue), 
         daemon=True
     )
     p_tts = Process(
@@ -28,6 +28,7 @@ class GoogleCloudSTT(STTInterface):
         self.stream_queue = None
         self.stream_thread = None
         self.stream_result = None
+        self.stream_partial = ""
 
     def load_model(self) -> None:
         """Initializes regional SpeechClient and manages the Recognizer resource."""
@@ -87,6 +88,7 @@ class GoogleCloudSTT(STTInterface):
         """Starts a background worker thread to process dynamic audio streams."""
         self.stream_queue = queue.Queue()
         self.stream_result = []
+        self.stream_partial = ""
         
         def worker():
             try:
@@ -103,6 +105,9 @@ class GoogleCloudSTT(STTInterface):
                     )
                     streaming_config = cloud_speech.StreamingRecognitionConfig(
                         config=config_params,
+                        streaming_features=cloud_speech.StreamingRecognitionFeatures(
+                            interim_results=getattr(config, 'LLM_SPECULATIVE', False),
+                        ),
                     )
                     yield cloud_speech.StreamingRecognizeRequest(
                         recognizer=self.recognizer_path,
@@ -119,9 +124,15 @@ class GoogleCloudSTT(STTInterface):
                 # Consume streaming responses from API
                 responses = self.client.streaming_recognize(requests=request_generator())
                 for response in responses:
+                    interim = []
                     for result in response.results:
-                        if result.alternatives:
+                        if not result.alternatives:
+                            continue
+                        if result.is_final:
                             self.stream_result.append(result.alternatives[0].transcript)
+                        else:
+                            interim.append(result.alternatives[0].transcript)
+                    self.stream_partial = " ".join(interim).strip()
             except Exception as e:
                 if self.log_queue:
                     self.log_queue.put({'type': 'error', 'text': f"Google STT Stream Error: {e}"})
@@ -135,6 +146,12 @@ class GoogleCloudSTT(STTInterface):
             pcm_chunk = (chunk * 32768.0).astype(np.int16).tobytes()
             self.stream_queue.put(pcm_chunk)
 
+    def get_partial(self) -> str:
+        """Returns the final results so far plus the latest interim hypothesis."""
+        if self.stream_result is None:
+            return ""
+        return " ".join(self.stream_result + [self.stream_partial]).strip()
+
     def end_stream(self) -> str:
         """Sends sentinel, joins worker thread, and returns aggregated text results."""
         if self.stream_queue:
@@ -148,6 +165,7 @@ class GoogleCloudSTT(STTInterface):
         self.stream_queue = None
         self.stream_thread = None
         self.stream_result = None
+        self.stream_partial = ""
         
         return transcript if transcript else None
 
@@ -48,6 +48,12 @@ class STTInterface(ABC):
         """
         pass
 
+    def get_partial(self) -> str:
+        """
+        Returns the provisional transcript of the active streaming session so far (final plus interim results).
+        """
+        return ""
+
     def end_stream(self) -> str:
         """
         Finalises the active streaming recognition session and returns the transcribed text.
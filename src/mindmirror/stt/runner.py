@@ -7,7 +7,7 @@ from mindmirror.config import (
     COOLDOWN_DURATION, LOOP_SLEEP_TIME, QUEUE_TIMEOUT,
     INTERRUPT_ENERGY_MULTIPLIER, INTERRUPT_BASELINE_WINDOW, 
     INTERRUPT_RECORDING_DURATION, DUCK_VOLUME, INTERRUPT_KEYWORDS,
-    POST_PLAYBACK_COOLDOWN
+    POST_PLAYBACK_COOLDOWN, LLM_SPECULATIVE, SPECULATIVE_STABLE_DURATION
 )
 from mindmirror import audio
 from mindmirror.ui import meters
@@ -49,6 +49,11 @@ def run_stt_loop(stt_class, stt_kwargs, log_queue, selected_device, text_queue,
 
     last_log_time = [0.0]
 
+    # SPECULATION STATE (stable partial transcripts are forwarded before the final one)
+    last_partial = ""
+    partial_since = 0.0
+    partial_sent = False
+
     def audio_callback(indata, frames, pa_time, status):
         if status:
             status_str = str(status)
@@ -147,6 +152,8 @@ def run_stt_loop(stt_class, stt_kwargs, log_queue, selected_device, text_queue,
                             if has_keyword:
                                 log_queue.put({'type': 'status', 'text': f"🛑 Interruption confirmed! Stopping playback."})
                                 control_queue.put({'command': 'stop'})
+                                # Abort the LLM turn in flight; its output must not be spoken anymore
+                                text_queue.put({'type': 'cancel'})
                                 
                                 log_queue.put({'type': 'user', 'text': interrupt_text})
                                 text_queue.put(interrupt_text)
@@ -199,6 +206,18 @@ def run_stt_loop(stt_class, stt_kwargs, log_queue, selected_device, text_queue,
                 else:
                     silence_counter = 0
 
+                # Forward a partial transcript that stayed unchanged during a pause
+                if LLM_SPECULATIVE and getattr(stt_engine, 'is_streaming', lambda: False)():
+                    partial = stt_engine.get_partial()
+                    if partial != last_partial:
+                        last_partial = partial
+                        partial_since = time.time()
+                        partial_sent = False
+                    elif (partial and not partial_sent and silence_counter > 0
+                          and time.time() - partial_since >= SPECULATIVE_STABLE_DURATION):
+                        text_queue.put({'type': 'speculative', 'text': partial})
+                        partial_sent = True
+
                 if silence_counter > required_silence_chunks:
                     if len(buffer) * CHUNK_DURATION > MIN_AUDIO_LENGTH:
                         log_queue.put({'type': 'status', 'text': "⏳ Transcribing..."})
@@ -216,3 +235,4 @@ def run_stt_loop(stt_class, stt_kwargs, log_queue, selected_device, text_queue,
                             stt_engine.end_stream()
 
                     buffer = []; is_speaking = False; silence_counter = 0
+                    last_partial = ""; partial_sent = False
@@ -0,0 +1,62 @@
+from mindmirror.config import (
+    F5_BATCH_SIZE, F5_BATCH_MAX_PAD_RATIO, F5_NFE_STEPS, F5_NFE_ADAPTIVE, F5_NFE_MIN, F5_NFE_MAX,
+    F5_FIRST_AUDIO_BUDGET, F5_NFE_SAFETY
+)
+
+
+class BatchPlanner:
+    """
+    Decides how many upcoming sentence chunks F5 generates in one batched forward pass, and
+    with how many diffusion steps (NFE). Both decisions use an online cost model: seconds per
+    ODE step per padded mel frame, measured from every batch.
+
+    The time budget of the next batch is the audio already buffered for playback. For the first
+    chunk of a paragraph with nothing playing, the budget is F5_FIRST_AUDIO_BUDGET instead. With
+    F5_NFE_ADAPTIVE, the step count is the largest within F5_NFE_MIN..F5_NFE_MAX that fits the
+    budget (times F5_NFE_SAFETY), so synthesis stays ahead of playback. Quality only drops
+    when the headroom is short.
+
+    The first chunk of a paragraph always runs alone. After that, consecutive chunks of similar
+    length (longest/shortest within F5_BATCH_MAX_PAD_RATIO) are grouped up to F5_BATCH_SIZE,
+    as long as the batch still fits the budget at the chosen step count.
+    """
+    def __init__(self, max_batch: int = None, max_pad_ratio: float = None, nfe_steps: int = None):
+        self.max_batch = max_batch or F5_BATCH_SIZE
+        self.max_pad_ratio = max_pad_ratio or F5_BATCH_MAX_PAD_RATIO
+        self.nfe_steps = nfe_steps or F5_NFE_STEPS
+        self.step_cost = None  # Seconds per ODE step per padded mel frame (EMA)
+        self.adaptive = F5_NFE_ADAPTIVE  # Cleared while nothing plays against a deadline (phrase cache warm-up)
+
+    def plan(self, frames: list[int], headroom: float, first: bool) -> tuple[int, int]:
+        """Returns (number of chunks from the start of `frames`, NFE) for the next batch."""
+        if self.step_cost is None:
+            return 1, self.nfe_steps
+
+        budget = F5_NFE_SAFETY * (headroom if headroom > 0 or not first else F5_FIRST_AUDIO_BUDGET)
+        nfe = self.choose_nfe(frames[:1], budget)
+        if first:
+            return 1, nfe
+
+        n = 1
+        while n < min(self.max_batch, len(frames)):
+            group = frames[:n + 1]
+            if max(group) / min(group) > self.max_pad_ratio:
+                break
+            if self.predict(group, nfe) > budget:
+                break
+            n += 1
+        return n, nfe
+
+    def choose_nfe(self, frames: list[int], budget: float) -> int:
+        if not self.adaptive:
+            return self.nfe_steps
+        affordable = int(budget / (self.step_cost * max(frames) * len(frames)))
+        return max(F5_NFE_MIN, min(F5_NFE_MAX, affordable))
+
+    def predict(self, frames: list[int], nfe: int) -> float:
+        return self.step_cost * nfe * max(frames) * len(frames)
+
+    def record(self, frames: list[int], nfe: int, elapsed: float):
+        # `elapsed` covers the ODE solve and vocoding; both are attributed to the steps, which keeps predictions conservative
+        cost = elapsed / (nfe * max(frames) * len(frames))
+        self.step_cost = cost if self.step_cost is None else 0.7 * self.step_cost + 0.3 * cost
@@ -0,0 +1,190 @@
+import time
+import numpy as np
+import torch
+from torch.nn.utils.rnn import pad_sequence
+
+
+class StyleConditioning:
+    """
+    Reference conditioning of one F5 style, computed once at load time and kept on the model's
+    device: the reference mel spectrogram, its RMS and the tokenized reference text.
+    """
+    def __init__(self, name: str, mel, ref_audio_len: int, rms: float, ref_text: str, ref_tokens: list, max_chars: int):
+        self.name = name
+        self.mel = mel                        # (1, frames, n_mels) in the model's dtype
+        self.ref_audio_len = ref_audio_len    # Reference length in mel frames (hop-based, as in infer_batch_process)
+        self.rms = rms
+        self.ref_text = ref_text
+        self.ref_text_len = len(ref_text.encode("utf-8"))
+        self.ref_tokens = ref_tokens          # Vocab ids (or pinyin/char tokens if the model has no vocab map)
+        self.max_chars = max_chars
+
+
+def prepare_style(name: str, style: dict, model, device) -> StyleConditioning:
+    """Loads and preprocesses a style's reference audio exactly like infer_batch_process does per call."""
+    import torchaudio
+    from f5_tts.infer.utils_infer import target_sample_rate, target_rms, hop_length
+    from f5_tts.model.utils import convert_char_to_pinyin
+
+    audio, sr = torchaudio.load(style["ref_audio"])
+    ref_seconds = audio.shape[-1] / sr
+    max_chars = int(len(style["ref_text"].encode("utf-8")) / ref_seconds * (22 - ref_seconds) * style["speed"])
+
+    if audio.shape[0] > 1:
+        audio = torch.mean(audio, dim=0, keepdim=True)
+    rms = torch.sqrt(torch.mean(torch.square(audio))).item()
+    if rms < target_rms:
+        audio = audio * target_rms / rms
+    if sr != target_sample_rate:
+        audio = torchaudio.transforms.Resample(sr, target_sample_rate)(audio)
+    audio = audio.to(device)
+
+    with torch.inference_mode():
+        mel = model.mel_spec(audio).permute(0, 2, 1).to(next(model.parameters()).dtype)
+
+    ref_text = style["ref_text"]
+    if len(ref_text[-1].encode("utf-8")) == 1:
+        ref_text = ref_text + " "
+    ref_tokens = convert_char_to_pinyin([ref_text])[0]
+    if model.vocab_char_map is not None:
+        ref_tokens = [model.vocab_char_map.get(c, 0) for c in ref_tokens]
+
+    return StyleConditioning(name, mel, audio.shape[-1] // hop_length, rms, ref_text, ref_tokens, max_chars)
+
+
+def prepare_conditioning(styles: dict, model, device, log_queue) -> dict:
+    """Precomputes the conditioning of all styles. Styles that fail are left to the uncached path."""
+    start_t = time.time()
+    conditioning = {}
+    for name, style in styles.items():
+        try:
+            conditioning[name] = prepare_style(name, style, model, device)
+        except Exception as e:
+            log_queue.put({'type': 'error', 'text': f"Reference conditioning for '{name}' failed: {e}"})
+    log_queue.put({'type': 'info', 'text': f"Prepared reference conditioning for {len(conditioning)} styles in {time.time() - start_t:.2f}s."})
+    return conditioning
+
+
+def estimate_frames(cond: StyleConditioning, gen_text: str, speed: float) -> int:
+    """Total mel frames (reference + generated) F5 will sample for a text, as in infer_batch_process."""
+    gen_text_len = len(gen_text.encode("utf-8"))
+    local_speed = speed if gen_text_len >= 10 else 0.3
+    return cond.ref_audio_len + int(cond.ref_audio_len / cond.ref_text_len * gen_text_len / local_speed)
+
+
+def sample_batch(cond: StyleConditioning, texts: list[str], model, nfe_step: int, cfg_strength: float,
+                 speed: float, sway_sampling_coef: float = -1.0) -> list:
+    """
+    Generates the mels of several texts of one style in a single batched ODE solve: texts are
+    padded to the longest, each item keeps its own duration, and the reference mel is shared.
+    Returns one (1, n_mels, frames) mel per text without the reference part, in order.
+    """
+    from f5_tts.model.utils import convert_char_to_pinyin
+
+    device = cond.mel.device
+    durations = [estimate_frames(cond, text, speed) for text in texts]
+    gen_tokens = convert_char_to_pinyin(texts)
+    if model.vocab_char_map is not None:
+        tokens = [cond.ref_tokens + [model.vocab_char_map.get(c, 0) for c in t] for t in gen_tokens]
+        text = pad_sequence([torch.tensor(t, dtype=torch.long) for t in tokens], padding_value=-1, batch_first=True).to(device)
+    else:
+        tokens = [cond.ref_tokens + t for t in gen_tokens]
+        text = tokens
+
+    cond_frames = cond.mel.shape[1]
+    with torch.inference_mode():
+        generated, _ = model.sample(
+            cond=cond.mel.expand(len(texts), -1, -1),
+            text=text,
+            duration=durations[0] if len(texts) == 1 else torch.tensor(durations, dtype=torch.long, device=device),
+            steps=nfe_step,
+            cfg_strength=cfg_strength,
+            sway_sampling_coef=sway_sampling_coef,
+        )
+        generated = generated.to(torch.float32)
+
+    mels = []
+    for i, (duration, item_tokens) in enumerate(zip(durations, tokens)):
+        # sample() extends durations that are shorter than the text or the reference
+        end = max(max(len(item_tokens), cond_frames) + 1, duration)
+        mels.append(generated[i:i + 1, cond.ref_audio_len:end, :].permute(0, 2, 1))
+    return mels
+
+
+def decode(cond: StyleConditioning, mel, vocoder) -> np.ndarray:
+    """Vocodes a whole mel into a wave at the reference loudness."""
+    from f5_tts.infer.utils_infer import target_rms
+
+    with torch.inference_mode():
+        wave = vocoder.decode(mel)
+    if cond.rms < target_rms:
+        wave = wave * cond.rms / target_rms
+    return wave.squeeze().cpu().numpy()
+
+
+def vocode_stream(cond: StyleConditioning, mel, vocoder, window: int, overlap: int):
+    """
+    Vocodes a mel in windows of `window` frames and yields the wave incrementally. Each window
+    is decoded with `overlap` frames of context on both sides, and the context decoded past its
+    end is cross-faded into the next window, so window edges are inaudible. The concatenated
+    output has the length of decode(cond, mel, vocoder).
+    """
+    from f5_tts.infer.utils_infer import hop_length
+
+    frames = mel.shape[-1]
+    if frames <= window + overlap:
+        yield decode(cond, mel, vocoder)
+        return
+
+    tail = None
+    for start in range(0, frames, window):
+        end = min(start + window, frames)
+        lo, hi = max(start - overlap, 0), min(end + overlap, frames)
+        wave = decode(cond, mel[:, :, lo:hi], vocoder)
+
+        # Frame f is centered on sample (f - lo) * hop of this window
+        piece = wave[(start - lo) * hop_length:(end - lo) * hop_length]
+        if tail is not None:
+            n = min(len(tail), len(piece))
+            fade = np.linspace(0, 1, n, dtype=np.float32)
+            piece = np.concatenate([tail[:n] * (1 - fade) + piece[:n] * fade, piece[n:]])
+        tail = wave[(end - lo) * hop_length:]
+        yield piece
+
+
+def infer_batch(cond: StyleConditioning, texts: list[str], model, vocoder, nfe_step: int, cfg_strength: float,
+                speed: float, sway_sampling_coef: float = -1.0) -> list:
+    """Generates several texts of one style in a single batched ODE solve. Returns one wave per text, in order."""
+    mels = sample_batch(cond, texts, model, nfe_step, cfg_strength, speed, sway_sampling_coef)
+    return [decode(cond, mel, vocoder) for mel in mels]
+
+
+def cross_fade(waves: list, samples: int) -> np.ndarray:
+    """Joins waves with linear cross-fades, as infer_batch_process does."""
+    final_wave = waves[0]
+    for next_wave in waves[1:]:
+        n = min(samples, len(final_wave), len(next_wave))
+        if n <= 0:
+            final_wave = np.concatenate([final_wave, next_wave])
+            continue
+        overlap = final_wave[-n:] * np.linspace(1, 0, n) + next_wave[:n] * np.linspace(0, 1, n)
+        final_wave = np.concatenate([final_wave[:-n], overlap, next_wave[n:]])
+    return final_wave
+
+
+def infer_with_conditioning(cond: StyleConditioning, gen_text: str, model, vocoder, nfe_step: int,
+                            cfg_strength: float, speed: float, sway_sampling_coef: float = -1.0):
+    """
+    Drop-in replacement for infer_process() using precomputed conditioning: no reference
+    file I/O, resampling, mel extraction or reference tokenization per call.
+    Returns (wave, sample_rate).
+    """
+    from f5_tts.infer.utils_infer import chunk_text, target_sample_rate, cross_fade_duration
+
+    waves = [
+        infer_batch(cond, [batch_text], model, vocoder, nfe_step, cfg_strength, speed, sway_sampling_coef)[0]
+        for batch_text in chunk_text(gen_text, max_chars=cond.max_chars)
+    ]
+    if not waves:
+        return None, target_sample_rate
+    return cross_fade(waves, int(cross_fade_duration * target_sample_rate)), target_sample_rate
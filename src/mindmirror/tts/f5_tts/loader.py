@@ -1,10 +1,18 @@
+import os
 import sys
-from mindmirror.config import F5_LIB_PATH, F5_CKPT_PATH as CKPT_PATH, F5_VOCAB_FILE as VOCAB_FILE
+import torch
+from mindmirror.config import (
+    F5_LIB_PATH, F5_CKPT_PATH as CKPT_PATH, F5_VOCAB_FILE as VOCAB_FILE,
+    F5_QUANTIZE, F5_QUANTIZED_CKPT_PATH as QUANTIZED_CKPT_PATH, F5_CPU_THREADS
+)
 
-def load_f5_model(log_queue, device):
+def load_f5_model(log_queue, device, quantize: bool = None):
     """
     Sets up system paths and loads the F5-TTS DiT model.
+    On CPU, with `quantize` (default F5_QUANTIZE), linear layers are dynamically quantized to int8.
     """
+    quantize = F5_QUANTIZE if quantize is None else quantize
+
     # 1. Setup Paths
     f5_src = F5_LIB_PATH / "src"
     if not f5_src.exists():
@@ -18,9 +26,21 @@ def load_f5_model(log_queue, device):
         from f5_tts.infer.utils_infer import load_model, load_vocoder
         from f5_tts.model import DiT
 
+        if device == "cpu":
+            configure_cpu_threads(log_queue)
+        if quantize and device != "cpu":
+            log_queue.put({'type': 'info', 'text': "F5 int8 quantization is CPU-only; loading full precision."})
+            quantize = False
+        if quantize:
+            if "fbgemm" not in torch.backends.quantized.supported_engines and "qnnpack" in torch.backends.quantized.supported_engines:
+                torch.backends.quantized.engine = "qnnpack"  # ARM hosts
+            cached = load_quantized(log_queue)
+            if cached:
+                return cached
+
         log_queue.put({'type': 'info', 'text': f"Loading F5-TTS on {device}..."})
 
-        vocoder = load_vocoder(is_local=False)
+        vocoder = load_vocoder(is_local=False, device=device)
         model = load_model(
             model_cls=DiT,
             model_cfg=dict(dim=1024, depth=22, heads=16, ff_mult=2, text_dim=512, conv_layers=4),
@@ -31,11 +51,82 @@ def load_f5_model(log_queue, device):
             use_ema=True,
             device=device
         )
-        return model, vocoder
+        if quantize:
+            model, vocoder = quantize_models(model, vocoder)
+            save_quantized(model, vocoder, log_queue)
+        return prepare_for_inference(model), prepare_for_inference(vocoder)
 
     except ImportError as e:
         log_queue.put({'type': 'error', 'text': f"Import Error: {e}"})
         return None, None
     except Exception as e:
         log_queue.put({'type': 'error', 'text': f"Model Load Error: {e}"})
-        return None, None
\ No newline at end of file
+        return None, None
+
+
+def prepare_for_inference(module):
+    """Eval mode and no autograd bookkeeping, also for calls made outside torch.inference_mode()."""
+    module.eval()
+    for param in module.parameters():
+        param.requires_grad_(False)
+    return module
+
+
+def configure_cpu_threads(log_queue):
+    """One intra-op thread per available core (or F5_CPU_THREADS); a single inter-op thread, as the model runs one op at a time."""
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    torch.set_num_threads(F5_CPU_THREADS or cores)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # Can only be set before the first parallel op of the process
+    log_queue.put({'type': 'debug', 'text': f"F5 CPU threads: {torch.get_num_threads()} intra-op, {torch.get_num_interop_threads()} inter-op"})
+
+
+# --- INT8 QUANTIZATION ---
+
+def quantize_models(model, vocoder):
+    """
+    Dynamic int8 quantization of the linear layers: the DiT transformer and the Vocos backbone.
+    Weights are quantized once, activations per call. The Vocos ISTFT head stays in full
+    precision, since its output maps directly to the spectrum.
+    """
+    torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    torch.ao.quantization.quantize_dynamic(vocoder.backbone, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    return model, vocoder
+
+
+def _source_identity() -> dict:
+    """Identifies the fp32 checkpoint and torch build a quantized checkpoint was made from."""
+    stat = os.stat(CKPT_PATH)
+    return {"ckpt": str(CKPT_PATH), "size": stat.st_size, "mtime": stat.st_mtime,
+            "torch": torch.__version__, "engine": torch.backends.quantized.engine}
+
+
+def save_quantized(model, vocoder, log_queue):
+    """Persists the quantized modules so later starts skip loading fp32 weights and re-quantizing."""
+    try:
+        os.makedirs(os.path.dirname(QUANTIZED_CKPT_PATH), exist_ok=True)
+        tmp_path = QUANTIZED_CKPT_PATH + ".tmp"
+        torch.save({"source": _source_identity(), "model": model, "vocoder": vocoder}, tmp_path)
+        os.replace(tmp_path, QUANTIZED_CKPT_PATH)
+        log_queue.put({'type': 'info', 'text': f"Saved int8 F5 checkpoint to {QUANTIZED_CKPT_PATH}"})
+    except Exception as e:
+        log_queue.put({'type': 'debug', 'text': f"Could not save int8 F5 checkpoint: {e}"})
+
+
+def load_quantized(log_queue):
+    """Returns (model, vocoder) from the persisted int8 checkpoint, or None if missing or stale."""
+    if not os.path.exists(QUANTIZED_CKPT_PATH):
+        return None
+    try:
+        # Whole modules are pickled (quantized layers have no fp32 state dict to load into); the file is our own
+        checkpoint = torch.load(QUANTIZED_CKPT_PATH, map_location="cpu", weights_only=False)
+        if checkpoint.get("source") != _source_identity():
+            log_queue.put({'type': 'info', 'text': "int8 F5 checkpoint is outdated; re-quantizing."})
+            return None
+        log_queue.put({'type': 'info', 'text': "Loaded int8 F5-TTS on cpu."})
+        return prepare_for_inference(checkpoint["model"]), prepare_for_inference(checkpoint["vocoder"])
+    except Exception as e:
+        log_queue.put({'type': 'debug', 'text': f"Could not load int8 F5 checkpoint: {e}"})
+        return None
@@ -1,14 +1,18 @@
-import sys
+import os
 import time
-import queue
-import threading
 import torch
-from pathlib import Path
-from mindmirror.config import F5_STYLES as STYLES, F5_NFE_STEPS as NFE_STEPS
-from .utils import split_into_sentences, set_speaking_lock
-from .player import playback_thread
+from collections import deque
+from mindmirror.config import F5_STYLES as STYLES, F5_NFE_STEPS as NFE_STEPS, F5_VOICE_NAME, F5_CKPT_PATH, F5_REF_CACHE as REF_CACHE, TTS_PHRASE_CACHE as PHRASE_CACHE
+from mindmirror.config import F5_STREAM_VOCODER as STREAM_VOCODER, F5_VOCODER_WINDOW as VOCODER_WINDOW, F5_VOCODER_OVERLAP as VOCODER_OVERLAP, TTS_GAP_WINDOW
+from .utils import split_into_sentences
 from .loader import load_f5_model
+from .conditioning import prepare_conditioning, estimate_frames, sample_batch, decode, vocode_stream
+from .batching import BatchPlanner
 from mindmirror.tts.interface import TTSInterface
+from mindmirror.tts.output import OutputEngine
+from mindmirror.tts.phrase_cache import PhraseCache
+from mindmirror.tts.utils import unpack_tts_item
+from mindmirror.llm.telemetry import percentile
 
 class F5TTS(TTSInterface):
     """
@@ -37,64 +41,159 @@ class F5TTS(TTSInterface):
             return # Exit if load failed
 
         # Need to import infer_process locally after path setup in loader
-        from f5_tts.infer.utils_infer import infer_process
-
-        # --- 3. START PLAYER ---
-        stop_event = threading.Event()
-        audio_queue = queue.Queue()
-        player = threading.Thread(
-            target=playback_thread,
-            args=(audio_queue, selected_device, log_queue, control_queue, native_sr, stop_event),
-            daemon=True
-        )
-        player.start()
+        from f5_tts.infer.utils_infer import infer_process, chunk_text, target_sample_rate, hop_length
+
+        # Reference audio, mel and reference text tokens are prepared once per style
+        conditioning = prepare_conditioning(self.styles, model, device, log_queue) if REF_CACHE else {}
+
+        # --- 3. START OUTPUT ---
+        output = OutputEngine(selected_device, native_sr, control_queue, log_queue)
+        output.start()
+        planner = BatchPlanner(nfe_steps=self.nfe_steps)
+        used_nfe = []  # NFE of every batch of the paragraph being synthesized
+        first_samples = deque(maxlen=TTS_GAP_WINDOW)
+
+        def record_first_sample(ttfs):
+            """Time from the start of a chunk's batch (ODE solve included) to its first playable sample."""
+            first_samples.append(ttfs)
+            p95 = percentile(list(first_samples), 95)
+            log_queue.put({
+                "type": "telemetry",
+                "event": "tts_first_sample",
+                "data": {"ttfs": ttfs, "p95": p95, "n": len(first_samples)},
+                "text": f"F5 time to first sample {ttfs * 1000:.0f}ms (p95 {p95 * 1000:.0f}ms over {len(first_samples)})"
+            })
+
+        def vocode(cond, mel):
+            """Yields a chunk's audio at the output rate: window by window with STREAM_VOCODER, else whole."""
+            if not STREAM_VOCODER:
+                yield audio.resampled(decode(cond, mel, vocoder), target_sample_rate, native_sr)
+                return
+            # Playback starts after the first vocoder window instead of the whole chunk
+            resampler = audio.StreamResampler(target_sample_rate, native_sr)
+            for piece in vocode_stream(cond, mel, vocoder, VOCODER_WINDOW, VOCODER_OVERLAP):
+                yield resampler.process(piece)
+            yield resampler.flush()
+
+        def generate_batched(cond, config, chunks):
+            """Generates chunks in batches planned against the buffered playback headroom."""
+            items = [t for chunk in chunks for t in chunk_text(chunk, max_chars=cond.max_chars)]
+            frames = [estimate_frames(cond, t, config["speed"]) for t in items]
+            done = 0
+            while done < len(items):
+                # Headroom left before the output runs dry feeds the batch size and step count
+                n, nfe = planner.plan(frames[done:], output.buffered_seconds(), first=done == 0)
+                used_nfe.append(nfe)
+                label = f"{done+1}" if n == 1 else f"{done+1}-{done+n}"
+                log_queue.put({'type': 'status', 'text': f"🔊 Gen ({label}/{len(items)})..."})
+                start_t = time.time()
+
+                # INFERENCE
+                batch_frames = frames[done:done + n]
+                mels = sample_batch(
+                    cond, items[done:done + n], model,
+                    nfe_step=nfe, speed=config["speed"], cfg_strength=config["cfg"]
+                )
+                sample_time = time.time() - start_t
+                done += n
+
+                # The first chunk of a batch is released as soon as the batch finishes
+                vocode_time = 0.0  # Only time spent vocoding, not time the output spent consuming the yields
+                for mel in mels:
+                    first = True
+                    chunks = vocode(cond, mel)
+                    while True:
+                        vocode_t = time.time()
+                        samples = next(chunks, None)
+                        vocode_time += time.time() - vocode_t
+                        if samples is None:
+                            break
+                        if first and len(samples):
+                            first = False
+                            record_first_sample(time.time() - start_t)
+                        yield samples
+
+                gen_time = sample_time + vocode_time
+                planner.record(batch_frames, nfe, gen_time)
+                audio_seconds = sum(mel.shape[-1] for mel in mels) * hop_length / target_sample_rate
+                log_queue.put({'type': 'debug', 'text': f"Gen: {gen_time:.2f}s ({vocode_time:.2f}s vocoding) for {n} chunk(s), "
+                                                        f"NFE {nfe} (RTF {gen_time / audio_seconds:.2f})"})
+
+        def synthesize(style, raw_text):
+            """Generates a paragraph lazily: the next batch only runs once the previous audio was handed to the output."""
+            chunks = split_into_sentences(raw_text)
+            used_nfe.clear()
+            config = self.styles.get(style, self.styles["neutral"])
+            cond = conditioning.get(style if style in self.styles else "neutral")
+            if cond:
+                yield from generate_batched(cond, config, chunks)
+                return
+
+            for i, chunk in enumerate(chunks):
+                log_queue.put({'type': 'status', 'text': f"🔊 Gen ({i+1}/{len(chunks)})..."})
+                start_t = time.time()
+
+                # INFERENCE
+                generated_audio, sample_rate, _ = infer_process(
+                    config["ref_audio"], config["ref_text"], chunk, model, vocoder,
+                    nfe_step=self.nfe_steps, speed=config["speed"], cfg_strength=config["cfg"],
+                    device=device, mel_spec_type="vocos"
+                )
+                gen_time = time.time() - start_t
+                log_queue.put({'type': 'debug', 'text': f"Gen: {gen_time:.2f}s (RTF {gen_time / (len(generated_audio) / sample_rate):.2f})"})
+                yield audio.resampled(generated_audio, sample_rate, native_sr)
+
+        if PHRASE_CACHE:
+            cache = PhraseCache(
+                "f5", F5_VOICE_NAME, os.path.basename(F5_CKPT_PATH),
+                lambda style: {**self.styles.get(style, self.styles["neutral"]), "nfe": self.nfe_steps},
+                native_sr, log_queue
+            )
+            # Cached audio stands for the nominal NFE: entries rendered with fewer steps are not stored
+            full_quality = lambda: min(used_nfe, default=self.nfe_steps) >= self.nfe_steps
+            adaptive, planner.adaptive = planner.adaptive, False  # Nothing plays during warm-up, so there is no deadline to meet
+            cache.warm_up(synthesize, cacheable=full_quality)
+            planner.adaptive = adaptive
+            synthesize = cache.cached(synthesize, cacheable=full_quality)
+
         log_queue.put({'type': 'success', 'text': "F5-TTS System Ready."})
 
         # --- 4. MAIN LOOP ---
+        try:
+            self.play_queue(synthesize, output, text_queue, log_queue)
+        finally:
+            output.close()
+            if PHRASE_CACHE:
+                cache.close()
+
+    @staticmethod
+    def play_queue(synthesize, output: OutputEngine, text_queue, log_queue):
+        """Speaks paragraphs from the text queue until None; segments of stopped or cancelled turns are skipped."""
         while True:
             task = text_queue.get()
             if task is None:
-                audio_queue.put(None) # Kill player
-                player.join()
                 break
 
-            style, raw_text = task if isinstance(task, tuple) else ("neutral", task)
+            style, raw_text, epoch = unpack_tts_item(task)
             if not raw_text or not raw_text.strip(): continue
-
-            chunks = split_into_sentences(raw_text)
-            config = self.styles.get(style, self.styles["neutral"])
+            if output.is_stale(epoch):
+                log_queue.put({'type': 'debug', 'text': "TTS: Dropping segment of a cancelled turn"})
+                continue
 
             # Shield Up
-            set_speaking_lock(True)
-            stop_event.clear() # Reset stop flag for new task
+            output.begin_segment(epoch)
 
             try:
-                for i, chunk in enumerate(chunks):
-                    # Check for stop signal from player
-                    if stop_event.is_set():
+                # SEND TO OUTPUT; stops before generating the next chunk on a stop or a newer turn
+                for generated in synthesize(style, raw_text):
+                    if not output.play(generated):
                         log_queue.put({'type': 'status', 'text': "🛑 Generation Stopped"})
                         break
 
-                    log_queue.put({'type': 'status', 'text': f"🔊 Gen ({i+1}/{len(chunks)})..."})
-                    start_t = time.time()
-
-                    # INFERENCE
-                    generated_audio, sample_rate, _ = infer_process(
-                        config["ref_audio"], config["ref_text"], chunk, model, vocoder,
-                        nfe_step=self.nfe_steps, speed=config["speed"], cfg_strength=config["cfg"],
-                        device=device, mel_spec_type="vocos"
-                    )
-
-                    # SEND TO PLAYER
-                    resampled = audio.resampled(generated_audio, sample_rate, native_sr)
-                    audio_queue.put((resampled, native_sr))
-
-                    log_queue.put({'type': 'debug', 'text': f"Gen: {time.time() - start_t:.2f}s"})
-
             except Exception as e:
                 log_queue.put({'type': 'error', 'text': f"Gen Error: {e}"})
 
             finally:
-                # Always signal end-of-paragraph so the player releases its locks,
-                # even if generation was interrupted by an exception or stop event.
-                audio_queue.put("DONE")
\ No newline at end of file
+                # Keep generating the next paragraph while this one plays; the output
+                # lowers the shield once the buffered audio has drained.
+                output.finish_segment(wait=bool(output.interrupted))
@@ -1,5 +1,9 @@
 import sys
 import os
+import time
+import queue
+import argparse
+import multiprocessing
 import torch
 from pathlib import Path
 
@@ -20,21 +24,124 @@ sys.path.append(str(F5_PATH / "src"))
 from f5_tts.infer.utils_infer import load_model
 from f5_tts.model import DiT
 
-print("1. Starting Test Load...")
-device = "cuda" if torch.cuda.is_available() else "cpu"
-
-try:
-    # Attempt to load just like the worker does
-    model = load_model(
-        model_cls=DiT,
-        model_cfg=dict(dim=1024, depth=22, heads=16, ff_mult=2, text_dim=512, conv_layers=4),
-        ckpt_path=CKPT_PATH,
-        mel_spec_type="vocos",
-        vocab_file=VOCAB_FILE,
-        ode_method="euler",
-        use_ema=True,
-        device=device
-    )
-    print("2. SUCCESS! Model loaded.")
-except Exception as e:
-    print(f"3. FAILURE: {e}")
\ No newline at end of file
+TEST_TEXT = "You have two unresolved alerts from this morning, and the second one looks suspicious."
+
+
+def rss_mb() -> float:
+    """Resident memory of this process in MB (Linux), falling back to the peak on other platforms."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1 << 20)
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(quantize: bool, runs: int, results):
+    """Runs in a fresh process so load time and memory of each variant are not mixed."""
+    try:
+        results.put(run_variant(quantize, runs))
+    except Exception as e:
+        # Always post a result, so the parent does not wait for one that never comes
+        results.put({"error": [f"{type(e).__name__}: {e}"]})
+
+
+def run_variant(quantize: bool, runs: int) -> dict:
+    from mindmirror.tts.f5_tts.loader import load_f5_model
+    from mindmirror.tts.f5_tts.conditioning import prepare_conditioning, infer_with_conditioning
+
+    log_queue = queue.Queue()
+    base_mb = rss_mb()
+    start_t = time.perf_counter()
+    model, vocoder = load_f5_model(log_queue, "cpu", quantize=quantize)
+    load_time = time.perf_counter() - start_t
+    if not model:
+        return {"error": [m["text"] for m in log_queue.queue if m["type"] == "error"]}
+    memory = rss_mb() - base_mb
+
+    style = config.F5_STYLES["neutral"]
+    cond = prepare_conditioning({"neutral": style}, model, "cpu", log_queue)["neutral"]
+    infer_with_conditioning(cond, TEST_TEXT, model, vocoder, config.F5_NFE_STEPS, style["cfg"], style["speed"])  # Warm-up
+    rtfs = []
+    for _ in range(runs):
+        start_t = time.perf_counter()
+        wave, sr = infer_with_conditioning(cond, TEST_TEXT, model, vocoder, config.F5_NFE_STEPS, style["cfg"], style["speed"])
+        rtfs.append((time.perf_counter() - start_t) / (len(wave) / sr))
+    return {"load": load_time, "memory": memory, "rtf": sum(rtfs) / len(rtfs), "threads": torch.get_num_threads()}
+
+
+def wait_for_result(process, results) -> dict:
+    """The variant's result, or an error if its process died without posting one (e.g. killed on OOM)."""
+    while True:
+        try:
+            return results.get(timeout=1.0)
+        except queue.Empty:
+            if not process.is_alive():
+                break
+    try:
+        # The result may have been posted right before the process exited
+        return results.get(timeout=1.0)
+    except queue.Empty:
+        return {"error": [f"measurement process exited with code {process.exitcode}"]}
+
+
+def compare(runs: int):
+    """Load time, memory and RTF of the fp32 and int8 CPU load paths."""
+    print(f"\n4. CPU fp32 vs. int8 (NFE {config.F5_NFE_STEPS}, {runs} runs)...")
+    context = multiprocessing.get_context("spawn")
+    variants = [("fp32", False), ("int8", True)]
+    if not os.path.exists(config.F5_QUANTIZED_CKPT_PATH):
+        # The first int8 load quantizes and saves; the second shows the persisted startup
+        variants = [("fp32", False), ("int8 (quantize)", True), ("int8 (persisted)", True)]
+
+    rows = []
+    for label, quantize in variants:
+        results = context.Queue()
+        process = context.Process(target=measure, args=(quantize, runs, results))
+        process.start()
+        result = wait_for_result(process, results)
+        process.join()
+        if "error" in result:
+            print(f"   {label}: FAILURE {result['error']}")
+            return
+        rows.append((label, result))
+
+    for label, r in rows:
+        print(f"   {label:<18} load {r['load']:6.1f}s   memory {r['memory']:7.0f} MB   RTF {r['rtf']:.2f}   ({r['threads']} threads)")
+    fp32, int8 = rows[0][1], rows[-1][1]
+    print(f"   int8: {fp32['rtf'] / int8['rtf']:.2f}x faster, {1 - int8['memory'] / fp32['memory']:.0%} less memory")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checks that the F5 checkpoint loads, and compares fp32 vs. int8 on CPU.")
+    parser.add_argument("--no-compare", action="store_true", help="Only run the load test")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    print("1. Starting Test Load...")
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+
+    try:
+        # Attempt to load just like the worker does
+        model = load_model(
+            model_cls=DiT,
+            model_cfg=dict(dim=1024, depth=22, heads=16, ff_mult=2, text_dim=512, conv_layers=4),
+            ckpt_path=CKPT_PATH,
+            mel_spec_type="vocos",
+            vocab_file=VOCAB_FILE,
+            ode_method="euler",
+            use_ema=True,
+            device=device
+        )
+        print("2. SUCCESS! Model loaded.")
+    except Exception as e:
+        print(f"3. FAILURE: {e}")
+        return
+
+    del model
+    if not args.no_compare:
+        compare(args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import time
+import threading
+import numpy as np
+
+from mindmirror import config
+
+
+class JitterBuffer:
+    """
+    Adaptive prebuffer for audio chunks delivered over the network. The chunks of a stream
+    are held until one arrives `target` seconds after the first, then everything is passed
+    through. Holding for `target` seconds absorbs chunks up to that late against the playout
+    schedule that starts at the first arrival, where a chunk is due once the audio before it
+    has played. Delivery jitter is a running mean, over streams, of the largest lateness
+    against that schedule; chunks arriving early are on time and do not count. A chunk that
+    arrives after the audio released so far would have finished playing is counted as an
+    underrun and grows the target. Otherwise the target relaxes towards TTS_JITTER_FACTOR
+    times the jitter, within TTS_JITTER_MIN_MS..TTS_JITTER_MAX_MS.
+
+    One buffer is shared by the concurrent synthesis workers: the state of each stream is
+    local to `stream()`, only the adapted target and the totals are shared, under a lock.
+    """
+    def __init__(self, log_queue=None):
+        self.log_queue = log_queue
+        self.min_target = config.TTS_JITTER_MIN_MS / 1000
+        self.max_target = config.TTS_JITTER_MAX_MS / 1000
+        self.target = config.TTS_JITTER_INITIAL_MS / 1000
+        self.jitter = 0.0
+        self.underruns = 0
+        self.lock = threading.Lock()
+
+    def stream(self, chunks, samplerate: int):
+        """Wraps an iterator of float32 chunks; yields them with the prebuffer applied."""
+        with self.lock:
+            target = self.target
+        start_t = time.perf_counter()
+        first_arrival = None
+        arrived_seconds = 0.0    # Audio delivered before the current chunk
+        lateness = 0.0
+        held = []
+        held_seconds = 0.0
+        release_t = None         # When playback of the released audio (presumably) started
+        released_seconds = 0.0
+        first_audio = None
+        late = 0.0
+        underruns = 0
+
+        for chunk in chunks:
+            now = time.perf_counter()
+            duration = len(chunk) / samplerate
+            if first_arrival is None:
+                first_arrival = now
+            else:
+                lateness = max(lateness, now - (first_arrival + arrived_seconds))
+            arrived_seconds += duration
+
+            if release_t is None:
+                held.append(chunk)
+                held_seconds += duration
+                if now - first_arrival >= target:
+                    release_t = now
+                    released_seconds = held_seconds
+                    first_audio = now - start_t
+                    yield np.concatenate(held)
+                    held = []
+                continue
+
+            if now > release_t + released_seconds:
+                late = max(late, now - (release_t + released_seconds))
+                underruns += 1
+            released_seconds += duration
+            yield chunk
+
+        if held:
+            # Stream shorter than the prebuffer target
+            first_audio = time.perf_counter() - start_t
+            yield np.concatenate(held)
+        self._adapt(late, lateness, underruns)
+
+        if self.log_queue is not None and first_audio is not None:
+            with self.lock:
+                jitter, target = self.jitter, self.target
+            self.log_queue.put({
+                'type': 'debug',
+                'text': f"📶 TTS stream: first audio {first_audio * 1000:.0f}ms, jitter {jitter * 1000:.0f}ms, "
+                        f"prebuffer {target * 1000:.0f}ms, {underruns} late chunks"
+            })
+
+    def _adapt(self, late: float, lateness: float, underruns: int):
+        with self.lock:
+            self.jitter += (lateness - self.jitter) / 4
+            self.underruns += underruns
+            if late > 0:
+                self.target += late
+            else:
+                wanted = config.TTS_JITTER_FACTOR * self.jitter
+                self.target += (wanted - self.target) * 0.25
+            self.target = min(max(self.target, self.min_target), self.max_target)
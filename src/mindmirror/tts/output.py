@@ -0,0 +1,254 @@
+import time
+import queue
+import threading
+import numpy as np
+import sounddevice as sd
+
+from mindmirror import config
+from mindmirror.tts.utils import set_speaking_lock, set_playback_lock, TurnGate
+
+
+class RingBuffer:
+    """
+    Single-producer/single-consumer float32 ring buffer. The producer only advances
+    `write_pos` and the consumer (the audio callback) only advances `read_pos`, so
+    neither side needs a lock.
+    """
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.data = np.zeros(capacity, dtype=np.float32)
+        self.write_pos = 0  # Total samples ever written
+        self.read_pos = 0   # Total samples ever read
+
+    def available(self) -> int:
+        return self.write_pos - self.read_pos
+
+    def space(self) -> int:
+        return self.capacity - self.available()
+
+    def write(self, samples: np.ndarray) -> int:
+        """Copies as many samples as fit; returns the number written. Producer side."""
+        count = min(len(samples), self.space())
+        start = self.write_pos % self.capacity
+        first = min(count, self.capacity - start)
+        self.data[start:start + first] = samples[:first]
+        self.data[:count - first] = samples[first:count]
+        self.write_pos += count
+        return count
+
+    def read_into(self, out: np.ndarray) -> int:
+        """Fills `out` with up to len(out) samples; returns the number read. Consumer side."""
+        count = min(len(out), self.available())
+        start = self.read_pos % self.capacity
+        first = min(count, self.capacity - start)
+        out[:first] = self.data[start:start + first]
+        out[first:count] = self.data[:count - first]
+        self.read_pos += count
+        return count
+
+    def clear(self):
+        """Discards everything buffered. Consumer side."""
+        self.read_pos = self.write_pos
+
+
+class OutputEngine:
+    """
+    Shared playback engine for all TTS backends. Owns one long-lived output stream whose
+    callback pulls audio from a ring buffer, applies sample-accurate gain ramps (ducking)
+    and fades out on flush. A control thread handles volume/stop/epoch commands as soon
+    as they arrive, so engines only produce audio into it:
+
+        engine.begin_segment(epoch)
+        for chunk in synthesize(text):
+            if not engine.play(chunk): break
+        engine.finish_segment()
+    """
+    def __init__(self, device, samplerate: int, control_queue, log_queue, gate: TurnGate = None):
+        self.device = device
+        self.samplerate = samplerate
+        self.control_queue = control_queue
+        self.log_queue = log_queue
+        self.gate = gate or TurnGate()
+
+        self.blocksize = config.TTS_OUTPUT_BLOCK_SIZE
+        self.ring = RingBuffer(int(config.TTS_OUTPUT_BUFFER_SECONDS * samplerate))
+        self.ramp_step = 1.0 / max(int(config.TTS_GAIN_RAMP_MS * samplerate / 1000), 1)
+        self.fade_samples = max(int(config.TTS_FLUSH_FADE_MS * samplerate / 1000), 1)
+
+        self.gain = 1.0
+        self.target_gain = 1.0
+        self.flush_requested = False
+
+        # Segment state (written by the producer and the control thread)
+        self.active = False         # Locks are held until the buffered audio has played
+        self.producing = False      # The producer may still write audio of the current segment
+        self.epoch = 0
+        self.interrupted = None     # None, 'stop' or 'stale'
+        self.stopped_epoch = -1     # Segments up to this epoch belong to a stopped turn
+        self.segment_started_at = 0.0
+
+        # Underrun counters
+        self.starved_blocks = 0     # Callback found the ring empty while a segment was still producing
+        self.device_underflows = 0  # PortAudio reported an output underflow
+        self.segment_starved = 0
+
+        self.stream = None
+        self.running = False
+        self.control_thread = None
+
+    # --- LIFECYCLE ---
+
+    def start(self):
+        self.stream = sd.OutputStream(
+            device=self.device, samplerate=self.samplerate, channels=1, dtype='float32',
+            blocksize=self.blocksize, callback=self._callback
+        )
+        self.stream.start()
+        self.running = True
+        self.control_thread = threading.Thread(target=self._control_loop, daemon=True)
+        self.control_thread.start()
+
+    def close(self):
+        self.running = False
+        if self.control_thread:
+            self.control_thread.join(timeout=1.0)
+        if self.stream:
+            self.stream.stop()
+            self.stream.close()
+        if self.active:
+            self._release()
+
+    # --- PRODUCER SIDE ---
+
+    def begin_segment(self, epoch: int = 0):
+        """
+        Raises the speaking/playback locks for a new segment. The volume is reset only when the
+        engine is idle; while earlier audio still plays, ducking stays with the control commands.
+        """
+        while self.flush_requested and self.running:
+            time.sleep(0.005)  # Let the callback drop the audio of an interrupted segment first
+        self.epoch = epoch
+        self.interrupted = None
+        self.producing = True
+        if not self.active:
+            self.target_gain = 1.0
+            self.gain = 1.0  # Nothing is playing, so no ramp is needed
+            self.segment_starved = 0
+            self.segment_started_at = time.time()
+            set_speaking_lock(True)
+            set_playback_lock(True)
+            self.active = True
+
+    def play(self, samples: np.ndarray) -> bool:
+        """
+        Queues audio at the engine's sample rate, blocking while the ring buffer is full.
+        Returns False if the segment was interrupted.
+        """
+        samples = np.asarray(samples, dtype=np.float32)
+        idx = 0
+        while idx < len(samples):
+            if self.interrupted:
+                return False
+            written = self.ring.write(samples[idx:])
+            idx += written
+            if idx < len(samples):
+                time.sleep(self.blocksize / self.samplerate)
+        return not self.interrupted
+
+    def finish_segment(self, wait: bool = True):
+        """
+        Marks the end of the current segment's audio. With wait=True, blocks until it has
+        played (or was flushed); otherwise the locks are released once the buffer drains.
+        """
+        self.producing = False
+        while wait and self.active and self.running:
+            time.sleep(0.01)
+
+    def buffered_seconds(self) -> float:
+        return self.ring.available() / self.samplerate
+
+    def is_stale(self, epoch: int) -> bool:
+        """True for segments of a turn that was cancelled (older epoch) or stopped while speaking."""
+        return self.gate.is_stale(epoch) or epoch <= self.stopped_epoch
+
+    # --- CONTROL ---
+
+    def _control_loop(self):
+        while self.running:
+            try:
+                cmd = self.control_queue.get(timeout=0.02)
+                self.handle_command(cmd)
+            except queue.Empty:
+                pass
+            except Exception as e:
+                self.log_queue.put({'type': 'error', 'text': f"Output control error: {e}"})
+
+            # Lower the locks once the last segment's audio has played out
+            if self.active and not self.producing and not self.flush_requested and self.ring.available() == 0:
+                time.sleep(self.stream.latency)
+                if not self.producing and self.ring.available() == 0:
+                    self._release()
+
+    def handle_command(self, cmd: dict):
+        if cmd['command'] == 'volume':
+            self.target_gain = float(cmd['value'])
+        elif cmd['command'] == 'stop':
+            # The stopped turn's remaining segments are dropped; the barge-in answer comes with a newer epoch
+            self.stopped_epoch = max(self.stopped_epoch, self.epoch)
+            if self.active:
+                self._interrupt('stop')
+                self.log_queue.put({'type': 'status', 'text': "🚫 Playback Interrupted"})
+        elif cmd['command'] == 'epoch':
+            self.gate.update(cmd)
+            if self.active and self.gate.is_stale(self.epoch):
+                self._interrupt('stale')
+
+    def _interrupt(self, reason: str):
+        self.interrupted = reason
+        self.producing = False
+        self.flush_requested = True
+
+    def _release(self):
+        self.active = False
+        set_playback_lock(False)
+        set_speaking_lock(False)
+        if self.segment_starved:
+            self.log_queue.put({
+                'type': 'debug',
+                'text': f"🔈 Output underruns: {self.segment_starved} in segment "
+                        f"({self.starved_blocks} total, {self.device_underflows} device underflows)"
+            })
+
+    # --- AUDIO CALLBACK ---
+
+    def _callback(self, outdata, frames, time_info, status):
+        if status.output_underflow:
+            self.device_underflows += 1
+        out = outdata[:, 0]
+        count = self.ring.read_into(out)
+        out[count:] = 0.0
+
+        if self.flush_requested:
+            # Short fade instead of a hard cut, then drop everything still buffered
+            fade = min(count, self.fade_samples)
+            out[:fade] *= np.linspace(self.gain, 0.0, fade, dtype=np.float32)
+            out[fade:] = 0.0
+            self.ring.clear()
+            self.flush_requested = False
+            return
+
+        if count < frames and self.producing:
+            self.starved_blocks += 1
+            self.segment_starved += 1
+
+        if self.gain != self.target_gain:
+            # Linear ramp towards the target gain at a fixed per-sample rate
+            delta = self.target_gain - self.gain
+            steps = min(frames, int(abs(delta) / self.ramp_step) + 1)
+            ramp = self.gain + np.sign(delta) * self.ramp_step * np.arange(1, steps + 1, dtype=np.float32)
+            ramp = np.clip(ramp, min(self.gain, self.target_gain), max(self.gain, self.target_gain))
+            out[:steps] *= ramp
+            out[steps:] *= self.target_gain
+            self.gain = float(ramp[-1])
+        elif self.gain != 1.0:
+            out *= self.gain
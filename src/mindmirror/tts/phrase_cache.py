@@ -0,0 +1,206 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import unicodedata
+import numpy as np
+
+from mindmirror import config
+
+
+def normalize_phrase(text: str) -> str:
+    """Canonical form of a phrase for cache keys: NFKC, collapsed whitespace. Case and punctuation affect prosody and are kept."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class PhraseCache:
+    """
+    Content-addressed on-disk cache of synthesized short phrases. Entries are keyed by
+    (engine, voice, model, style parameters, normalized text, output sample rate) and stored
+    as raw float32 PCM at the native output rate, so hits are memory-mapped and fed to the
+    output engine without decoding or resampling. The least recently used entries are evicted
+    once the cache exceeds TTS_PHRASE_CACHE_MAX_MB.
+
+    `style_params(style)` returns the engine's synthesis parameters for a style (part of the key).
+    """
+    def __init__(self, engine: str, voice: str, model: str, style_params, samplerate: int,
+                 log_queue=None, path: str = None):
+        self.engine = engine
+        self.voice = voice
+        self.model = model
+        self.style_params = style_params
+        self.samplerate = samplerate
+        self.log_queue = log_queue
+        self.dir = path or config.TTS_PHRASE_CACHE_PATH
+        self.index_path = os.path.join(self.dir, "index.json")
+        self.budget = config.TTS_PHRASE_CACHE_MAX_MB << 20
+        self.chunk_samples = int(config.TTS_PHRASE_CACHE_CHUNK_MS * samplerate / 1000)
+
+        self.lock = threading.Lock()
+        self.index = self._load_index()  # key -> {"bytes", "last_used", "text"}
+        self.hits = 0
+        self.misses = 0
+
+    def _log(self, msg_type: str, text: str):
+        if self.log_queue:
+            self.log_queue.put({"type": msg_type, "text": text})
+
+    def _load_index(self) -> dict:
+        try:
+            with open(self.index_path, "r") as f:
+                index = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+        # Drop entries whose audio file went missing
+        return {k: v for k, v in index.items() if os.path.exists(self._path(k))}
+
+    def _save_index(self):
+        os.makedirs(self.dir, exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.index, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.dir, key[:2], f"{key}.f32")
+
+    def key(self, style: str, text: str) -> str | None:
+        """Cache key of a phrase, or None if it is too long to be worth caching."""
+        text = normalize_phrase(text)
+        if not text or len(text) > config.TTS_PHRASE_CACHE_MAX_CHARS:
+            return None
+        identity = {
+            "engine": self.engine, "voice": self.voice, "model": self.model,
+            "style": self.style_params(style), "text": text, "sr": self.samplerate
+        }
+        return hashlib.sha1(json.dumps(identity, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    # --- LOOKUP ---
+
+    def get(self, key: str):
+        """Memory-maps a cached phrase; returns None on a miss."""
+        with self.lock:
+            entry = self.index.get(key)
+            if entry:
+                entry["last_used"] = time.time()
+        if entry:
+            try:
+                audio = np.memmap(self._path(key), dtype=np.float32, mode="r")
+                self._record(True, entry["text"])
+                return audio
+            except (OSError, ValueError):
+                with self.lock:
+                    self.index.pop(key, None)
+        self._record(False)
+        return None
+
+    def _record(self, hit: bool, text: str = None):
+        # Pipeline workers look up and store phrases concurrently: count and snapshot under the lock
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            hits, misses = self.hits, self.misses
+            entries, total_bytes = len(self.index), self._total_bytes()
+        lookups = hits + misses
+        if hit:
+            self._log("debug", f"💾 Phrase cache hit: \"{text}\"")
+        if self.log_queue and (hit or lookups % 20 == 0):
+            self.log_queue.put({
+                "type": "telemetry",
+                "event": "tts_phrase_cache",
+                "data": {"hits": hits, "misses": misses, "hit_rate": hits / lookups,
+                         "entries": entries, "bytes": total_bytes},
+                "text": f"TTS phrase cache: {hits / lookups:.0%} hit rate over {lookups} lookups "
+                        f"({entries} entries, {total_bytes / (1 << 20):.1f} MB)"
+            })
+
+    # --- STORAGE ---
+
+    def put(self, key: str, text: str, audio: np.ndarray):
+        """Stores a fully synthesized phrase and evicts least recently used entries over budget."""
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        if audio.nbytes == 0 or audio.nbytes > self.budget:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + ".tmp"
+            audio.tofile(tmp_path)
+            os.replace(tmp_path, path)
+            with self.lock:
+                self.index[key] = {"bytes": audio.nbytes, "last_used": time.time(), "text": normalize_phrase(text)}
+                self._evict()
+                self._save_index()
+        except OSError as e:
+            self._log("debug", f"Phrase cache write failed: {e}")
+
+    def _total_bytes(self) -> int:
+        return sum(entry["bytes"] for entry in self.index.values())
+
+    def _evict(self):
+        total = self._total_bytes()
+        for key, entry in sorted(self.index.items(), key=lambda item: item[1]["last_used"]):
+            if total <= self.budget:
+                break
+            total -= entry["bytes"]
+            del self.index[key]
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def close(self):
+        """Persists the recency of entries used this session."""
+        with self.lock:
+            try:
+                if self.index:
+                    self._save_index()
+            except OSError:
+                pass
+
+    # --- INTEGRATION ---
+
+    def cached(self, synthesize, cacheable=None):
+        """
+        Wraps a `synthesize(style, text)` chunk generator: hits are served from the memory-mapped
+        file in TTS_PHRASE_CACHE_CHUNK_MS slices, misses are synthesized and stored once complete
+        (a cancelled synthesis is not stored). `cacheable()`, if given, is asked after a synthesis
+        completed and can veto storing it, e.g. audio rendered below the quality the key stands for.
+        """
+        def wrapper(style, text):
+            key = self.key(style, text)
+            if key is None:
+                yield from synthesize(style, text)
+                return
+            audio = self.get(key)
+            if audio is not None:
+                for i in range(0, len(audio), self.chunk_samples):
+                    yield audio[i:i + self.chunk_samples]
+                return
+            parts = []
+            for chunk in synthesize(style, text):
+                parts.append(chunk)
+                yield chunk
+            if parts and (cacheable is None or cacheable()):
+                self.put(key, text, np.concatenate(parts))
+        return wrapper
+
+    def warm_up(self, synthesize, phrases: list = None, cacheable=None):
+        """Synthesizes configured phrases that are not cached yet."""
+        phrases = config.TTS_PHRASE_CACHE_WARMUP if phrases is None else phrases
+        missing = [(style, text) for style, text in phrases
+                   if (key := self.key(style, text)) and key not in self.index]
+        if not missing:
+            return
+        start_t = time.time()
+        for style, text in missing:
+            try:
+                audio = np.concatenate(list(synthesize(style, text)))
+                if cacheable is None or cacheable():
+                    self.put(self.key(style, text), text, audio)
+            except Exception as e:
+                self._log("debug", f"Phrase cache warm-up failed for \"{text}\": {e}")
+        self._log("info", f"💾 Phrase cache warmed up with {len(missing)} phrases in {time.time() - start_t:.1f}s.")
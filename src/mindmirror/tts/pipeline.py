@@ -0,0 +1,176 @@
+import time
+import queue
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from mindmirror import config
+from mindmirror.llm.telemetry import percentile
+from mindmirror.tts.utils import unpack_tts_item
+
+
+class SynthesisJob:
+    """One text segment being synthesized; its audio chunks are handed over through `chunks`."""
+    def __init__(self, style: str, text: str, epoch: int):
+        self.style = style
+        self.text = text
+        self.epoch = epoch
+        self.queued_at = time.time()
+        self.chunks = queue.Queue()  # Audio arrays, an Exception, then None when done
+        self.cancelled = False
+        self.future = None
+
+    def cancel(self):
+        self.cancelled = True
+        if self.future:
+            self.future.cancel()
+
+
+class SynthesisPipeline:
+    """
+    Synthesizes upcoming text segments while the current one plays. Segments read from the
+    text queue are submitted to a pool of `lookahead` workers; the head segment's chunks are
+    written to the OutputEngine as they arrive, so playback of one segment and synthesis of
+    the next overlap. Segments of a stopped or cancelled turn (stale epoch) are skipped: pending
+    jobs are cancelled once the playing segment is interrupted, queued ones are dropped when
+    read. Segments of newer turns are kept, also when they arrive while the pipeline is idle.
+
+    `synthesize(style, text)` is called in a worker thread and must yield float32 audio
+    chunks at the output's sample rate.
+    """
+    def __init__(self, synthesize, output, text_queue, log_queue, lookahead: int = None):
+        self.synthesize = synthesize
+        self.output = output
+        self.text_queue = text_queue
+        self.log_queue = log_queue
+        self.lookahead = config.TTS_PIPELINE_LOOKAHEAD if lookahead is None else lookahead
+        self.executor = ThreadPoolExecutor(max_workers=max(self.lookahead, 1), thread_name_prefix="tts-synth")
+
+        self.pending = deque()   # Jobs queued behind the one that is playing
+        self.closed = False
+        self.playout_end = 0.0   # When the audio written so far will have finished playing
+        self.gaps = deque(maxlen=config.TTS_GAP_WINDOW)
+
+    def run(self):
+        """Main loop; returns when the text queue delivers None."""
+        try:
+            while not self.closed:
+                self._fill(block=True)
+                if self.pending:
+                    self._play(self.pending.popleft())
+                    self._cancel_stale()
+        finally:
+            self._cancel_pending()
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    # --- FEEDING ---
+
+    def _fill(self, block: bool = False):
+        """Reads text segments until the lookahead is full. Blocks briefly only when asked to and idle."""
+        while not self.closed and len(self.pending) < max(self.lookahead, 1):
+            try:
+                if block and not self.pending:
+                    item = self.text_queue.get(timeout=0.2)
+                else:
+                    item = self.text_queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is None:
+                self.closed = True
+                return
+
+            style, text, epoch = unpack_tts_item(item)
+            if self.output.is_stale(epoch):
+                self.log_queue.put({'type': 'debug', 'text': "TTS: Dropping segment of a cancelled turn"})
+                continue
+            if not text.strip():
+                self.log_queue.put({'type': 'status', 'text': "TTS: Empty text, skipping"})
+                continue
+
+            job = SynthesisJob(style, text, epoch)
+            job.future = self.executor.submit(self._synthesize_job, job)
+            self.pending.append(job)
+
+    def _synthesize_job(self, job: SynthesisJob):
+        try:
+            for chunk in self.synthesize(job.style, job.text):
+                if job.cancelled:
+                    return
+                job.chunks.put(chunk)
+        except Exception as e:
+            job.chunks.put(e)
+        finally:
+            job.chunks.put(None)
+
+    def _cancel_pending(self):
+        while self.pending:
+            self.pending.popleft().cancel()
+
+    def _cancel_stale(self):
+        stale = [job for job in self.pending if self.output.is_stale(job.epoch)]
+        for job in stale:
+            job.cancel()
+            self.pending.remove(job)
+        if stale:
+            self.log_queue.put({'type': 'debug', 'text': f"TTS: Dropping {len(stale)} pending segment(s) of a cancelled turn"})
+
+    # --- PLAYBACK ---
+
+    def _play(self, job: SynthesisJob):
+        if self.output.is_stale(job.epoch):
+            job.cancel()
+            self.log_queue.put({'type': 'debug', 'text': "TTS: Dropping segment of a cancelled turn"})
+            return
+
+        self.log_queue.put({'type': 'status', 'text': f"🔊 Speaking ({job.style}):"})
+        self.log_queue.put({'type': 'status', 'text': job.text})
+
+        self.output.begin_segment(job.epoch)
+        first_chunk = True
+        try:
+            while True:
+                # Segments arriving meanwhile start synthesizing right away
+                self._fill()
+                try:
+                    chunk = job.chunks.get(timeout=0.05)
+                except queue.Empty:
+                    if self.output.interrupted:
+                        break
+                    continue
+                if chunk is None:
+                    break
+                if isinstance(chunk, Exception):
+                    self.log_queue.put({'type': 'error', 'text': f"TTS Error: {chunk}"})
+                    break
+                if first_chunk:
+                    self._record_gap(job)
+                    first_chunk = False
+                if not self.output.play(chunk):
+                    break
+        finally:
+            interrupted = bool(self.output.interrupted)
+            if interrupted:
+                job.cancel()
+            # Go on with the next segment while this one plays out of the buffer
+            self.output.finish_segment(wait=interrupted)
+            self.playout_end = time.time() + self.output.buffered_seconds()
+
+        self.log_queue.put({'type': 'status', 'text': "TTS: Finished speaking segment"})
+
+    def _record_gap(self, job: SynthesisJob):
+        """
+        Silence between the end of the previous segment and the start of this one, counted only
+        when this segment was already queued before the previous one finished playing (otherwise
+        the wait is for the LLM, not for synthesis).
+        """
+        if job.queued_at >= self.playout_end:
+            return
+        gap = max(time.time() - self.playout_end, 0.0)
+        self.gaps.append(gap)
+        mean, p95 = sum(self.gaps) / len(self.gaps), percentile(list(self.gaps), 95)
+        self.log_queue.put({
+            "type": "telemetry",
+            "event": "tts_gap",
+            "data": {"gap": gap, "mean": mean, "p95": p95, "n": len(self.gaps)},
+            "text": f"TTS inter-segment gap {gap * 1000:.0f}ms (mean {mean * 1000:.0f}ms, "
+                    f"p95 {p95 * 1000:.0f}ms over {len(self.gaps)})"
+        })
@@ -0,0 +1,102 @@
+import os
+import json
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import onnxruntime
+from piper import PiperVoice
+from piper.config import PiperConfig
+
+from mindmirror import config
+
+GRAPH_OPTIMIZATION_LEVELS = {
+    "disable": onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "basic": onnxruntime.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": onnxruntime.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+
+
+def default_intra_op_threads(workers: int) -> int:
+    """Available cores split between the workers, so parallel sentences do not oversubscribe the CPU."""
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    return max(1, cores // max(workers, 1))
+
+
+def session_options(intra_op_threads: int, workers: int) -> onnxruntime.SessionOptions:
+    options = onnxruntime.SessionOptions()
+    options.intra_op_num_threads = intra_op_threads
+    options.inter_op_num_threads = 1
+    options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+    options.graph_optimization_level = GRAPH_OPTIMIZATION_LEVELS[config.PIPER_GRAPH_OPTIMIZATION]
+    options.enable_cpu_mem_arena = config.PIPER_CPU_MEM_ARENA
+    options.enable_mem_pattern = config.PIPER_MEM_PATTERN
+    if workers > 1:
+        # Idle threads of one worker would otherwise spin on cores another worker needs
+        options.add_session_config_entry("session.intra_op.allow_spinning", "0")
+    return options
+
+
+def load_voice(model_path: str, intra_op_threads: int = None, workers: int = None) -> PiperVoice:
+    """Loads a Piper voice like PiperVoice.load does, but with explicit ONNX Runtime session options."""
+    workers = workers or config.PIPER_WORKERS
+    intra_op_threads = intra_op_threads or config.PIPER_INTRA_OP_THREADS or default_intra_op_threads(workers)
+    with open(f"{model_path}.json", "r", encoding="utf-8") as f:
+        voice_config = PiperConfig.from_dict(json.load(f))
+    session = onnxruntime.InferenceSession(
+        str(model_path),
+        sess_options=session_options(intra_op_threads, workers),
+        providers=["CPUExecutionProvider"]
+    )
+    return PiperVoice(session=session, config=voice_config)
+
+
+class ParallelSynthesizer:
+    """
+    Synthesizes the sentences of a text on a pool of PIPER_WORKERS threads sharing one ONNX
+    session (runs on a session are thread-safe), and yields each sentence's audio in order as
+    soon as it and all earlier sentences are done. At most `workers` sentences are in flight
+    per text; closing the generator cancels the ones not started yet.
+    """
+    # espeak-ng, used for phonemization, is not thread-safe
+    phonemize_lock = threading.Lock()
+
+    def __init__(self, voice: PiperVoice, workers: int = None):
+        self.voice = voice
+        self.workers = workers or config.PIPER_WORKERS
+        self.sample_rate = voice.config.sample_rate
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="piper")
+
+    def _render(self, phonemes: list[str]) -> np.ndarray:
+        audio = self.voice.phoneme_ids_to_audio(self.voice.phonemes_to_ids(phonemes))
+        # Same post-processing as PiperVoice.synthesize with the default SynthesisConfig
+        peak = np.max(np.abs(audio))
+        audio = audio / peak if peak >= 1e-8 else np.zeros_like(audio)
+        return np.clip(audio, -1.0, 1.0).astype(np.float32)
+
+    def synthesize(self, text: str):
+        """Yields float32 audio at `sample_rate`, one array per sentence."""
+        with self.phonemize_lock:
+            sentences = [phonemes for phonemes in self.voice.phonemize(text) if phonemes]
+
+        pending = deque()
+        upcoming = iter(sentences)
+        try:
+            for phonemes in upcoming:
+                pending.append(self.pool.submit(self._render, phonemes))
+                if len(pending) >= self.workers:
+                    break
+            while pending:
+                audio = pending.popleft().result()
+                for phonemes in upcoming:
+                    pending.append(self.pool.submit(self._render, phonemes))
+                    break
+                yield audio
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -1,16 +1,12 @@
-import sounddevice as sd
-from piper import PiperVoice
 from mindmirror import audio
-import numpy as np
 import os
-import queue
-import time
-from pathlib import Path
-import sys
 
 from mindmirror import config
 from mindmirror.tts.interface import TTSInterface
-from mindmirror.tts.utils import set_speaking_lock, set_playback_lock
+from mindmirror.tts.output import OutputEngine
+from mindmirror.tts.pipeline import SynthesisPipeline
+from mindmirror.tts.phrase_cache import PhraseCache
+from .synthesis import load_voice, ParallelSynthesizer
 
 
 
@@ -29,108 +25,31 @@ class PiperTTS(TTSInterface):
             log_queue.put({'type': 'error', 'text': f"Piper Model not found at {self.model_path}"})
             return
 
-        voice = PiperVoice.load(self.model_path, use_cuda=False)
-        log_queue.put({'type': 'info', 'text': "PiperVoice ready, waiting for responses..."})
+        voice = load_voice(self.model_path)
+        synthesizer = ParallelSynthesizer(voice)
+        log_queue.put({'type': 'info', 'text': f"PiperVoice ready ({synthesizer.workers} workers x "
+                                               f"{voice.session.get_session_options().intra_op_num_threads} threads), waiting for responses..."})
 
         native_sr = audio.get_valid_samplerate(selected_device)
-        BLOCK_SIZE = 2048
-        SMOOTHING = 0.1
-
-        while True:
-            try:
-                item = text_queue.get(timeout=0.2)
-            except queue.Empty:
-                continue
-                
-            if item is None: break
-            
-            style = "neutral"
-            if isinstance(item, tuple):
-                style, text = item
-            else:
-                text = item
-
-            if text.strip():
-                set_speaking_lock(True)
-                log_queue.put({'type': 'status', 'text': f"🔊 Speaking ({style}):"})
-                log_queue.put({'type': 'status', 'text': text})
-
-                # Create Playback Lock (Audio Output)
-                set_playback_lock(True)
-
-                try:
-                    with sd.OutputStream(device=selected_device, samplerate=native_sr, channels=1, blocksize=BLOCK_SIZE) as stream:
-                        target_vol = 1.0
-                        current_vol = 1.0
-                        interrupted = False
-                        
-                        chunk_count = 0
-                        
-                        for chunk in voice.synthesize(text):
-                            if interrupted: break
-                            
-                            chunk_count += 1
-                            log_queue.put({'type': 'status', 'text': f"TTS: Processing chunk {chunk_count}"})
-
-                            audio_data = chunk.audio_float_array
-                            original_rate = chunk.sample_rate
-
-                            # Resample
-                            resampled = audio.resampled(audio_data, original_rate, native_sr)
-                            
-                            # Play Loop for this chunk
-                            total_samples = len(resampled)
-                            idx = 0
-                            
-                            while idx < total_samples:
-                                # Check Control Queue
-                                try:
-                                    while True:
-                                        cmd = control_queue.get_nowait()
-                                        if cmd['command'] == 'volume':
-                                            target_vol = float(cmd['value'])
-                                        elif cmd['command'] == 'stop':
-                                            interrupted = True
-                                            log_queue.put({'type': 'status', 'text': "🚫 Playback Interrupted"})
-                                except queue.Empty:
-                                    pass
-
-                                if interrupted:
-                                    break
-                                
-                                # Smoothing Volume
-                                if abs(current_vol - target_vol) > 0.01:
-                                    current_vol += (target_vol - current_vol) * SMOOTHING
-                                else:
-                                    current_vol = target_vol
-
-                                # Prepare block
-                                end = min(idx + BLOCK_SIZE, total_samples)
-                                block = resampled[idx:end]
-                                
-                                # Apply Volume
-                                block = block * current_vol
-                                
-                                # Write
-                                stream.write(block.astype(np.float32))
-                                idx = end
-                        
-                        if interrupted:
-                            # Clear text queue
-                            while not text_queue.empty():
-                                try:
-                                    text_queue.get_nowait()
-                                except queue.Empty:
-                                    pass
-                
-                except Exception as e:
-                    log_queue.put({'type': 'error', 'text': f"Piper TTS Error: {e}"})
-                
-                finally:
-                    # Remove Playback Lock
-                    set_playback_lock(False)
-                    set_speaking_lock(False)
-                    
-                log_queue.put({'type': 'status', 'text': f"TTS: Finished ({chunk_count} chunks)"})
-            else:
-                log_queue.put({'type': 'status', 'text': "TTS: Empty text, skipping"})
+        output = OutputEngine(selected_device, native_sr, control_queue, log_queue)
+        output.start()
+
+        def synthesize(style, text):
+            # Later sentences are synthesized on the worker pool while earlier ones play
+            for samples in synthesizer.synthesize(text):
+                yield audio.resampled(samples, synthesizer.sample_rate, native_sr)
+
+        cache = None
+        if config.TTS_PHRASE_CACHE:
+            # Piper has no style parameters: every style sounds the same
+            cache = PhraseCache("piper", os.path.basename(self.model_path), "piper", lambda style: None, native_sr, log_queue)
+            cache.warm_up(synthesize)
+            synthesize = cache.cached(synthesize)
+
+        try:
+            SynthesisPipeline(synthesize, output, text_queue, log_queue).run()
+        finally:
+            output.close()
+            synthesizer.close()
+            if cache:
+                cache.close()
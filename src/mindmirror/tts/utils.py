@@ -26,3 +26,29 @@ def set_playback_lock(active: bool) -> None:
                 os.remove(PLAYBACK_LOCK)
     except Exception:
         pass
+
+
+def unpack_tts_item(item) -> tuple:
+    """Splits a TTS queue item into (style, text, epoch). Plain strings are neutral and belong to epoch 0."""
+    if isinstance(item, tuple):
+        if len(item) == 3:
+            return item
+        style, text = item
+        return style, text, 0
+    return "neutral", item, 0
+
+
+class TurnGate:
+    """
+    Tracks the newest LLM turn epoch announced on the control queue, so segments
+    of turns that were cancelled by a barge-in are dropped instead of spoken.
+    """
+    def __init__(self):
+        self.min_epoch = 0
+
+    def update(self, cmd: dict) -> None:
+        if cmd.get('command') == 'epoch':
+            self.min_epoch = max(self.min_epoch, int(cmd['value']))
+
+    def is_stale(self, epoch: int) -> bool:
+        return epoch < self.min_epoch
@@ -43,6 +43,9 @@ def console_process(log_queue):
 
             elif msg['type'] == 'debug':
                 console.print(f"[dim]🐛 {msg['text']}[/dim]")
+
+            elif msg['type'] == 'telemetry':
+                console.print(f"[dim]📊 {msg['text']}[/dim]")
     except KeyboardInterrupt:
         print("LOG shutting down...")
     finally: